@@ -1,19 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Form, Query, Request
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from typing import Optional, List, cast
 import json
-import base64
+import mimetypes
+import os
 from ...core.db.database import async_get_db
 from ...api.dependencies import get_current_user
-from ...core.services.media_management import MediaManagementService
+from ...core.config import settings
+from ...core.services.media_management import MediaManagementService, nearest_thumbnail_size
+from ...core.utils.blob_store import blob_store
+from ...core.utils.uploads import UploadTooLarge, receive_upload
+from ...crud.crud_tier import crud_tiers
+from ...schemas.tier import TierRead
 from ...models.media import MediaFile
 from ...models.project import Project
 from ...models.content import ContentGeneration
 from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
-from datetime import datetime
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
 
 # Initialize templates
 templates = Jinja2Templates(directory="templates")
@@ -32,13 +39,129 @@ async def media_library_page(
         "user": current_user
     })
 
+# Versioned URLs name one exact content, so browsers may keep them for good; the
+# unversioned URLs are revalidated with the ETag on every use.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+def _content_version(media_file: MediaFile) -> str:
+    """Version of what the file's URLs serve: the edit chain for edited files, otherwise the original"""
+    return (media_file.edit_chain_hash or media_file.content_sha256)[:16]
+
+def _media_urls(media_file: MediaFile) -> dict:
+    """Data and thumbnail URLs that change whenever the file's content changes"""
+    version = _content_version(media_file)
+    return {
+        "file_path": f"/api/v1/media/files/{media_file.id}/data?v={version}",
+        "thumbnail_path": f"/api/v1/media/files/{media_file.id}/thumbnail?v={version}",
+    }
+
+def _last_modified(media_file: MediaFile) -> Optional[datetime]:
+    modified = media_file.updated_at or media_file.created_at
+    if modified is None:
+        return None
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=UTC)
+    return modified.astimezone(UTC).replace(microsecond=0)
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent (RFC 9110 13.2.2)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=UTC)
+        return last_modified <= since
+    return False
+
+THUMBNAIL_MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+def _requested_thumbnail(request: Request, size: Optional[int], fmt: Optional[str]) -> tuple[str, int, bool]:
+    """The ``(format, configured size, negotiated)`` a thumbnail request asks for, without looking at stored files"""
+    negotiated = fmt is None
+    if negotiated:
+        fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    size = nearest_thumbnail_size(settings.MEDIA_THUMBNAIL_SIZES, size or settings.MEDIA_THUMBNAIL_DEFAULT_SIZE)
+    return fmt, size, negotiated
+
+def _select_thumbnail(
+    request: Request, variants: dict, size: Optional[int], fmt: Optional[str]
+) -> Optional[tuple[str, str, bool]]:
+    """Pick the thumbnail for the requested size and format from ``{format: {size: blob key or path}}``.
+
+    Returns ``(blob key or path, format, negotiated)``; ``negotiated`` is set when the format came
+    from the Accept header, so the response must vary on it.
+    """
+    if not variants:
+        return None
+    fmt, _, negotiated = _requested_thumbnail(request, size, fmt)
+    if fmt not in variants:
+        fmt = "jpeg" if "jpeg" in variants else next(iter(variants))
+    sizes = variants[fmt]
+    chosen = nearest_thumbnail_size(sizes, size or settings.MEDIA_THUMBNAIL_DEFAULT_SIZE)
+    return sizes[str(chosen)], fmt, negotiated
+
+def _cache_headers(
+    etag: str, last_modified: Optional[datetime], immutable: bool, vary: Optional[str] = None
+) -> dict:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    if vary is not None:
+        headers["Vary"] = vary
+    return headers
+
+def _file_response(path: str, media_type: str, filename: str, headers: dict) -> FileResponse:
+    """FileResponse serves Range requests (206) and honours If-Range"""
+    headers = {**headers, "Content-Disposition": f"inline; filename={filename}"}
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+def _blob_response(
+    request: Request,
+    key: str,
+    media_type: str,
+    filename: str,
+    last_modified: Optional[datetime],
+    immutable: bool,
+    vary: Optional[str] = None,
+) -> Response:
+    """Send a stored blob with a strong content-hash ETag and conditional GET support.
+
+    A matching If-None-Match/If-Modified-Since answers 304 without opening the blob. Local blobs
+    go out through FileResponse; other backends are streamed.
+    """
+    headers = _cache_headers(f'"{blob_store.digest(key)}"', last_modified, immutable, vary)
+    if _is_not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+
+    path = blob_store.local_path(key)
+    if path is not None:
+        return _file_response(path, media_type, filename, headers)
+    headers["Content-Disposition"] = f"inline; filename={filename}"
+    return StreamingResponse(blob_store.open(key), media_type=media_type, headers=headers)
+
+def _render_filename(media_file: MediaFile, render_path: str) -> str:
+    return os.path.splitext(media_file.filename)[0] + os.path.splitext(render_path)[1]
+
 @router.get("/files/{media_file_id}/data")
 async def serve_media_file_data(
+    request: Request,
     media_file_id: int,
+    v: Optional[str] = Query(None, description="Content version from file_path; makes the response cacheable for good"),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(async_get_db)
 ):
-    """Serve media file data from database"""
+    """Serve media file data from the blob store"""
     print(f"[DEBUG] === SERVING MEDIA FILE DATA ===")
     print(f"[DEBUG] Media file ID: {media_file_id}")
     print(f"[DEBUG] User ID: {current_user['id']}")
@@ -60,17 +183,31 @@ async def serve_media_file_data(
             print(f"[DEBUG] Media file not found")
             raise HTTPException(status_code=404, detail="Media file not found")
         
-        # Decode base64 data
-        file_data = base64.b64decode(media_file.file_data.encode('utf-8'))
-        print(f"[DEBUG] Decoded file data size: {len(file_data)} bytes")
+        if media_file.edit_chain_hash:
+            # Edited files are rendered on first request; a revalidation needs no render at all
+            last_modified = _last_modified(media_file)
+            headers = _cache_headers(
+                f'"{media_file.edit_chain_hash}"', last_modified, immutable=v == _content_version(media_file)
+            )
+            if _is_not_modified(request, headers["ETag"], last_modified):
+                return Response(status_code=304, headers=headers)
+            render = await media_service.render_media_file(db, media_file)
+            print(f"[DEBUG] Serving render {render.path}")
+            return _file_response(
+                render.path,
+                mimetypes.guess_type(render.path)[0] or media_file.mime_type,
+                _render_filename(media_file, render.path),
+                headers,
+            )
         
-        return Response(
-            content=file_data,
-            media_type=media_file.mime_type,
-            headers={
-                "Content-Disposition": f"inline; filename={media_file.filename}",
-                "Cache-Control": "public, max-age=3600"
-            }
+        print(f"[DEBUG] Serving blob {media_file.storage_key}, size: {media_file.file_size} bytes")
+        return _blob_response(
+            request,
+            media_file.storage_key,
+            media_file.mime_type,
+            media_file.filename,
+            last_modified=_last_modified(media_file),
+            immutable=v == _content_version(media_file),
         )
         
     except HTTPException:
@@ -83,11 +220,24 @@ async def serve_media_file_data(
 
 @router.get("/files/{media_file_id}/thumbnail")
 async def serve_media_thumbnail(
+    request: Request,
     media_file_id: int,
+    v: Optional[str] = Query(
+        None, description="Content version from thumbnail_path; makes the response cacheable for good"
+    ),
+    size: Optional[int] = Query(
+        None, ge=1, description="Wanted size in px; the smallest stored size at least this big is served"
+    ),
+    fmt: Optional[str] = Query(
+        None,
+        alias="format",
+        pattern="^(webp|jpeg)$",
+        description="Thumbnail format; negotiated from Accept when omitted",
+    ),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(async_get_db)
 ):
-    """Serve media thumbnail from database"""
+    """Serve media thumbnail from the blob store"""
     media_service = MediaManagementService()
     
     try:
@@ -100,19 +250,42 @@ async def serve_media_thumbnail(
         if not media_file:
             raise HTTPException(status_code=404, detail="Media file not found")
         
-        if not media_file.thumbnail_data:
+        if media_file.edit_chain_hash:
+            # The ETag names the chain and the requested variant, so a revalidation needs no render
+            wanted_fmt, wanted_size, negotiated = _requested_thumbnail(request, size, fmt)
+            last_modified = _last_modified(media_file)
+            headers = _cache_headers(
+                f'"{media_file.edit_chain_hash}/{wanted_fmt}/{wanted_size}"',
+                last_modified,
+                immutable=v == _content_version(media_file),
+                vary="Accept" if negotiated else None,
+            )
+            if _is_not_modified(request, headers["ETag"], last_modified):
+                return Response(status_code=304, headers=headers)
+            render = await media_service.render_media_file(db, media_file)
+            thumbnail = _select_thumbnail(request, render.thumbnails, size, fmt)
+            if thumbnail is None:
+                raise HTTPException(status_code=404, detail="Thumbnail not found")
+            path, fmt, _ = thumbnail
+            filename = f"thumb_{_render_filename(media_file, path)}"
+            return _file_response(path, THUMBNAIL_MEDIA_TYPES[fmt], filename, headers)
+        
+        # Files uploaded before multi-size thumbnails only have their single JPEG
+        thumbnail = _select_thumbnail(request, media_file.thumbnail_keys, size, fmt)
+        if thumbnail is None and media_file.thumbnail_storage_key:
+            thumbnail = (media_file.thumbnail_storage_key, "jpeg", False)
+        if thumbnail is None:
             raise HTTPException(status_code=404, detail="Thumbnail not found")
-        
-        # Decode base64 thumbnail data
-        thumbnail_data = base64.b64decode(media_file.thumbnail_data.encode('utf-8'))
-        
-        return Response(
-            content=thumbnail_data,
-            media_type="image/jpeg",
-            headers={
-                "Content-Disposition": f"inline; filename=thumb_{media_file.filename}",
-                "Cache-Control": "public, max-age=3600"
-            }
+        key, fmt, negotiated = thumbnail
+        
+        return _blob_response(
+            request,
+            key,
+            THUMBNAIL_MEDIA_TYPES[fmt],
+            f"thumb_{media_file.filename}",
+            last_modified=_last_modified(media_file),
+            immutable=v == _content_version(media_file),
+            vary="Accept" if negotiated else None,
         )
         
     except HTTPException:
@@ -120,122 +293,96 @@ async def serve_media_thumbnail(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to serve thumbnail: {str(e)}")
 
-@router.post("/upload")
+async def _upload_limit(db: AsyncSession, current_user: dict) -> int:
+    """Maximum upload size for the user's tier, falling back to MEDIA_UPLOAD_MAX_BYTES"""
+    tier_limits = settings.MEDIA_UPLOAD_TIER_MAX_BYTES
+    if tier_limits and current_user.get("tier_id"):
+        tier = await crud_tiers.get(db, id=current_user["tier_id"], schema_to_select=TierRead)
+        if tier:
+            tier = cast(TierRead, tier)
+            return tier_limits.get(tier.name, settings.MEDIA_UPLOAD_MAX_BYTES)
+    return settings.MEDIA_UPLOAD_MAX_BYTES
+
+@router.post(
+    "/upload",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file", "title"],
+                        "properties": {"file": {"type": "string", "format": "binary"}, "title": {"type": "string"}},
+                    }
+                }
+            }
+        }
+    },
+)
 async def upload_media(
-    file: UploadFile = File(...),
-    title: str = Form(...),
+    request: Request,
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(async_get_db)
 ):
-    """Upload a media file (image or video)"""
+    """Upload a media file (image or video)
+
+    The multipart body is streamed: the file is spooled to a temporary file and hashed as it
+    arrives, and oversized uploads are rejected before the rest of the body is read.
+    """
     print(f"[DEBUG] === UPLOAD FUNCTION STARTED ===")
-    print(f"[DEBUG] File object: {file}")
-    print(f"[DEBUG] File filename: {file.filename if file else 'None'}")
-    print(f"[DEBUG] File content type: {file.content_type if file else 'None'}")
-    print(f"[DEBUG] Title: {title}")
-    print(f"[DEBUG] Current user: {current_user}")
-    
-    # Validate file
-    if not file or not file.filename:
-        print(f"[DEBUG] No file provided")
-        raise HTTPException(status_code=400, detail="No file provided")
-    
-    print(f"[DEBUG] Uploading file '{file.filename}' for user {current_user['id']}")
-    print(f"[DEBUG] File content type: {file.content_type}")
-    
-    # Check file size (50MB limit)
+    max_bytes = await _upload_limit(db, current_user)
     try:
-        file_data = await file.read()
-        print(f"[DEBUG] File size: {len(file_data)} bytes")
-        if len(file_data) > 50 * 1024 * 1024:  # 50MB
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 50MB")
+        upload, fields = await receive_upload(request, max_bytes=max_bytes)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"[DEBUG] Error reading file: {e}")
         raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
-    
-    # Reset file position for service
-    await file.seek(0)
-    
-    # Check file type - be more flexible with content type detection
-    allowed_image_types = ["image/jpeg", "image/png", "image/gif", "image/webp", "image/jpg"]
-    allowed_video_types = ["video/mp4", "video/avi", "video/mov", "video/wmv", "video/flv", "video/webm"]
-    
-    content_type = file.content_type or ""
-    print(f"[DEBUG] Content type: {content_type}")
-    
-    # Try to determine file type from content type first
-    if content_type in allowed_image_types:
-        file_type = "image"
-        mime_type = content_type
-    elif content_type in allowed_video_types:
-        file_type = "video"
-        mime_type = content_type
-    else:
-        # Fallback to mimetypes module
-        import mimetypes
-        mime_type, _ = mimetypes.guess_type(file.filename)
-        file_type = "image" if mime_type and mime_type.startswith("image/") else "video"
-        print(f"[DEBUG] Fallback - MIME type: {mime_type}, file type: {file_type}")
-    
-    # Validate file type
-    if file_type == "image" and mime_type not in allowed_image_types:
-        raise HTTPException(status_code=400, detail=f"Unsupported image type: {mime_type}")
-    elif file_type == "video" and mime_type not in allowed_video_types:
-        raise HTTPException(status_code=400, detail=f"Unsupported video type: {mime_type}")
-    
-    print(f"[DEBUG] Final file type: {file_type}, MIME type: {mime_type}")
-    
-    # Simple test to see if we reach this point
-    print(f"[DEBUG] Simple test - if you see this, we passed file validation")
-    
-    # Test database connection
-    print(f"[DEBUG] Testing database connection...")
-    try:
-        # Test a simple database query
-        result = await db.execute(select(1))
-        print(f"[DEBUG] Database connection successful")
-    except Exception as e:
-        print(f"[DEBUG] Database connection failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
-    
-    print(f"[DEBUG] Database test completed, about to create service...")
-    
-    # Upload file
+
     try:
-        print(f"[DEBUG] About to create MediaManagementService...")
+        title = fields.get("title")
+        if not title:
+            raise HTTPException(status_code=400, detail="Title is required")
+        print(f"[DEBUG] Uploading file '{upload.filename}' ({upload.size} bytes) for user {current_user['id']}")
+
+        # Check file type - be more flexible with content type detection
+        allowed_image_types = ["image/jpeg", "image/png", "image/gif", "image/webp", "image/jpg"]
+        allowed_video_types = ["video/mp4", "video/avi", "video/mov", "video/wmv", "video/flv", "video/webm"]
+
+        content_type = upload.content_type or ""
+        if content_type in allowed_image_types:
+            file_type = "image"
+            mime_type = content_type
+        elif content_type in allowed_video_types:
+            file_type = "video"
+            mime_type = content_type
+        else:
+            # Fallback to mimetypes module
+            mime_type, _ = mimetypes.guess_type(upload.filename)
+            file_type = "image" if mime_type and mime_type.startswith("image/") else "video"
+            print(f"[DEBUG] Fallback - MIME type: {mime_type}, file type: {file_type}")
+
+        # Validate file type
+        if file_type == "image" and mime_type not in allowed_image_types:
+            raise HTTPException(status_code=400, detail=f"Unsupported image type: {mime_type}")
+        elif file_type == "video" and mime_type not in allowed_video_types:
+            raise HTTPException(status_code=400, detail=f"Unsupported video type: {mime_type}")
+
         media_service = MediaManagementService()
-        print(f"[DEBUG] MediaManagementService created successfully")
-    except Exception as e:
-        print(f"[DEBUG] Error creating MediaManagementService: {e}")
-        print(f"[DEBUG] Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Service initialization failed: {str(e)}")
-    
-    try:
-        print(f"[DEBUG] Processing upload for user {current_user['id']}")
-        
-        # Determine file type and mime type
-        import mimetypes
-        mime_type, _ = mimetypes.guess_type(file.filename)
-        file_type = "image" if mime_type and mime_type.startswith("image/") else "video"
-        print(f"[DEBUG] File type: {file_type}, MIME type: {mime_type}")
-        
-        print(f"[DEBUG] About to call upload_media_file...")
-        print(f"[DEBUG] Parameters: user_id={current_user['id']}, filename={file.filename}, title={title}")
-        
         media_file = await media_service.upload_media_file(
             db=db,
             user_id=current_user["id"],
-            file_data=file_data,
-            original_filename=file.filename,
+            upload=upload,
+            original_filename=upload.filename,
             title=title,
             description=None,
             tags=None
         )
-        
+
         print(f"[DEBUG] File uploaded successfully with ID {media_file.id}")
-        
+
         return JSONResponse({
             "status": "success",
             "message": "File uploaded successfully",
@@ -244,30 +391,23 @@ async def upload_media(
                 "filename": media_file.filename,
                 "title": media_file.title,
                 "file_type": media_file.file_type,
-                "file_path": f"/api/v1/media/files/{media_file.id}/data",
-                "thumbnail_path": f"/api/v1/media/files/{media_file.id}/thumbnail",
+                **_media_urls(media_file),
                 "width": media_file.width,
                 "height": media_file.height,
                 "duration": media_file.duration,
                 "file_size": media_file.file_size
             }
         })
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[DEBUG] Error uploading file: {e}")
-        print(f"[DEBUG] Error type: {type(e)}")
         import traceback
         traceback.print_exc()
-        
-        # Return more specific error message
-        if "400" in str(e) or "Bad Request" in str(e):
-            raise HTTPException(status_code=400, detail=f"Upload validation failed: {str(e)}")
-        elif "404" in str(e) or "Not Found" in str(e):
-            raise HTTPException(status_code=404, detail=f"Upload failed - not found: {str(e)}")
-        elif "500" in str(e) or "Internal Server Error" in str(e):
-            raise HTTPException(status_code=500, detail=f"Upload failed - server error: {str(e)}")
-        else:
-            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    finally:
+        upload.close()
 
 @router.get("/files")
 async def get_media_files(
@@ -311,8 +451,7 @@ async def get_media_files(
                     "title": mf.title,
                     "description": mf.description,
                     "file_type": mf.file_type,
-                    "file_path": f"/api/v1/media/files/{mf.id}/data",
-                    "thumbnail_path": f"/api/v1/media/files/{mf.id}/thumbnail",
+                    **_media_urls(mf),
                     "width": mf.width,
                     "height": mf.height,
                     "duration": mf.duration,
@@ -363,12 +502,12 @@ async def get_media_file(
                 "title": media_file.title,
                 "description": media_file.description,
                 "file_type": media_file.file_type,
-                "file_path": f"/api/v1/media/files/{media_file.id}/data",
-                "thumbnail_path": f"/api/v1/media/files/{media_file.id}/thumbnail",
+                **_media_urls(media_file),
                 "width": media_file.width,
                 "height": media_file.height,
                 "duration": media_file.duration,
                 "file_size": media_file.file_size,
+                "edited": media_file.edit_chain_hash is not None,
                 "tags": media_file.tags.get("tags", []) if media_file.tags else [],
                 "created_at": media_file.created_at.isoformat() if media_file.created_at else None
             }
@@ -380,6 +519,17 @@ async def get_media_file(
         print(f"[DEBUG] Error getting media file: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get media file: {str(e)}")
 
+def _edited_media_file(media_file: MediaFile) -> dict:
+    return {
+        "id": media_file.id,
+        **_media_urls(media_file),
+        "width": media_file.width,
+        "height": media_file.height,
+        "duration": media_file.duration,
+        "edited": media_file.edit_chain_hash is not None,
+        "updated_at": media_file.updated_at.isoformat() if media_file.updated_at else None
+    }
+
 @router.post("/files/{media_file_id}/edit")
 async def edit_media_file(
     media_file_id: int,
@@ -413,22 +563,53 @@ async def edit_media_file(
         )
         
         if not edited_file:
-            raise HTTPException(status_code=404, detail="Media file not found or edit failed")
+            raise HTTPException(status_code=404, detail="Media file not found")
         
         return JSONResponse({
             "status": "success",
             "message": "File edited successfully",
-            "media_file": {
-                "id": edited_file.id,
-                "updated_at": edited_file.updated_at.isoformat() if edited_file.updated_at else None
-            }
+            "media_file": _edited_media_file(edited_file)
         })
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Edit failed: {str(e)}")
 
+@router.post("/files/{media_file_id}/undo")
+async def undo_media_edit(
+    media_file_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(async_get_db)
+):
+    """Undo the last edit of a media file"""
+    media_service = MediaManagementService()
+    
+    try:
+        media_file = await media_service.undo_media_edit(
+            db=db,
+            media_file_id=media_file_id,
+            user_id=current_user["id"]
+        )
+        
+        if not media_file:
+            raise HTTPException(status_code=404, detail="Media file not found")
+        
+        return JSONResponse({
+            "status": "success",
+            "message": "Last edit undone",
+            "media_file": _edited_media_file(media_file)
+        })
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Undo failed: {str(e)}")
+
 @router.delete("/files/{media_file_id}")
 async def delete_media_file(
     media_file_id: int,
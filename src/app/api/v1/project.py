@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Request, Depends, Form, UploadFile, status, Query
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from ...core.db.database import async_get_db
 from ...models import Project, SocialMediaCredential, ContentGeneration
@@ -8,13 +8,31 @@ from starlette.status import HTTP_303_SEE_OTHER
 from fastapi.templating import Jinja2Templates
 from ...templates import templates
 from sqlalchemy import select, desc, func
+import json
 import os
-from ...core.services.social_media import SocialMediaService
+from ...core.config import settings
+from ...core.services.bulk_projects import insert_bulk_projects, parse_bulk_csv, validate_bulk_specs
+from ...core.services.generation_pipeline import (
+    AWAITING_STREAM_STATUS,
+    GENERATING_STATUS,
+    GENERATION_FAILED_STATUS,
+    IN_PROGRESS_STATUSES,
+    STREAMABLE_STATUSES,
+    start_bulk_generation,
+    start_project_generation,
+    stream_project_generation,
+)
+from ...core.services.project_publishing import publish_project
+from ...core.utils import queue
+from ...core.utils.cancellation import ClientDisconnected, cancel_on_disconnect
+from arq.jobs import Job, JobResult, JobStatus
 from fastapi.responses import JSONResponse
 import asyncio
 from typing import List
 from fastapi import HTTPException
 from ...models.scheduled_post import ScheduledPost
+from ...schemas.project import BulkProjectCreate
+from pydantic import ValidationError
 
 router = APIRouter(tags=["projects"])
 
@@ -89,6 +107,10 @@ async def create_project(
     # Telegram credentials
     telegram_bot_token: str = Form(None),
     telegram_chat_id: str = Form(None),
+    # Skip the generation cache and always call the models
+    force_fresh: bool = Form(False),
+    # Let the review page stream the generation instead of running it as a background job
+    stream_generation: bool = Form(False),
 ):
     print(f"[DEBUG] current_user: {current_user}")
     from ...crud.crud_users import crud_users
@@ -115,39 +137,12 @@ async def create_project(
             content_type=content_type,
             social_medias=",".join(social_medias),  
             created_by_user_id=current_user["id"],  
+            status=AWAITING_STREAM_STATUS if stream_generation else GENERATING_STATUS,
         )
         db.add(project)
         await db.flush()
         print(f"[DEBUG] Created project with ID: {project.id}")
 
-        # Generate text and image
-        from ...core.services.text_generation import TextGenerationService
-        text_service = TextGenerationService()
-        # Pass topic and content_type directly to the text generation service.
-        # The service will construct the final prompt for the AI.
-        generated_text_dict = text_service.generate_text(topic=topic, content_type=content_type)
-
-        image_path = None
-        if project.with_image:
-            from ...core.services.image_generation import ImageGenerationService
-            image_service = ImageGenerationService()
-            image_path = await image_service.generate_image(prompt=project.topic, output_filename=f"project_{project.id}.png")
-            project.image_path = image_path
-
-        # Create a single ContentGeneration entry linked to the new project
-        user_prompt = f"{topic} - {content_type}"
-        content_generation = ContentGeneration(
-            project_id=project.id,
-            user_id=user_id,
-            prompt=user_prompt,
-            generated_text=generated_text_dict,
-            image_path=image_path,
-            include_news=True, # Assuming this is default behavior now
-        )
-        db.add(content_generation)
-        await db.flush()
-        print(f"[DEBUG] ContentGeneration entry created for project ID: {project.id}")
-        
         # Save credentials for each selected platform
         platforms = [p.strip() for p in social_medias if p.strip()]
         for platform in platforms:
@@ -191,6 +186,10 @@ async def create_project(
             )  # type: ignore
             db.add(cred)
         await db.commit()
+        # Text and image are generated in the background and the review page polls generation-status,
+        # or, in streaming mode, the review page runs the generation through generation-stream.
+        if not stream_generation:
+            await start_project_generation(project.id, force_fresh=force_fresh)
         # Print all credentials saved for this project
         creds = await db.execute(select(SocialMediaCredential).where(SocialMediaCredential.project_id == project.id))
         creds = creds.scalars().all()
@@ -198,11 +197,104 @@ async def create_project(
         for c in creds:
             print(f"  Platform: {c.platform}, twitter_api_key: {c.twitter_api_key}, fb_page_id: {c.fb_page_id}, ig_username: {c.ig_username}, linkedin_access_token: {c.linkedin_access_token}, discord_webhook_url: {c.discord_webhook_url}")
 
-        return RedirectResponse(url=f"/api/v1/projects/{project.id}/review", status_code=HTTP_303_SEE_OTHER)
+        review_url = f"/api/v1/projects/{project.id}/review"
+        if stream_generation:
+            review_url += "?stream=1"
+        return RedirectResponse(url=review_url, status_code=HTTP_303_SEE_OTHER)
     except Exception as e:
         print(f"[DEBUG] Exception during project creation: {e}")
         return HTMLResponse(f"Error during project creation: {e}", status_code=500)
 
+@router.post("/projects/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def create_projects_bulk(
+    request: Request,
+    db: AsyncSession = Depends(async_get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Create many projects at once from JSON or CSV and generate their content in the background.
+
+    Accepts ``{"projects": [...], "force_fresh": false}`` (or a bare list) as JSON, a CSV body,
+    or a multipart form with the CSV in ``file``. CSV columns match the spec fields; separate
+    platforms with ``;``. Invalid items are reported per index and do not stop the others.
+    """
+    content_type_header = request.headers.get("content-type", "")
+    force_fresh = False
+    try:
+        if content_type_header.startswith("application/json"):
+            payload = await request.json()
+            if isinstance(payload, list):
+                payload = {"projects": payload}
+            bulk = BulkProjectCreate.model_validate(payload)
+            raw_specs, force_fresh = bulk.projects, bulk.force_fresh
+        elif content_type_header.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(status_code=400, detail="Upload the CSV as the 'file' field")
+            raw_specs = parse_bulk_csv((await upload.read()).decode("utf-8-sig"))
+            force_fresh = str(form.get("force_fresh", "")).lower() in ("1", "true", "yes", "on")
+        else:
+            raw_specs = parse_bulk_csv((await request.body()).decode("utf-8-sig"))
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read project specs: {e}")
+
+    if not raw_specs:
+        raise HTTPException(status_code=400, detail="No projects given")
+    if len(raw_specs) > settings.BULK_PROJECT_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_PROJECT_MAX_ITEMS} projects per request")
+
+    specs, errors = validate_bulk_specs(raw_specs)
+    created = await insert_bulk_projects(db, current_user["id"], specs, errors)
+    job_id = await start_bulk_generation(list(created.values()), force_fresh=force_fresh) if created else None
+
+    items = []
+    for index in range(len(raw_specs)):
+        if index in created:
+            items.append({"index": index, "status": GENERATING_STATUS, "project_id": created[index]})
+        else:
+            items.append({"index": index, "status": "invalid", "error": errors.get(index, "Not created")})
+    ids = ",".join(str(project_id) for project_id in created.values())
+    return {
+        "created": len(created),
+        "failed": len(raw_specs) - len(created),
+        "items": items,
+        "job_id": job_id,
+        "status_url": f"/api/v1/projects/bulk-status?ids={ids}" if ids else None,
+    }
+
+@router.get("/projects/bulk-status")
+async def get_bulk_status(
+    ids: str = Query(..., description="Comma-separated project ids"),
+    db: AsyncSession = Depends(async_get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        project_ids = [int(project_id) for project_id in ids.split(",") if project_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+
+    result = await db.execute(
+        select(Project.id, Project.status)
+        .where(Project.id.in_(project_ids), Project.created_by_user_id == current_user["id"])
+    )
+    statuses = dict(result.all())
+    items = [
+        {
+            "project_id": project_id,
+            "status": statuses.get(project_id, "Not found"),
+            "done": statuses.get(project_id) != GENERATING_STATUS,
+        }
+        for project_id in project_ids
+    ]
+    response = JSONResponse({
+        "total": len(items),
+        "done": sum(1 for item in items if item["done"]),
+        "failed": sum(1 for item in items if item["status"] == GENERATION_FAILED_STATUS),
+        "items": items,
+    })
+    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    return response
+
 @router.get("/projects/search")
 async def search_projects(
     q: str = Query(..., min_length=1),
@@ -320,6 +412,12 @@ async def review_project(request: Request, project_id: int, db: AsyncSession = D
             else:
                 import os
                 image_path = "/public/generated_images/" + os.path.basename(image_path)
+    # The page streams the generation of a project created for streaming, or on ?stream=1 when no
+    # content was produced; otherwise it polls a running generation or offers to start one.
+    generation_incomplete = content_generation is None and project.status in STREAMABLE_STATUSES
+    stream_generation = generation_incomplete and (
+        project.status == AWAITING_STREAM_STATUS or request.query_params.get("stream") == "1"
+    )
     return templates.TemplateResponse(
         "review_project.html",
         {
@@ -329,10 +427,70 @@ async def review_project(request: Request, project_id: int, db: AsyncSession = D
             "user": current_user,
             "username": current_user.get('username'),
             "generated_text": generated_text,
-            "image_path": image_path
+            "image_path": image_path,
+            "generating": project.status in IN_PROGRESS_STATUSES or stream_generation,
+            "stream_generation": stream_generation,
+            "generation_incomplete": generation_incomplete,
         }
     )
 
+@router.get("/projects/{project_id}/generation-stream")
+async def stream_generation_events(
+    project_id: int,
+    force_fresh: bool = Query(False),
+    db: AsyncSession = Depends(async_get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Generate the project's content and stream it to the browser as Server-Sent Events.
+
+    Disconnecting cancels the generation; the project is then marked "Generation Cancelled"
+    and can be streamed again.
+    """
+    project = await db.get(Project, project_id)
+    if not project or getattr(project, 'created_by_user_id', None) != current_user.get("id"):
+        raise HTTPException(status_code=404, detail="Project not found or access denied")
+    if project.status in IN_PROGRESS_STATUSES:
+        raise HTTPException(status_code=409, detail="Content is already being generated")
+    if project.status not in STREAMABLE_STATUSES:
+        raise HTTPException(status_code=409, detail="Project content has already been generated")
+    if await db.scalar(select(ContentGeneration.id).where(ContentGeneration.project_id == project_id)):
+        raise HTTPException(status_code=409, detail="Project content has already been generated")
+
+    async def events():
+        async for event, data in stream_project_generation(project, force_fresh=force_fresh):
+            if event == "image":
+                data = {"image_url": "/public/generated_images/" + os.path.basename(data["image_path"])}
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/projects/{project_id}/generation-status")
+async def get_generation_status(
+    project_id: int,
+    db: AsyncSession = Depends(async_get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    project = await db.get(Project, project_id)
+    if not project or getattr(project, 'created_by_user_id', None) != current_user.get("id"):
+        raise HTTPException(status_code=404, detail="Project not found or access denied")
+
+    content_generation = await db.scalar(
+        select(ContentGeneration).where(ContentGeneration.project_id == project_id)
+    )
+    response = JSONResponse({
+        "project_id": project_id,
+        "status": project.status,
+        "done": project.status not in IN_PROGRESS_STATUSES,
+        "has_content": content_generation is not None,
+        "image_missing": bool(project.with_image and content_generation and not content_generation.image_path),
+    })
+    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    return response
+
 @router.get("/projects/{project_id}/schedule-details", response_class=HTMLResponse)
 async def schedule_details_page(request: Request, project_id: int, current_user: dict = Depends(get_current_user)):
     return templates.TemplateResponse("schedule_details.html", {
@@ -351,7 +509,16 @@ async def edit_project_image(request: Request, project_id: int, new_image: Uploa
     if new_image is None:
         from ...core.services.image_generation import ImageGenerationService
         image_service = ImageGenerationService()
-        image_path = await image_service.generate_image(prompt=project.topic, output_filename=f"project_{project_id}.png")
+        try:
+            image_path = await cancel_on_disconnect(
+                request,
+                # The user asked for a different image, so never serve a cached one.
+                image_service.generate_image(
+                    prompt=project.topic, output_filename=f"project_{project_id}.png", force_fresh=True
+                ),
+            )
+        except ClientDisconnected:
+            return HTMLResponse("Client disconnected", status_code=499)
         # Ensure the returned path is web-accessible
         if not image_path.startswith("/public/"):
             # If image_path is like 'public/generated_images/xxx.jpg', add leading slash
@@ -436,66 +603,30 @@ async def post_now_project(project_id: int, db: AsyncSession = Depends(async_get
     project = await db.get(Project, project_id)
     if not project or getattr(project, 'created_by_user_id', None) != current_user.get("id"):
         raise HTTPException(status_code=404, detail="Project not found or access denied")
+    if project.status in IN_PROGRESS_STATUSES:
+        raise HTTPException(status_code=409, detail="Content is still being generated")
 
-    # This is where the service call was incorrect.
-    # The method is post_to_social_media, and it needs the text, image path, and credentials.
-    
-    # Fetch credentials
-    creds_result = await db.execute(select(SocialMediaCredential).where(SocialMediaCredential.project_id == project_id))
-    all_creds = creds_result.scalars().all()
-    
-    # Create credentials map with proper platform name mapping
-    credentials_map = {}
-    for c in all_creds:
-        platform = c.platform
-        # Map platform names to match what the service expects
-        if platform == "twitter":
-            credentials_map["twitter"] = c.__dict__
-            credentials_map["x"] = c.__dict__  # Also support "x" for Twitter
-        else:
-            credentials_map[platform] = c.__dict__
-    
-    # Filter by platforms selected in the project
-    project_platforms = [p.strip().lower() for p in project.social_medias.split(',')]
-    filtered_credentials = {}
-    for platform, creds in credentials_map.items():
-        if platform in project_platforms or (platform == "twitter" and "x" in project_platforms):
-            filtered_credentials[platform] = creds
-    credentials_map = filtered_credentials
-    
-    # Debug logging
-    # print(f"[DEBUG] Project social_medias: {project.social_medias}")
-    # print(f"[DEBUG] Found credentials: {len(all_creds)}")
-    # print(f"[DEBUG] Credentials map: {credentials_map}")
-    
-    # Fetch content
-    content_generation = await db.scalar(select(ContentGeneration).where(ContentGeneration.project_id == project_id))
-    text_payload = content_generation.generated_text if content_generation else {"default": project.topic}
-    
-    image_path = None
-    if project.with_image:
-        image_path = content_generation.image_path if content_generation and content_generation.image_path else None
-    
-    # print(f"[DEBUG] Text payload: {text_payload}")
-    # print(f"[DEBUG] Image path: {image_path}")
-
-    service = SocialMediaService()
-    results = service.post_to_social_media(text_payload, image_path, credentials_map)
+    # With the publish queue enabled the worker does the posting; poll the job for the outcome.
+    # The job id is fixed per project, so a double click or a retried request cannot post twice.
+    if queue.pool is not None:
+        job_id = f"publish-project:{project_id}"
+        job = await queue.pool.enqueue_job("publish_project", project_id, _job_id=job_id)
+        if job is None:
+            job_status = await Job(job_id, queue.pool).status()
+            if job_status not in (JobStatus.deferred, JobStatus.queued, JobStatus.in_progress):
+                raise HTTPException(status_code=409, detail="This project was just published, try again shortly")
+        return JSONResponse(
+            {
+                "status": "queued",
+                "job_id": job_id,
+                "status_url": f"/api/v1/projects/{project_id}/publish-jobs/{job_id}",
+            },
+            status_code=status.HTTP_202_ACCEPTED,
+        )
 
-    # Determine overall status and update project
+    results = await publish_project(db, project)
     successful_platforms = results.get('successful_platforms', [])
     failed_platforms = results.get('failed_platforms', [])
-    if successful_platforms and failed_platforms:
-        project.status = "Partial"
-    elif successful_platforms:
-        project.status = "Posted"
-    else:
-        project.status = "Failed"
-
-    # Save project status
-    db.add(project)
-    await db.commit()
-    await db.refresh(project)
 
     # Return the detailed results from the service
     if successful_platforms and not failed_platforms:
@@ -511,6 +642,37 @@ async def post_now_project(project_id: int, db: AsyncSession = Depends(async_get
         
         raise HTTPException(status_code=500, detail=error_message)
 
+@router.get("/projects/{project_id}/publish-jobs/{job_id}")
+async def get_publish_job_status(
+    project_id: int,
+    job_id: str,
+    db: AsyncSession = Depends(async_get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    project = await db.get(Project, project_id)
+    if not project or getattr(project, 'created_by_user_id', None) != current_user.get("id"):
+        raise HTTPException(status_code=404, detail="Project not found or access denied")
+    if queue.pool is None:
+        raise HTTPException(status_code=404, detail="Publish queue is not enabled")
+
+    job = Job(job_id, queue.pool)
+    info = await job.info()
+    if info is None or info.function != "publish_project" or tuple(info.args) != (project_id,):
+        raise HTTPException(status_code=404, detail="Publish job not found")
+
+    job_status = await job.status()
+    response = {
+        "job_id": job_id,
+        "status": job_status.value,
+        "tries": info.job_try,
+        "enqueue_time": info.enqueue_time.isoformat() if info.enqueue_time else None,
+        "project_status": project.status,
+    }
+    if isinstance(info, JobResult):
+        response["success"] = info.success
+        response["result"] = info.result if info.success else str(info.result)
+    return response
+
 @router.delete("/projects/{project_id}/delete", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: int,
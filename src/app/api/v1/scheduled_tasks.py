@@ -13,7 +13,7 @@ from ...models.post import Post
 from ...models.project import Project
 from sqlalchemy import select, desc, func
 from ...core.services.social_media import SocialMediaService
-from ...core.scheduler import Scheduler
+from ...core.scheduler import Scheduler, scheduled_post_timer
 from typing import List, Dict, Optional, Any
 from ...models.scheduled_post import ScheduledPost
 from ...api.dependencies import get_current_user
@@ -74,7 +74,7 @@ async def post_scheduled(
                         "fb_page_id": cred.client_id,
                         "fb_page_access_token": cred.access_token,
                     }
-                    sm_service.post_to_facebook({"facebook": message}, image_path, credentials)
+                    await sm_service.post_to_facebook({"facebook": message}, image_path, credentials)
                 elif platform == "twitter":
                     credentials = {
                         "twitter_api_key": cred.client_id,
@@ -94,12 +94,12 @@ async def post_scheduled(
                         "linkedin_access_token": cred.access_token,
                         "linkedin_author_urn": cred.client_id,
                     }
-                    sm_service.post_to_linkedin({"linkedin": message}, image_path, credentials)
+                    await sm_service.post_to_linkedin({"linkedin": message}, image_path, credentials)
                 elif platform == "discord":
                     credentials = {
                         "discord_webhook_url": cred.access_token,
                     }
-                    sm_service.post_to_discord({"discord": message}, image_path, credentials)
+                    await sm_service.post_to_discord({"discord": message}, image_path, credentials)
                 #logging.info(f"[SCHEDULER] Successfully posted to {platform} for post ID {post.id}")
             except Exception as e:
                 #logging.error(f"[SCHEDULER] Error posting to {platform} for post ID {post.id}: {e}")
@@ -259,6 +259,8 @@ async def reschedule_project(
     
     await db.commit()
     await db.refresh(existing_scheduled)
+    if existing_scheduled.status == "scheduled":
+        scheduled_post_timer.push(existing_scheduled.id, existing_scheduled.scheduled_time)
     
     return {
         "status": "rescheduled",
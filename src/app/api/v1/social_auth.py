@@ -4,9 +4,10 @@ from ...core.db.database import async_get_db
 from ...models.social_credentials import SocialCredential
 from ...models.user import User
 from datetime import datetime, timedelta
-import requests
 import os
 
+from ...core.utils.http_client import http_clients
+
 router = APIRouter()
 
 FACEBOOK_CLIENT_ID = os.getenv("FACEBOOK_CLIENT_ID")
@@ -30,7 +31,7 @@ async def facebook_callback(
         "client_secret": FACEBOOK_CLIENT_SECRET,
         "code": code,
     }
-    resp = requests.get(token_url, params=params)
+    resp = await http_clients.get(token_url, params=params)
     if resp.status_code != 200:
         raise HTTPException(status_code=400, detail="Failed to get access token")
     data = resp.json()
@@ -86,7 +86,20 @@ class FirstUserSettings(BaseConfig):
 # -----------------------------------------------------------
 class ContentGenerationSettings(BaseConfig):
     OPENAI_API_KEY: str = ""
+    OPENAI_TIMEOUT: float = 120.0  # seconds; DALL-E calls routinely take 10-30 s
+    OPENAI_MAX_RETRIES: int = 2
     NEWS_API_KEY: str = ""
+    # News lookups are cached per normalized topic; many projects share trending topics.
+    NEWS_CACHE_TTL_SECONDS: int = 900
+    NEWS_CACHE_MAX_ENTRIES: int = 512
+    NEWS_CACHE_USE_REDIS: bool = False  # also share entries through the Redis cache when it is configured
+    # Reuse model output for identical (model, prompt) inputs instead of paying for a new completion.
+    GENERATION_CACHE_ENABLED: bool = False
+    GENERATION_CACHE_TTL_SECONDS: int = 86400
+    GENERATION_CACHE_MAX_ENTRIES: int = 1024
+    BULK_PROJECT_MAX_ITEMS: int = 100
+    BULK_GENERATION_CONCURRENCY: int = 5  # model calls in flight per bulk batch
+    BULK_GENERATION_JOB_TIMEOUT_SECONDS: int = 3600
 
     TWITTER_API_KEY: str = ""
     TWITTER_API_SECRET: str = ""
@@ -104,6 +117,90 @@ class ContentGenerationSettings(BaseConfig):
     DISCORD_WEBHOOK_URL: str = ""
 
 
+# -----------------------------------------------------------
+# Outbound HTTP clients
+# -----------------------------------------------------------
+class HTTPClientSettings(BaseConfig):
+    HTTP_CLIENT_DEFAULT_TIMEOUT: float = 30.0
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 10.0
+    HTTP_CLIENT_HOST_TIMEOUTS: dict[str, float] = {
+        "api.linkedin.com": 60.0,
+        "graph.facebook.com": 60.0,
+        "api.telegram.org": 60.0,
+        "discord.com": 60.0,
+        "api.openai.com": 120.0,
+    }
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = True
+
+
+# -----------------------------------------------------------
+# Publishing
+# -----------------------------------------------------------
+class PublishingSettings(BaseConfig):
+    PUBLISH_PLATFORM_TIMEOUT: float = 120.0  # seconds, per platform call
+    # Hand publishing to the arq worker through the Redis queue instead of running it in the web process.
+    PUBLISH_QUEUE_ENABLED: bool = False
+    PUBLISH_JOB_MAX_TRIES: int = 3
+    PUBLISH_JOB_RETRY_BACKOFF_SECONDS: int = 30
+    # arq job timeouts for publish_project and process_due_scheduled_posts; raised to at least
+    # SCHEDULER_LEASE_SECONDS when registered, so a job is never cancelled while its posts are leased.
+    PUBLISH_JOB_TIMEOUT_SECONDS: int = 1800
+    SCHEDULER_JOB_TIMEOUT_SECONDS: int = 3600
+    # How long a finished post-now job's result is kept for the review page to poll. Its job id is
+    # fixed per project, so the project cannot be posted again through the queue until it expires.
+    PUBLISH_JOB_KEEP_RESULT_SECONDS: int = 300
+    TWITTER_CLIENT_CACHE_SIZE: int = 128
+    TWITTER_CLIENT_IDLE_SECONDS: int = 3600
+    INSTAGRAM_SESSION_DIR: str = "config/instagram"  # one instabot session directory per account
+    MEDIA_VARIANT_CACHE_DIR: str = "media_cache/variants"  # per-platform upload variants, keyed by content hash
+    # Least recently used variants are removed once the variant cache grows past this size.
+    MEDIA_VARIANT_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+
+# -----------------------------------------------------------
+# Media library
+# -----------------------------------------------------------
+class MediaSettings(BaseConfig):
+    MEDIA_UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024
+    # Per-tier overrides of MEDIA_UPLOAD_MAX_BYTES, keyed by tier name.
+    MEDIA_UPLOAD_TIER_MAX_BYTES: dict[str, int] = {}
+    MEDIA_UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    MEDIA_BLOB_BACKEND: str = "local"
+    MEDIA_BLOB_ROOT: str = "media_store"  # content-addressed media bytes for the local backend
+    # Worker processes for CPU-bound Pillow/moviepy transforms; 0 sizes the pool from the CPU count.
+    MEDIA_PROCESS_POOL_WORKERS: int = 0
+    # Thumbnail bounding boxes (px) written on upload from one decode, as WebP (when Pillow has it) and JPEG.
+    MEDIA_THUMBNAIL_SIZES: list[int] = [150, 300, 600]
+    MEDIA_THUMBNAIL_DEFAULT_SIZE: int = 300
+    MEDIA_THUMBNAIL_QUALITY: int = 80
+    # Video backend; without both executables on PATH, videos fall back to moviepy in the process pool.
+    MEDIA_FFMPEG_BINARY: str = "ffmpeg"
+    MEDIA_FFPROBE_BINARY: str = "ffprobe"
+    MEDIA_FFMPEG_TIMEOUT_SECONDS: float = 600.0
+    # Trims starting at most this far after a keyframe start at the keyframe and skip re-encoding.
+    MEDIA_TRIM_KEYFRAME_TOLERANCE_SECONDS: float = 0.5
+    MEDIA_RENDER_CACHE_DIR: str = "media_cache/renders"  # edited media, keyed by edit-chain hash
+    # Least recently used renders are removed once the render cache grows past this size.
+    MEDIA_RENDER_CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+
+
+# -----------------------------------------------------------
+# Scheduled post processing
+# -----------------------------------------------------------
+class SchedulerSettings(BaseConfig):
+    SCHEDULER_CLAIM_BATCH_SIZE: int = 50
+    SCHEDULER_MAX_CONCURRENT_POSTS: int = 10
+    # Renewed as each post starts publishing; must comfortably exceed PUBLISH_PLATFORM_TIMEOUT plus
+    # outbound rate-limit waits, otherwise a slow publish gets reclaimed.
+    SCHEDULER_LEASE_SECONDS: int = 600
+    # The timer wakes exactly when the next known post is due; this slower poll catches posts
+    # written by other processes and leases that expired.
+    SCHEDULER_SAFETY_POLL_SECONDS: int = 300
+
+
 # -----------------------------------------------------------
 # Redis Cache
 # -----------------------------------------------------------
@@ -142,6 +239,21 @@ class DefaultRateLimitSettings(BaseConfig):
     DEFAULT_RATE_LIMIT_PERIOD: int = 3600
 
 
+class OutboundRateLimitSettings(BaseConfig):
+    # Applied per platform account; "rate" is requests per second, "burst" the bucket size.
+    OUTBOUND_RATE_LIMIT_DEFAULT_CONCURRENCY: int = 4
+    OUTBOUND_RATE_LIMIT_DEFAULT_RATE: float = 1.0
+    OUTBOUND_RATE_LIMIT_DEFAULT_BURST: float = 5.0
+    OUTBOUND_RATE_LIMITS: dict[str, dict[str, float]] = {
+        "twitter": {"concurrency": 2, "rate": 0.2, "burst": 3},
+        "instagram": {"concurrency": 1, "rate": 0.05, "burst": 1},
+        "facebook": {"concurrency": 4, "rate": 1.0, "burst": 10},
+        "linkedin": {"concurrency": 2, "rate": 0.5, "burst": 5},
+        "discord": {"concurrency": 2, "rate": 0.5, "burst": 5},
+        "telegram": {"concurrency": 4, "rate": 1.0, "burst": 20},
+    }
+
+
 # -----------------------------------------------------------
 # Admin Panel Settings
 # -----------------------------------------------------------
@@ -188,11 +300,16 @@ class Settings(
     CryptSettings,
     FirstUserSettings,
     ContentGenerationSettings,
+    HTTPClientSettings,
+    PublishingSettings,
+    MediaSettings,
+    SchedulerSettings,
     RedisCacheSettings,
     ClientSideCacheSettings,
     RedisQueueSettings,
     RedisRateLimiterSettings,
     DefaultRateLimitSettings,
+    OutboundRateLimitSettings,
     CRUDAdminSettings,
     EnvironmentSettings,
 ):
@@ -1,10 +1,18 @@
-from datetime import datetime, timezone
+import heapq
+import os
+import socket
+import traceback
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, insert, or_, select, update
+from ..core.config import settings
 from ..core.services.social_media import SocialMediaService
 from ..models.post import Post
 from ..models.scheduled_post import ScheduledPost
-from ..core.db.database import async_get_db
+from ..core.db.database import async_get_db, local_session
+from ..core.utils import queue
 import asyncio
 from apscheduler.schedulers.background import BackgroundScheduler
 import threading
@@ -78,12 +86,12 @@ class Scheduler:
                                 result = await result
                             results[platform] = result
                     elif platform == 'facebook':
-                        result = self.social_media_service.post_to_facebook(text_dict, image_path)
+                        result = await self.social_media_service.post_to_facebook(text_dict, image_path)
                         results[platform] = result
                     elif platform == 'linkedin':
-                        results[platform] = self.social_media_service.post_to_linkedin(text_dict, image_path)
+                        results[platform] = await self.social_media_service.post_to_linkedin(text_dict, image_path)
                     elif platform == 'discord':
-                        results[platform] = self.social_media_service.post_to_discord(text_dict, image_path)
+                        results[platform] = await self.social_media_service.post_to_discord(text_dict, image_path)
                     else:
                         results[platform] = None
                         print(f"Unknown platform: {platform}")
@@ -155,135 +163,383 @@ class Scheduler:
         db.add(scheduled_post)
         await db.commit()
         await db.refresh(scheduled_post)
+        scheduled_post_timer.push(scheduled_post.id, scheduled_post.scheduled_time)
         return {
             "status": "scheduled",
             "message": f"Project content scheduled for {scheduled_time}",
             "scheduled_post_id": scheduled_post.id
         }
 
-async def process_due_scheduled_posts_async():
-    import asyncio
-    from ..models import ScheduledPost, Project, ContentGeneration, SocialMediaCredential, Notification
-    from sqlalchemy import select
-    from ..core.db.database import async_get_db
-    from ..core.services.social_media import SocialMediaService
-    from datetime import datetime
+# Identifies this process as the holder of a scheduled post lease.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
 
-    print(f"[APScheduler] Job started at {datetime.now(timezone.utc)}")
-    db_gen = async_get_db()
-    db = await anext(db_gen)
-    try:
-        # Find all due scheduled posts that haven't been processed yet
+
+async def claim_due_scheduled_posts(db: AsyncSession, limit: int) -> list[tuple[int, int]]:
+    """Atomically claim up to ``limit`` due project posts for this worker.
+
+    Rows are locked with ``FOR UPDATE SKIP LOCKED`` and flipped to "executing" in a single
+    ``UPDATE ... RETURNING``, so concurrent scheduler processes never claim the same row.
+    Rows left in "executing" by a crashed worker become claimable again once their lease expires.
+    Returns ``(scheduled_post_id, project_id)`` pairs.
+    """
+    now = datetime.utcnow()
+    claimable = (
+        select(ScheduledPost.id)
+        .where(
+            ScheduledPost.project_id.is_not(None),
+            or_(
+                and_(ScheduledPost.status == "scheduled", ScheduledPost.scheduled_time <= now),
+                and_(
+                    ScheduledPost.status == "executing",
+                    or_(ScheduledPost.lease_expires_at.is_(None), ScheduledPost.lease_expires_at < now),
+                ),
+            ),
+        )
+        .order_by(ScheduledPost.scheduled_time)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(ScheduledPost)
+        .where(ScheduledPost.id.in_(claimable.scalar_subquery()))
+        .values(
+            status="executing",
+            claimed_by=WORKER_ID,
+            lease_expires_at=now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS),
+            updated_at=now,
+        )
+        .returning(ScheduledPost.id, ScheduledPost.project_id)
+    )
+    claimed = [(row.id, row.project_id) for row in result.all()]
+    await db.commit()
+    return claimed
+
+
+async def renew_scheduled_post_lease(scheduled_post_id: int) -> bool:
+    """Restart this worker's lease on a claimed post just before publishing it.
+
+    A batch is claimed at once but published a few posts at a time, so the lease taken at claim
+    time may be nearly spent when a post's turn comes. Returns False when the post is no longer
+    this worker's, in which case it must not be published.
+    """
+    now = datetime.utcnow()
+    async with local_session() as db:
         result = await db.execute(
-            select(ScheduledPost).where(
-                ScheduledPost.status == "scheduled",
-                ScheduledPost.scheduled_time <= datetime.utcnow()
+            update(ScheduledPost)
+            .where(
+                ScheduledPost.id == scheduled_post_id,
+                ScheduledPost.status == "executing",
+                ScheduledPost.claimed_by == WORKER_ID,
             )
+            .values(lease_expires_at=now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS), updated_at=now)
+            .returning(ScheduledPost.id)
         )
-        pending_posts = result.scalars().all()
-        print(f"[APScheduler] Found {len(pending_posts)} pending scheduled posts at {datetime.now(timezone.utc)}")
-        
-        for scheduled_post in pending_posts:
-            print(f"[APScheduler] Processing scheduled_post id={scheduled_post.id}, post_id={scheduled_post.post_id}, project_id={getattr(scheduled_post, 'project_id', None)}")
-            
-            # Double-check status to prevent duplicate processing
-            await db.refresh(scheduled_post)
-            if scheduled_post.status != "scheduled":
-                print(f"[APScheduler] Skipping scheduled_post {scheduled_post.id} - status is {scheduled_post.status}")
+        renewed = result.first() is not None
+        await db.commit()
+    return renewed
+
+
+async def _prefetch_project_batch(db: AsyncSession, project_ids: set[int]) -> tuple[dict, dict, dict]:
+    """Load projects, generated content and credentials for a batch in three ``IN (...)`` queries."""
+    from ..models import ContentGeneration, Project, SocialMediaCredential
+
+    projects = {
+        project.id: project
+        for project in (await db.execute(select(Project).where(Project.id.in_(project_ids)))).scalars()
+    }
+
+    content_by_project: dict[int, Any] = {}
+    content_result = await db.execute(
+        select(ContentGeneration).where(ContentGeneration.project_id.in_(project_ids)).order_by(ContentGeneration.id)
+    )
+    for content_generation in content_result.scalars():
+        content_by_project.setdefault(content_generation.project_id, content_generation)
+
+    credentials_by_project: dict[int, dict[str, dict]] = defaultdict(dict)
+    creds_result = await db.execute(
+        select(SocialMediaCredential).where(SocialMediaCredential.project_id.in_(project_ids))
+    )
+    for credential in creds_result.scalars():
+        credentials_by_project[credential.project_id][credential.platform] = credential.__dict__
+
+    return projects, content_by_project, credentials_by_project
+
+
+def _project_status(results: dict) -> str:
+    successful_platforms = results.get('successful_platforms', []) if results else []
+    failed_platforms = results.get('failed_platforms', []) if results else []
+    if successful_platforms and failed_platforms:
+        return "Partial"
+    elif successful_platforms:
+        return "Posted"
+    return "Failed"
+
+
+def _execution_notification(project, results: Optional[dict], error: Optional[str]) -> dict:
+    if error is not None:
+        notification_type = "error"
+        notification_title = f"Project '{project.name}' Execution Failed"
+        notification_message = f"Your project '{project.name}' failed to execute due to an error: {error}"
+    else:
+        successful_platforms = results.get('successful_platforms', []) if results else []
+        failed_platforms = results.get('failed_platforms', []) if results else []
+        if successful_platforms and not failed_platforms:
+            notification_type = "success"
+        elif successful_platforms and failed_platforms:
+            notification_type = "warning"
+        else:
+            notification_type = "error"
+        notification_title = f"Project '{project.name}' Execution Complete"
+
+        if successful_platforms and not failed_platforms:
+            notification_message = (
+                f"Your project '{project.name}' was successfully posted to: {', '.join(successful_platforms)}"
+            )
+        elif successful_platforms and failed_platforms:
+            notification_message = (
+                f"Your project '{project.name}' was partially posted. "
+                f"Success: {', '.join(successful_platforms)}. Failed: {', '.join(failed_platforms)}"
+            )
+        else:
+            notification_message = (
+                f"Your project '{project.name}' failed to post to any platforms. "
+                "Please check your credentials and try again."
+            )
+
+    return {
+        "user_id": project.created_by_user_id,
+        "project_id": project.id,
+        "title": notification_title,
+        "message": notification_message,
+        "notification_type": notification_type,
+        "is_read": False,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+async def process_claimed_batch(claimed: list[tuple[int, int]]) -> None:
+    """Publish a batch of claimed project posts.
+
+    Everything the batch needs is prefetched up front, the posts are published concurrently,
+    and the outcome is written back as one bulk update plus one notification insert.
+    """
+    from ..models import Notification, Project
+
+    async with local_session() as db:
+        projects, content_by_project, credentials_by_project = await _prefetch_project_batch(
+            db, {project_id for _, project_id in claimed}
+        )
+    service = SocialMediaService()
+    semaphore = asyncio.Semaphore(settings.SCHEDULER_MAX_CONCURRENT_POSTS)
+
+    async def publish(scheduled_post_id: int, project_id: int) -> tuple[Optional[dict], Optional[str]]:
+        async with semaphore:
+            try:
+                if not await renew_scheduled_post_lease(scheduled_post_id):
+                    print(f"[APScheduler] Lease on scheduled_post {scheduled_post_id} lost before publishing, skipping")
+                    return None, "lease lost"
+                project = projects.get(project_id)
+                if project is None:
+                    raise Exception(f"Project {project_id} not found")
+                content_generation = content_by_project.get(project_id)
+                if content_generation and content_generation.generated_text:
+                    text_payload = content_generation.generated_text
+                else:
+                    text_payload = {"default": project.topic}
+                image_path = content_generation.image_path if content_generation else None
+                results = await service.post_to_social_media(
+                    text_payload, image_path, credentials_by_project.get(project_id, {})
+                )
+                print(
+                    f"[APScheduler] Processed scheduled_post {scheduled_post_id} for project {project_id}, "
+                    f"results: {results}"
+                )
+                return results, None
+            except Exception as e:
+                print(f"[APScheduler] Error processing scheduled_post {scheduled_post_id}: {e}")
+                return None, str(e)
+
+    outcomes = await asyncio.gather(
+        *[publish(scheduled_post_id, project_id) for scheduled_post_id, project_id in claimed]
+    )
+
+    async with local_session() as db:
+        # Only write results for posts whose lease this worker still holds.
+        owned_ids = set(
+            (
+                await db.execute(
+                    select(ScheduledPost.id)
+                    .where(
+                        ScheduledPost.id.in_([scheduled_post_id for scheduled_post_id, _ in claimed]),
+                        ScheduledPost.status == "executing",
+                        ScheduledPost.claimed_by == WORKER_ID,
+                    )
+                    .with_for_update()
+                )
+            ).scalars()
+        )
+
+        now = datetime.utcnow()
+        post_updates, project_updates, notifications = [], [], []
+        for (scheduled_post_id, project_id), (results, error) in zip(claimed, outcomes):
+            if scheduled_post_id not in owned_ids:
+                print(f"[APScheduler] Lease on scheduled_post {scheduled_post_id} was lost, discarding result")
                 continue
-                
-            if scheduled_post.post_id:
-                print(f"[APScheduler] Skipping post-based scheduled_post {scheduled_post.id} (not supported in this mode)")
+            post_updates.append({
+                "id": scheduled_post_id,
+                "status": "failed" if error is not None else "completed",
+                "executed_at": now if error is None else None,
+                "error_message": error,
+                "claimed_by": None,
+                "lease_expires_at": None,
+                "updated_at": now,
+            })
+            project = projects.get(project_id)
+            if project is None:
                 continue
-            elif scheduled_post.project_id:
-                # Mark as executing to prevent duplicate processing
-                scheduled_post.status = "executing"
-                await db.commit()
-                
-                try:
-                    project = await db.get(Project, scheduled_post.project_id)
-                    content_generation = await db.scalar(
-                        select(ContentGeneration).where(ContentGeneration.project_id == scheduled_post.project_id)
-                    )
-                    creds_result = await db.execute(
-                        select(SocialMediaCredential).where(SocialMediaCredential.project_id == scheduled_post.project_id)
-                    )
-                    all_creds = creds_result.scalars().all()
-                    credentials_map = {c.platform: c.__dict__ for c in all_creds}
-                    text_payload = content_generation.generated_text if content_generation and content_generation.generated_text else {"default": project.topic}
-                    image_path = content_generation.image_path if content_generation and content_generation.image_path else None
-                    service = SocialMediaService()
-                    results = service.post_to_social_media(text_payload, image_path, credentials_map)
-                    print(f"[APScheduler] Processed scheduled project: {project.id}, results: {results}")
-                    
-                    # Update scheduled post status
-                    scheduled_post.status = "completed"
-                    scheduled_post.executed_at = datetime.utcnow()
-                    
-                    # Update project status based on platform results
-                    successful_platforms = results.get('successful_platforms', []) if results else []
-                    failed_platforms = results.get('failed_platforms', []) if results else []
-                    if successful_platforms and failed_platforms:
-                        project.status = "Partial"
-                    elif successful_platforms:
-                        project.status = "Posted"
-                    else:
-                        project.status = "Failed"
-                    
-                    # Create notification for project execution
-                    notification_type = "success" if successful_platforms and not failed_platforms else "warning" if successful_platforms and failed_platforms else "error"
-                    notification_title = f"Project '{project.name}' Execution Complete"
-                    
-                    if successful_platforms and not failed_platforms:
-                        notification_message = f"Your project '{project.name}' was successfully posted to: {', '.join(successful_platforms)}"
-                    elif successful_platforms and failed_platforms:
-                        notification_message = f"Your project '{project.name}' was partially posted. Success: {', '.join(successful_platforms)}. Failed: {', '.join(failed_platforms)}"
-                    else:
-                        notification_message = f"Your project '{project.name}' failed to post to any platforms. Please check your credentials and try again."
-                    
-                    # Create notification
-                    notification = Notification(
-                        user_id=project.created_by_user_id,
-                        project_id=project.id,
-                        title=notification_title,
-                        message=notification_message,
-                        notification_type=notification_type,
-                        is_read=False,
-                        created_at=datetime.utcnow(),
-                        updated_at=datetime.utcnow()
-                    )
-                    db.add(notification)
-                    
-                    await db.commit()
-                    print(f"[APScheduler] Successfully completed scheduled_post {scheduled_post.id}")
-                    
-                except Exception as e:
-                    print(f"[APScheduler] Error processing scheduled_post {scheduled_post.id}: {e}")
-                    scheduled_post.status = "failed"
-                    scheduled_post.error_message = str(e)
-                    
-                    # Create error notification
-                    if project:
-                        notification = Notification(
-                            user_id=project.created_by_user_id,
-                            project_id=project.id,
-                            title=f"Project '{project.name}' Execution Failed",
-                            message=f"Your project '{project.name}' failed to execute due to an error: {str(e)}",
-                            notification_type="error",
-                            is_read=False,
-                            created_at=datetime.utcnow(),
-                            updated_at=datetime.utcnow()
-                        )
-                        db.add(notification)
-                    
-                    await db.commit()
-            else:
-                print(f"[APScheduler] Skipping scheduled post with no post_id or project_id: {scheduled_post}")
+            if error is None:
+                project_updates.append({"id": project_id, "status": _project_status(results)})
+            notifications.append(_execution_notification(project, results, error))
+
+        # ORM bulk UPDATE by primary key: one executemany per table.
+        if post_updates:
+            await db.execute(update(ScheduledPost), post_updates)
+        if project_updates:
+            await db.execute(update(Project), project_updates)
+        if notifications:
+            await db.execute(insert(Notification), notifications)
+        await db.commit()
+    print(f"[APScheduler] Completed batch of {len(post_updates)} scheduled posts")
+
+
+async def process_due_scheduled_posts_async():
+    """Claim due project posts in batches and publish each batch concurrently.
+
+    Safe to run from any number of scheduler processes at once; see ``claim_due_scheduled_posts``.
+    """
+    print(f"[APScheduler] Job started at {datetime.now(timezone.utc)}")
+    try:
+        while True:
+            async with local_session() as db:
+                claimed = await claim_due_scheduled_posts(db, settings.SCHEDULER_CLAIM_BATCH_SIZE)
+            print(f"[APScheduler] Claimed {len(claimed)} scheduled posts as {WORKER_ID}")
+            if not claimed:
+                break
+            await process_claimed_batch(claimed)
+            if len(claimed) < settings.SCHEDULER_CLAIM_BATCH_SIZE:
+                break
     except Exception as e:
         print(f"[APScheduler] Exception in job: {e}")
         import traceback; traceback.print_exc()
-    finally:
-        await db.aclose()
+
+
+async def dispatch_due_scheduled_posts():
+    """Hand due posts to the arq worker when the publish queue is enabled, otherwise publish in-process."""
+    if queue.pool is not None:
+        await queue.pool.enqueue_job("process_due_scheduled_posts")
+    else:
+        await process_due_scheduled_posts_async()
+
+
+# Cap on the timer's backoff between failed dispatches (e.g. while Redis is unreachable).
+DISPATCH_RETRY_MAX_SECONDS = 60
+
+
+class ScheduledPostTimer:
+    """In-memory min-heap of upcoming ``scheduled_time`` values.
+
+    Only project posts are tracked, since those are the rows ``claim_due_scheduled_posts`` selects.
+    The heap is loaded from the database at startup and pushed to whenever one is written, so the
+    timer can sleep until the earliest entry instead of polling every minute.
+    A rescheduled post is simply pushed again; the superseded heap entry is skipped when popped.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._times: dict[int, datetime] = {}
+        self._wakeup = asyncio.Event()
+
+    def push(self, scheduled_post_id: int, scheduled_time: datetime) -> None:
+        self._times[scheduled_post_id] = scheduled_time
+        heapq.heappush(self._heap, (scheduled_time, scheduled_post_id))
+        if self._heap[0] == (scheduled_time, scheduled_post_id):
+            self._wakeup.set()
+
+    async def load(self) -> None:
+        """Rebuild the heap from every post still waiting to be published."""
+        async with local_session() as db:
+            result = await db.execute(
+                select(ScheduledPost.id, ScheduledPost.scheduled_time).where(
+                    ScheduledPost.status == "scheduled", ScheduledPost.project_id.is_not(None)
+                )
+            )
+            rows = result.all()
+        self._times = {row.id: row.scheduled_time for row in rows}
+        self._heap = [(scheduled_time, scheduled_post_id) for scheduled_post_id, scheduled_time in self._times.items()]
+        heapq.heapify(self._heap)
+        self._wakeup.set()
+
+    def _discard_stale(self) -> None:
+        while self._heap and self._times.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: datetime) -> bool:
+        due = False
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, scheduled_post_id = heapq.heappop(self._heap)
+            del self._times[scheduled_post_id]
+            due = True
+            self._discard_stale()
+        return due
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+    async def run(self) -> None:
+        try:
+            await self.load()
+        except Exception as e:
+            # The safety-net poll keeps publishing and retries the load.
+            print(f"[APScheduler] Could not load scheduled post timer: {e}")
+        failures = 0
+        while True:
+            self._wakeup.clear()
+            # Popped posts stay pending until a dispatch succeeds, so a failed one is retried.
+            if self._pop_due(datetime.utcnow()) or failures:
+                try:
+                    await dispatch_due_scheduled_posts()
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    delay = min(2 ** failures, DISPATCH_RETRY_MAX_SECONDS)
+                    print(f"[APScheduler] Dispatching due scheduled posts failed, retrying in {delay}s: {e}")
+                    traceback.print_exc()
+                    await asyncio.sleep(delay)
+                continue
+
+            timeout = self.seconds_until_next(datetime.utcnow())
+            try:
+                if timeout is None:
+                    await self._wakeup.wait()
+                else:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except TimeoutError:
+                pass
+
+
+scheduled_post_timer = ScheduledPostTimer()
+
+
+async def safety_poll_scheduled_posts_async():
+    """Slow fallback for posts the in-process timer cannot see (other processes, expired leases)."""
+    await scheduled_post_timer.load()
+    await dispatch_due_scheduled_posts()
+
 
 async def sync_analytics_async():
     """Scheduled task to sync analytics data for all projects"""
@@ -301,8 +557,18 @@ async def sync_analytics_async():
 def schedule_apscheduler_job(app):
     # print("[APScheduler] schedule_apscheduler_job called")
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(process_due_scheduled_posts_async, 'interval', minutes=1)
+    scheduler.add_job(safety_poll_scheduled_posts_async, 'interval', seconds=settings.SCHEDULER_SAFETY_POLL_SECONDS)
     # Add analytics sync job to run every 6 hours
     scheduler.add_job(sync_analytics_async, 'interval', hours=6)
     scheduler.start()
-    app.state.apscheduler = scheduler
\ No newline at end of file
+    app.state.apscheduler = scheduler
+    app.state.scheduled_post_timer_task = asyncio.create_task(scheduled_post_timer.run())
+
+
+def stop_apscheduler_job(app):
+    timer_task = getattr(app.state, "scheduled_post_timer_task", None)
+    if timer_task:
+        timer_task.cancel()
+    apscheduler = getattr(app.state, "apscheduler", None)
+    if apscheduler:
+        apscheduler.shutdown(wait=False)
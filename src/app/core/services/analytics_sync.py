@@ -4,7 +4,6 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import requests
 import time
 import random
 
@@ -13,6 +12,7 @@ from ...models.content import SocialMediaPost
 from ...models.project import Project, SocialMediaCredential
 from ...models.content import ContentGeneration
 from ...core.db.database import async_get_db
+from ..utils.outbound_limit import outbound_limits
 from .social_media_apis import TwitterAPI, FacebookAPI, InstagramAPI, LinkedInAPI, DiscordAPI, TelegramAPI
 
 logger = logging.getLogger(__name__)
@@ -170,7 +170,8 @@ class AnalyticsSyncService:
         """Fetch analytics with exponential backoff retry logic"""
         for attempt in range(max_retries):
             try:
-                analytics_data = await self.platform_apis[platform](credentials, post_id, db)
+                async with outbound_limits.limit(platform, credentials):
+                    analytics_data = await self.platform_apis[platform](credentials, post_id, db)
                 
                 if analytics_data:
                     return analytics_data
@@ -202,7 +203,7 @@ class AnalyticsSyncService:
             )
             
             # Get real analytics from Twitter API
-            analytics_data = twitter_api.get_tweet_analytics(post_id)
+            analytics_data = await twitter_api.get_tweet_analytics(post_id)
             
             if analytics_data:
                 return analytics_data
@@ -224,7 +225,7 @@ class AnalyticsSyncService:
             )
             
             # Get real analytics from Facebook API
-            analytics_data = facebook_api.get_post_analytics(post_id)
+            analytics_data = await facebook_api.get_post_analytics(post_id)
             
             if analytics_data:
                 return analytics_data
@@ -245,7 +246,7 @@ class AnalyticsSyncService:
             )
             
             # Get real analytics from Instagram API
-            analytics_data = instagram_api.get_post_analytics(post_id)
+            analytics_data = await instagram_api.get_post_analytics(post_id)
             
             if analytics_data:
                 return analytics_data
@@ -266,7 +267,7 @@ class AnalyticsSyncService:
             )
             
             # Get real analytics from LinkedIn API
-            analytics_data = linkedin_api.get_post_analytics(post_id)
+            analytics_data = await linkedin_api.get_post_analytics(post_id)
             
             if analytics_data:
                 return analytics_data
@@ -287,7 +288,7 @@ class AnalyticsSyncService:
             )
             
             # Get real analytics from Discord API
-            analytics_data = discord_api.get_message_analytics(post_id)
+            analytics_data = await discord_api.get_message_analytics(post_id)
             
             if analytics_data:
                 return analytics_data
@@ -309,7 +310,7 @@ class AnalyticsSyncService:
             )
             
             # Get real analytics from Telegram API
-            analytics_data = telegram_api.get_message_analytics(post_id)
+            analytics_data = await telegram_api.get_message_analytics(post_id)
             
             if analytics_data:
                 return analytics_data
@@ -0,0 +1,120 @@
+import csv
+import io
+from collections.abc import Sequence
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models import Project, SocialMediaCredential
+from ...schemas.project import BulkProjectSpec
+from .generation_pipeline import GENERATING_STATUS
+
+# Credential columns copied from the referenced project, per stored platform name.
+CREDENTIAL_FIELDS = {
+    "twitter": ("twitter_api_key", "twitter_api_secret", "twitter_access_token", "twitter_access_secret"),
+    "facebook": ("fb_page_id", "fb_page_access_token"),
+    "instagram": ("ig_username", "ig_password"),
+    "linkedin": ("linkedin_access_token", "linkedin_author_urn"),
+    "discord": ("discord_webhook_url",),
+    "telegram": ("telegram_bot_token", "telegram_chat_id"),
+}
+ALL_CREDENTIAL_FIELDS = [field for fields in CREDENTIAL_FIELDS.values() for field in fields]
+
+
+def stored_platform(platform: str) -> str:
+    platform = platform.strip().lower()
+    return "twitter" if platform == "x" else platform
+
+
+def parse_bulk_csv(text: str) -> list[dict[str, Any]]:
+    """Read project specs from CSV with a header row; empty cells are treated as missing."""
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+        for row in reader
+    ]
+
+
+def validate_bulk_specs(raw_specs: Sequence[Any]) -> tuple[dict[int, BulkProjectSpec], dict[int, str]]:
+    """Validate each spec on its own, so one bad row does not reject the whole batch."""
+    specs: dict[int, BulkProjectSpec] = {}
+    errors: dict[int, str] = {}
+    for index, raw in enumerate(raw_specs):
+        try:
+            specs[index] = BulkProjectSpec.model_validate(raw)
+        except ValidationError as e:
+            errors[index] = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+    return specs, errors
+
+
+async def insert_bulk_projects(
+    db: AsyncSession,
+    user_id: int,
+    specs: dict[int, BulkProjectSpec],
+    errors: dict[int, str],
+) -> dict[int, int]:
+    """Insert the projects and their copied credentials in bulk, in the ``Generating`` status.
+
+    Returns ``{spec index: project id}``. Specs that reference a credential project the user
+    does not own are recorded in ``errors`` and skipped. Commits.
+    """
+    source_ids = {spec.credentials_from_project_id for spec in specs.values() if spec.credentials_from_project_id}
+    source_credentials: dict[int, dict[str, SocialMediaCredential]] = {}
+    if source_ids:
+        result = await db.execute(
+            select(SocialMediaCredential)
+            .join(Project, Project.id == SocialMediaCredential.project_id)
+            .where(SocialMediaCredential.project_id.in_(source_ids), Project.created_by_user_id == user_id)
+        )
+        for cred in result.scalars():
+            source_credentials.setdefault(cred.project_id, {})[cred.platform] = cred
+
+    accepted = []
+    for index, spec in specs.items():
+        if spec.credentials_from_project_id and spec.credentials_from_project_id not in source_credentials:
+            errors[index] = (
+                f"credentials_from_project_id: project {spec.credentials_from_project_id} "
+                "not found or has no credentials"
+            )
+            continue
+        accepted.append(index)
+    if not accepted:
+        return {}
+
+    project_ids = (
+        await db.scalars(
+            insert(Project).returning(Project.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": specs[index].name,
+                    "topic": specs[index].topic,
+                    "content_type": specs[index].content_type,
+                    "with_image": specs[index].with_image,
+                    "social_medias": ",".join(specs[index].platforms),
+                    "created_by_user_id": user_id,
+                    "status": GENERATING_STATUS,
+                }
+                for index in accepted
+            ],
+        )
+    ).all()
+    created = dict(zip(accepted, project_ids))
+
+    credential_rows = []
+    for index, project_id in created.items():
+        spec = specs[index]
+        source = source_credentials.get(spec.credentials_from_project_id, {})
+        for platform in dict.fromkeys(stored_platform(p) for p in spec.platforms):
+            cred = source.get(platform)
+            if cred is None:
+                continue
+            row = {"project_id": project_id, "platform": platform, **dict.fromkeys(ALL_CREDENTIAL_FIELDS)}
+            row.update({field: getattr(cred, field) for field in CREDENTIAL_FIELDS.get(platform, ())})
+            credential_rows.append(row)
+    if credential_rows:
+        await db.execute(insert(SocialMediaCredential), credential_rows)
+
+    await db.commit()
+    return created
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ..config import settings
+from ..utils.ttl_cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+generation_cache = AsyncTTLCache(
+    "generation",
+    ttl=settings.GENERATION_CACHE_TTL_SECONDS,
+    max_entries=settings.GENERATION_CACHE_MAX_ENTRIES,
+)
+
+
+def _delete_cached_image(key: str, image_path: str) -> None:
+    """Remove an evicted image's content-addressed PNG and its JPEG sibling."""
+    for path in (image_path, os.path.splitext(image_path)[0] + ".jpg"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete evicted cached image {path}: {e}")
+
+
+# Values are paths to generated images on disk, which are deleted along with the entry so that
+# GENERATION_CACHE_MAX_ENTRIES bounds disk use as well as memory.
+image_generation_cache = AsyncTTLCache(
+    "generation-image",
+    ttl=settings.GENERATION_CACHE_TTL_SECONDS,
+    max_entries=settings.GENERATION_CACHE_MAX_ENTRIES,
+    on_evict=_delete_cached_image,
+)
+
+
+def generation_key(kind: str, model: str, *parts: str) -> str:
+    """Content address of a model call: what is generated, by which model, from which inputs."""
+    return hashlib.sha256(json.dumps([kind, model, *parts]).encode()).hexdigest()
+
+
+async def cached_generation(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    force_fresh: bool = False,
+    cache: AsyncTTLCache = generation_cache,
+) -> Any:
+    """Return the cached result for ``key`` or run ``loader`` once to produce it.
+
+    A no-op pass-through unless GENERATION_CACHE_ENABLED. ``force_fresh`` always calls the
+    model and replaces the cached result, so a user asking to regenerate gets new output.
+    """
+    if not settings.GENERATION_CACHE_ENABLED:
+        return await loader()
+    if force_fresh:
+        value = await loader()
+        cache.put(key, value)
+        return value
+    return await cache.get_or_load(key, loader)
@@ -0,0 +1,358 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+import anyio
+from sqlalchemy import insert, select, update
+
+from ...models import ContentGeneration, Project
+from ..config import settings
+from ..db.database import local_session
+from ..utils import queue
+from .image_generation import ImageGenerationService
+from .text_generation import TextGenerationService
+
+logger = logging.getLogger(__name__)
+
+GENERATING_STATUS = "Generating"
+GENERATION_FAILED_STATUS = "Generation Failed"
+GENERATION_CANCELLED_STATUS = "Generation Cancelled"
+# A project created for streamed generation, before the review page opened the stream.
+AWAITING_STREAM_STATUS = "Awaiting Generation"
+# Held by the one request that is streaming the project's generation.
+STREAMING_STATUS = "Streaming"
+# Statuses from which a streamed generation may (re)start.
+STREAMABLE_STATUSES = (AWAITING_STREAM_STATUS, GENERATION_FAILED_STATUS, GENERATION_CANCELLED_STATUS)
+# Statuses in which a background job or a stream is producing the project's content.
+IN_PROGRESS_STATUSES = (GENERATING_STATUS, STREAMING_STATUS)
+# Status of a generated project that is ready for review and publishing.
+READY_STATUS = "Pending"
+
+# Strong references to in-process generation tasks, used when the arq queue is disabled.
+_generation_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class GenerationResult:
+    text: dict[str, str]
+    image_path: Optional[str] = None
+    image_error: Optional[str] = None
+
+
+async def generate_project_content(
+    topic: str,
+    content_type: str,
+    with_image: bool,
+    image_filename: str,
+    force_fresh: bool = False,
+) -> GenerationResult:
+    """Generate a project's text and image at the same time.
+
+    Text generation and the enhance-prompt -> image chain are independent, so they run
+    concurrently and the total time is that of the slower chain. A failed image does not
+    discard the text; it is reported through ``image_error`` instead. ``force_fresh`` bypasses
+    the generation cache.
+    """
+    text_service = TextGenerationService()
+    if not with_image:
+        return GenerationResult(
+            text=await text_service.generate_text(topic=topic, content_type=content_type, force_fresh=force_fresh)
+        )
+
+    image_service = ImageGenerationService()
+    text, image = await asyncio.gather(
+        text_service.generate_text(topic=topic, content_type=content_type, force_fresh=force_fresh),
+        image_service.generate_image(prompt=topic, output_filename=image_filename, force_fresh=force_fresh),
+        return_exceptions=True,
+    )
+    if isinstance(text, BaseException):
+        raise text
+    if isinstance(image, BaseException):
+        logger.error(f"Image generation failed, keeping generated text: {image}")
+        return GenerationResult(text=text, image_error=str(image))
+    return GenerationResult(text=text, image_path=image)
+
+
+async def run_project_generation(project_id: int, force_fresh: bool = False) -> dict[str, Any]:
+    """Generate content for a project saved in the ``Generating`` status and store it.
+
+    Runs outside the request that created the project, either as an arq job or as an
+    in-process task. Projects that already left ``Generating`` are skipped, so a repeated
+    job never generates (and pays for) the same content twice.
+    """
+    async with local_session() as db:
+        project = await db.get(Project, project_id)
+        if project is None:
+            logger.warning(f"Project {project_id} no longer exists, skipping generation")
+            return {"status": "failure", "error": "Project not found"}
+        if project.status != GENERATING_STATUS:
+            return {"status": "skipped", "project_status": project.status}
+
+        try:
+            generation = await generate_project_content(
+                topic=project.topic,
+                content_type=project.content_type,
+                with_image=project.with_image,
+                image_filename=f"project_{project.id}.png",
+                force_fresh=force_fresh,
+            )
+        except Exception as e:
+            logger.error(f"Content generation failed for project {project_id}: {e}")
+            project.status = GENERATION_FAILED_STATUS
+            await db.commit()
+            return {"status": "failure", "error": str(e)}
+
+        if generation.image_path:
+            project.image_path = generation.image_path
+        db.add(
+            ContentGeneration(
+                project_id=project.id,
+                user_id=project.created_by_user_id,
+                prompt=f"{project.topic} - {project.content_type}",
+                generated_text=generation.text,
+                image_path=generation.image_path,
+                include_news=True,
+            )
+        )
+        project.status = READY_STATUS
+        await db.commit()
+
+    return {"status": "success", "image_path": generation.image_path, "image_error": generation.image_error}
+
+
+async def start_project_generation(project_id: int, force_fresh: bool = False) -> Optional[str]:
+    """Hand a project's generation to the arq worker, or to an in-process task without a queue.
+
+    Returns the arq job id when queued. The job id is derived from the project, so a second
+    enqueue while the first is queued or running is ignored by arq. ``generate_project`` keeps
+    no result (see WorkerSettings), so the id is free again for a retry once the job finished.
+    """
+    if queue.pool is not None:
+        job_id = f"generate-project:{project_id}"
+        job = await queue.pool.enqueue_job("generate_project", project_id, force_fresh, _job_id=job_id)
+        return job.job_id if job else job_id
+
+    task = asyncio.create_task(run_project_generation(project_id, force_fresh))
+    _generation_tasks.add(task)
+    task.add_done_callback(_generation_tasks.discard)
+    return None
+
+
+async def recover_interrupted_generations() -> int:
+    """Release projects whose generation was running in a previous run of this app.
+
+    Streams die with the process, so ``Streaming`` projects become ``Generation Cancelled``.
+    Without the arq queue, background generation runs as in-process tasks too, so every
+    ``Generating`` project is stranded and becomes ``Generation Failed``; the review page then
+    offers to generate it again. With the queue those jobs live in Redis and the worker
+    finishes them, so they are left alone. Returns the number of projects recovered.
+    """
+    async with local_session() as db:
+        result = await db.execute(
+            update(Project)
+            .where(Project.status == STREAMING_STATUS)
+            .values(status=GENERATION_CANCELLED_STATUS)
+            .returning(Project.id)
+        )
+        recovered = len(result.all())
+        if queue.pool is None:
+            result = await db.execute(
+                update(Project)
+                .where(Project.status == GENERATING_STATUS)
+                .values(status=GENERATION_FAILED_STATUS)
+                .returning(Project.id)
+            )
+            recovered += len(result.all())
+        await db.commit()
+    if recovered:
+        logger.warning(f"Released {recovered} project generations interrupted by a restart")
+    return recovered
+
+
+async def _store_generation_results(
+    project_results: list[tuple[Project, Union[GenerationResult, Exception]]],
+) -> None:
+    """Write a batch of finished generations with one INSERT and one bulk UPDATE."""
+    content_rows = []
+    project_rows = []
+    for project, result in project_results:
+        if isinstance(result, Exception):
+            project_rows.append(
+                {"id": project.id, "status": GENERATION_FAILED_STATUS, "image_path": project.image_path}
+            )
+            continue
+        content_rows.append({
+            "project_id": project.id,
+            "user_id": project.created_by_user_id,
+            "prompt": f"{project.topic} - {project.content_type}",
+            "generated_text": result.text,
+            "image_path": result.image_path,
+            "include_news": True,
+        })
+        project_rows.append(
+            {"id": project.id, "status": READY_STATUS, "image_path": result.image_path or project.image_path}
+        )
+
+    async with local_session() as db:
+        if content_rows:
+            await db.execute(insert(ContentGeneration), content_rows)
+        await db.execute(update(Project), project_rows)
+        await db.commit()
+
+
+async def run_bulk_generation(project_ids: list[int], force_fresh: bool = False) -> dict[str, Any]:
+    """Generate content for many ``Generating`` projects with at most BULK_GENERATION_CONCURRENCY in flight.
+
+    A failing project is marked ``Generation Failed`` without affecting the others. Results are
+    written as they finish, batching whatever completed since the last write, so progress is
+    visible through the projects' status while the batch runs.
+    """
+    async with local_session() as db:
+        result = await db.execute(
+            select(Project).where(Project.id.in_(project_ids), Project.status == GENERATING_STATUS)
+        )
+        projects = result.scalars().all()
+
+    semaphore = asyncio.Semaphore(max(settings.BULK_GENERATION_CONCURRENCY, 1))
+    finished: asyncio.Queue = asyncio.Queue()
+
+    async def generate(project: Project) -> None:
+        async with semaphore:
+            try:
+                outcome: Union[GenerationResult, Exception] = await generate_project_content(
+                    topic=project.topic,
+                    content_type=project.content_type,
+                    with_image=project.with_image,
+                    image_filename=f"project_{project.id}.png",
+                    force_fresh=force_fresh,
+                )
+            except Exception as e:
+                logger.error(f"Content generation failed for project {project.id}: {e}")
+                outcome = e
+        await finished.put((project, outcome))
+
+    tasks = [asyncio.create_task(generate(project)) for project in projects]
+    skipped = sorted(set(project_ids) - {p.id for p in projects})
+    summary: dict[str, Any] = {"generated": [], "failed": {}, "skipped": skipped}
+    try:
+        remaining = len(tasks)
+        while remaining:
+            batch = [await finished.get()]
+            while not finished.empty():
+                batch.append(finished.get_nowait())
+            remaining -= len(batch)
+            await _store_generation_results(batch)
+            for project, outcome in batch:
+                if isinstance(outcome, Exception):
+                    summary["failed"][project.id] = str(outcome)
+                else:
+                    summary["generated"].append(project.id)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return summary
+
+
+async def start_bulk_generation(project_ids: list[int], force_fresh: bool = False) -> Optional[str]:
+    """Like ``start_project_generation``, for a batch created by the bulk endpoint."""
+    if queue.pool is not None:
+        job = await queue.pool.enqueue_job("generate_projects", project_ids, force_fresh)
+        return job.job_id if job else None
+
+    task = asyncio.create_task(run_bulk_generation(project_ids, force_fresh))
+    _generation_tasks.add(task)
+    task.add_done_callback(_generation_tasks.discard)
+    return None
+
+
+async def _claim_for_streaming(project_id: int) -> bool:
+    """Move a project from a streamable status to ``Streaming``; False when someone else holds it.
+
+    The conditional UPDATE is the only check that counts, so two tabs (or a reconnecting
+    EventSource) can never both generate the same project.
+    """
+    async with local_session() as db:
+        result = await db.execute(
+            update(Project)
+            .where(Project.id == project_id, Project.status.in_(STREAMABLE_STATUSES))
+            .values(status=STREAMING_STATUS)
+            .returning(Project.id)
+        )
+        claimed = result.first() is not None
+        await db.commit()
+    return claimed
+
+
+async def _set_project_status(project_id: int, status: str, only_from: Optional[str] = None) -> None:
+    async with local_session() as db:
+        stmt = update(Project).where(Project.id == project_id)
+        if only_from is not None:
+            stmt = stmt.where(Project.status == only_from)
+        await db.execute(stmt.values(status=status))
+        await db.commit()
+
+
+async def stream_project_generation(
+    project: Project,
+    force_fresh: bool = False,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Generate a project's content while yielding ``(event, data)`` progress pairs.
+
+    Events, in order: ``chunk`` for each piece of model output, ``texts`` with the per-platform
+    posts, ``image`` (or ``image_error``) once the concurrently generated image is ready, and
+    ``done``. ``error`` replaces the rest when text generation fails, or is the only event when
+    the project is not in a streamable status (e.g. another request is already streaming it).
+    The ContentGeneration row is only written once everything finished. Closing the iterator
+    early cancels the model calls and marks the project ``Generation Cancelled``.
+    """
+    if not await _claim_for_streaming(project.id):
+        yield "error", {"error": "Content is already being generated for this project"}
+        return
+    text_service = TextGenerationService()
+    image_task: Optional[asyncio.Task] = None
+    if project.with_image:
+        image_service = ImageGenerationService()
+        image_task = asyncio.create_task(
+            image_service.generate_image(
+                prompt=project.topic, output_filename=f"project_{project.id}.png", force_fresh=force_fresh
+            )
+        )
+
+    finished = False
+    try:
+        try:
+            parts = []
+            async for delta in text_service.stream_text(project.topic, project.content_type, force_fresh=force_fresh):
+                parts.append(delta)
+                yield "chunk", {"text": delta}
+        except Exception as e:
+            logger.error(f"Streamed text generation failed for project {project.id}: {e}")
+            finished = True
+            await _set_project_status(project.id, GENERATION_FAILED_STATUS)
+            yield "error", {"error": str(e)}
+            return
+
+        texts = text_service.platform_texts("".join(parts), project.topic)
+        yield "texts", texts
+
+        image_path = None
+        if image_task is not None:
+            try:
+                image_path = await image_task
+                yield "image", {"image_path": image_path}
+            except Exception as e:
+                logger.error(f"Image generation failed, keeping generated text: {e}")
+                yield "image_error", {"error": str(e)}
+
+        await _store_generation_results([(project, GenerationResult(text=texts, image_path=image_path))])
+        finished = True
+        yield "done", {"status": READY_STATUS}
+    finally:
+        if image_task is not None and not image_task.done():
+            image_task.cancel()
+        if not finished:
+            # The client went away; record it even though this task is being cancelled.
+            with anyio.CancelScope(shield=True):
+                await _set_project_status(project.id, GENERATION_CANCELLED_STATUS, only_from=STREAMING_STATUS)
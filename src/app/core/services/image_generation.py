@@ -1,20 +1,24 @@
-import openai
+import asyncio
 import shutil
 import os
 from PIL import Image, ImageDraw, ImageFont
-import requests
-import time
 import base64
 from io import BytesIO
 from typing import Optional
 from ...core.config import settings
+from ..utils.openai_client import get_openai_client
+from .generation_cache import cached_generation, generation_key, image_generation_cache
+
+ENHANCE_MODEL = "gpt-4o-mini"
+IMAGE_MODEL = "dall-e-3"
+IMAGE_SIZE = "1024x1024"
 
 class ImageGenerationService:
     def __init__(self):
         self.openai_api_key = settings.OPENAI_API_KEY
         if not self.openai_api_key:
             raise ValueError("OpenAI API key is missing!")
-        openai.api_key = self.openai_api_key
+        self.client = get_openai_client()
         self.template_path = os.path.join("public", "templates", "news_temp.jpg")
         self.output_dir = os.path.join("public", "generated_images")
         os.makedirs(self.output_dir, exist_ok=True)
@@ -29,14 +33,20 @@ class ImageGenerationService:
         except Exception as e:
             raise Exception(f"Error resizing image: {e}")
 
-    def enhance_prompt(self, prompt: str) -> str:
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",
+    async def enhance_prompt(self, prompt: str, force_fresh: bool = False) -> str:
+        async def call_model() -> str:
+            response = await self.client.chat.completions.create(
+                model=ENHANCE_MODEL,
                 messages=[{"role": "user", "content": f"Enhance this prompt for a photorealistic image: \"{prompt}\""}]
             )
             content = response.choices[0].message.content if response.choices and response.choices[0].message else None
-            return content.strip() if content else prompt
+            if not content:
+                raise ValueError("Empty prompt enhancement")
+            return content.strip()
+
+        try:
+            key = generation_key("enhance", ENHANCE_MODEL, prompt)
+            return await cached_generation(key, call_model, force_fresh=force_fresh)
         except Exception as e:
             return prompt
 
@@ -189,15 +199,43 @@ class ImageGenerationService:
     #         print(f"Error creating platform template: {e}")
     #         return image_path  # Return original image as fallback
 
-    async def generate_image(self, prompt: str, output_filename: str, max_retries: int = 3, base_delay: int = 2) -> str:
+    def _save_generated_image(self, img_data: bytes, output_filename: str) -> str:
+        final_output_path = os.path.join(self.output_dir, output_filename)
+        with open(final_output_path, 'wb') as img_file:
+            img_file.write(img_data)
+        # --- Ensure PNG, RGB, and resize to 1024x1024 ---
+        try:
+            with Image.open(final_output_path) as img:
+                img = img.convert('RGB')
+                img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
+                img.save(final_output_path, format='PNG')
+                # Also save as JPEG for Twitter
+                jpeg_path = os.path.splitext(final_output_path)[0] + '.jpg'
+                img.save(jpeg_path, format='JPEG', quality=85)
+        except Exception as e:
+            print(f"Error resizing/converting PNG/JPEG: {e}")
+        # --- End ensure PNG/JPEG ---
+        return final_output_path
+
+    def _copy_cached_image(self, cached_path: str, output_filename: str) -> str:
+        final_output_path = os.path.join(self.output_dir, output_filename)
+        if os.path.abspath(cached_path) != os.path.abspath(final_output_path):
+            shutil.copyfile(cached_path, final_output_path)
+            cached_jpeg = os.path.splitext(cached_path)[0] + '.jpg'
+            if os.path.exists(cached_jpeg):
+                shutil.copyfile(cached_jpeg, os.path.splitext(final_output_path)[0] + '.jpg')
+        return final_output_path
+
+    async def _generate_image_uncached(
+        self, enhanced_prompt: str, output_filename: str, max_retries: int, base_delay: int
+    ) -> str:
         for attempt in range(1, max_retries + 1):
             try:
-                enhanced_prompt = self.enhance_prompt(prompt)
-                response = openai.images.generate(
-                    model="dall-e-3",
+                response = await self.client.images.generate(
+                    model=IMAGE_MODEL,
                     prompt=enhanced_prompt,
                     n=1,
-                    size="1024x1024",
+                    size=IMAGE_SIZE,
                     response_format="b64_json"
                 )
                 b64_data = None
@@ -206,47 +244,28 @@ class ImageGenerationService:
                 if not b64_data or not isinstance(b64_data, str):
                     raise Exception("No valid image data returned from OpenAI API.")
                 img_data = base64.b64decode(b64_data)
-                final_output_path = os.path.join(self.output_dir, output_filename)
-                with open(final_output_path, 'wb') as img_file:
-                    img_file.write(img_data)
-                # --- Ensure PNG, RGB, and resize to 1024x1024 ---
-                from PIL import Image
-                try:
-                    with Image.open(final_output_path) as img:
-                        img = img.convert('RGB')
-                        img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-                        img.save(final_output_path, format='PNG')
-                        # Also save as JPEG for Twitter
-                        jpeg_path = os.path.splitext(final_output_path)[0] + '.jpg'
-                        img.save(jpeg_path, format='JPEG', quality=85)
-                except Exception as e:
-                    print(f"Error resizing/converting PNG/JPEG: {e}")
-                # --- End ensure PNG/JPEG ---
-                return final_output_path
+                # Decoding and re-encoding the image is CPU bound; keep it off the event loop.
+                return await asyncio.to_thread(self._save_generated_image, img_data, output_filename)
             except Exception as e:
                 if attempt == max_retries:
                     raise Exception(f"Failed after {max_retries} attempts: {e}")
                 delay_time = base_delay * attempt
-                time.sleep(delay_time)
+                await asyncio.sleep(delay_time)
         raise Exception("Failed to generate image after all retries")
 
-    def compress_image_for_social_media(self, input_path: str, platform: str) -> str:
-        """Compress image for social media platforms."""
-        max_sizes = {
-            "twitter": 5 * 1024 * 1024,
-            "discord": 8 * 1024 * 1024
-        }
-
-        img = Image.open(input_path)
-        img = img.convert("RGB")
-        img = img.resize((1024, 1024), Image.Resampling.LANCZOS)
-        img.save(input_path, format="JPEG", quality=80)
-
-        with open(input_path, 'rb') as f:
-            img_size = len(f.read())
+    async def generate_image(
+        self, prompt: str, output_filename: str, max_retries: int = 3, base_delay: int = 2, force_fresh: bool = False
+    ) -> str:
+        enhanced_prompt = await self.enhance_prompt(prompt, force_fresh=force_fresh)
+        key = generation_key("image", IMAGE_MODEL, IMAGE_SIZE, enhanced_prompt)
+        # Cached images live under their own content-addressed name and are copied to the
+        # project's file, because uploads and edits overwrite the project's file in place.
+        cached_filename = f"generated_{key[:32]}.png" if settings.GENERATION_CACHE_ENABLED else output_filename
 
-        if img_size > max_sizes.get(platform, float('inf')):
-            img = img.resize((1024, 1024), Image.Resampling.LANCZOS)
-            img.save(input_path, format="JPEG", quality=70)
+        def loader():
+            return self._generate_image_uncached(enhanced_prompt, cached_filename, max_retries, base_delay)
 
-        return input_path
\ No newline at end of file
+        cached_path = await cached_generation(key, loader, force_fresh=force_fresh, cache=image_generation_cache)
+        if not os.path.exists(cached_path):
+            cached_path = await cached_generation(key, loader, force_fresh=True, cache=image_generation_cache)
+        return await asyncio.to_thread(self._copy_cached_image, cached_path, output_filename)
@@ -0,0 +1,86 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InstagramLoginError(Exception):
+    pass
+
+
+class InstagramSessionStore:
+    """Per-account instabot sessions that survive between posts.
+
+    Every ``ig_username`` gets its own instabot ``base_path`` directory, so cookies and device
+    UUIDs persist on disk and a restarted process can resume the session without logging in.
+    In-process, the logged-in ``Bot`` is kept and reused until Instagram rejects it. Callers hold
+    ``lock(username)`` around login and upload, so two posts for one account never race.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._sessions: dict[str, tuple[object, str]] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def session_dir(self, username: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", username)
+        return os.path.join(self.root, safe_name)
+
+    def lock(self, username: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(username, threading.Lock())
+
+    @staticmethod
+    def _password_digest(password: str) -> str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def get_bot(self, username: str, password: str, force_login: bool = False):
+        """Return a logged-in ``Bot`` for ``username``. Call with ``lock(username)`` held."""
+        from instabot import Bot
+
+        digest = self._password_digest(password)
+        cached = self._sessions.get(username)
+        if cached and not force_login:
+            bot, cached_digest = cached
+            if cached_digest == digest and getattr(bot.api, "is_logged_in", False):
+                return bot
+
+        session_dir = self.session_dir(username)
+        os.makedirs(session_dir, exist_ok=True)
+        bot = Bot(base_path=session_dir)
+        # use_cookie resumes the persisted session; a forced login ignores it and writes a fresh one.
+        try:
+            logged_in = bot.login(username=username, password=password, use_cookie=not force_login)
+        except SystemExit:
+            # instabot calls sys.exit() on some login failures
+            logged_in = False
+        if not logged_in or not getattr(bot.api, "is_logged_in", False):
+            self._sessions.pop(username, None)
+            raise InstagramLoginError(f"Instagram login failed for {username}")
+
+        self._sessions[username] = (bot, digest)
+        return bot
+
+    def invalidate(self, username: str) -> None:
+        self._sessions.pop(username, None)
+
+    @staticmethod
+    def is_auth_failure(bot) -> bool:
+        """Whether the last API call failed because the session is no longer authenticated."""
+        api = getattr(bot, "api", None)
+        last_json: Optional[dict] = getattr(api, "last_json", None) or {}
+        last_response = getattr(api, "last_response", None)
+        return (
+            last_json.get("message") == "login_required"
+            or getattr(last_response, "status_code", None) in (401, 403)
+        )
+
+
+instagram_sessions = InstagramSessionStore(settings.INSTAGRAM_SESSION_DIR)
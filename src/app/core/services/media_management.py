@@ -1,36 +1,74 @@
+import asyncio
 import os
 import shutil
-import uuid
-import base64
+import tempfile
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 from datetime import datetime
 import mimetypes
-from PIL import Image, ImageEnhance, ImageFilter
-import io
 try:
     import cv2
     CV2_AVAILABLE = True
 except ImportError:
     CV2_AVAILABLE = False
-try:
-    from moviepy import VideoFileClip
-    MOVIEPY_AVAILABLE = True
-except ImportError:
-    MOVIEPY_AVAILABLE = False
-try:
-    import ffmpeg
-    FFMPEG_AVAILABLE = True
-except ImportError:
-    FFMPEG_AVAILABLE = False
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, or_, cast, String
+from sqlalchemy.orm import load_only
 from ...models.media import MediaLibrary, MediaFile, MediaCollection, MediaCollectionItem, ProjectMedia, MediaEdit
 from ...models.project import Project
+from . import media_transforms
+from .media_renders import MediaRender, edit_chain_hash, media_renders
+from .video_backend import video_backend
+from ..config import settings
+from ..utils.blob_store import blob_store
+from ..utils.process_pool import media_pool
+from ..utils.uploads import SpooledUpload
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns the media library listing shows; everything else stays unloaded for listings.
+MEDIA_LISTING_COLUMNS = (
+    MediaFile.id,
+    MediaFile.filename,
+    MediaFile.title,
+    MediaFile.description,
+    MediaFile.file_type,
+    MediaFile.content_sha256,
+    MediaFile.edit_chain_hash,
+    MediaFile.file_size,
+    MediaFile.width,
+    MediaFile.height,
+    MediaFile.duration,
+    MediaFile.tags,
+    MediaFile.created_at,
+)
+
+def nearest_thumbnail_size(sizes: Iterable[int], wanted: int) -> int:
+    """Smallest size at least as big as wanted, or the largest size when all are smaller"""
+    ordered = sorted(int(size) for size in sizes)
+    return next((size for size in ordered if size >= wanted), ordered[-1])
+
+
+@dataclass
+class ProcessedMedia:
+    """Properties and stored thumbnails of a processed media file"""
+    properties: Dict[str, Any]
+    thumbnail_keys: Dict[str, Dict[str, str]] = field(default_factory=dict)  # format -> size -> blob key
+    thumbnail_key: Optional[str] = None  # default-size JPEG
+    thumbnail_size: Optional[int] = None
+    thumbnail_files: Dict[str, str] = field(default_factory=dict)  # blob key -> local file it was stored from
+    
+    @property
+    def duration(self) -> Optional[int]:
+        """Duration in whole seconds, as the duration column stores it"""
+        duration = self.properties.get('duration')
+        return round(duration) if duration is not None else None
+
+
 class MediaManagementService:
     """Comprehensive media management service for handling images and videos stored in database"""
     
@@ -59,19 +97,57 @@ class MediaManagementService:
         )
         return result.scalar_one_or_none()
     
-    def _encode_file_to_base64(self, file_data: bytes) -> str:
-        """Encode file data to base64 string"""
-        return base64.b64encode(file_data).decode('utf-8')
+    def _blob_keys(self, media_file: MediaFile) -> List[str]:
+        """Every blob a media file references: its content and all of its thumbnails"""
+        keys = [media_file.storage_key, media_file.thumbnail_storage_key]
+        for sizes in (media_file.thumbnail_keys or {}).values():
+            keys.extend(sizes.values())
+        return [key for key in keys if key]
+    
+    async def _lock_blobs(self, db: AsyncSession, keys: Iterable[str]) -> None:
+        """Take transaction-scoped advisory locks on blob keys, in a fixed order.
+        
+        Serialises _release_blobs with uploads that reuse a blob: the reference check and the
+        delete happen under the same lock that an upload holds from re-storing its blobs until
+        its row is committed.
+        """
+        for key in sorted(set(keys)):
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(key))))
+    
+    async def _release_blobs(self, db: AsyncSession, keys: List[Optional[str]]) -> None:
+        """Delete blobs that no committed media file references any more; identical content shares one blob.
+        
+        Call only after the commit that dropped the references, so a failed commit never leaves a
+        row pointing at a deleted blob.
+        """
+        for key in dict.fromkeys(k for k in keys if k):
+            await self._lock_blobs(db, [key])
+            references = await db.scalar(
+                select(func.count()).select_from(MediaFile).where(
+                    or_(
+                        MediaFile.storage_key == key,
+                        MediaFile.thumbnail_storage_key == key,
+                        cast(MediaFile.thumbnail_keys, String).contains(key),
+                    )
+                )
+            )
+            if not references:
+                await asyncio.to_thread(blob_store.delete, key)
+            await db.commit()  # releases the lock
     
-    def _decode_base64_to_file(self, base64_data: str) -> bytes:
-        """Decode base64 string to file data"""
-        return base64.b64decode(base64_data.encode('utf-8'))
+    async def _release_render(self, db: AsyncSession, chain_hash: Optional[str]) -> None:
+        """Discard a cached render once no media file's edit chain hashes to it; call after committing"""
+        if not chain_hash:
+            return
+        in_use = await db.scalar(select(MediaFile.id).where(MediaFile.edit_chain_hash == chain_hash).limit(1))
+        if in_use is None:
+            await asyncio.to_thread(media_renders.discard, chain_hash)
     
     async def upload_media_file(
         self, 
         db: AsyncSession, 
         user_id: int, 
-        file_data: bytes, 
+        upload: SpooledUpload,
         original_filename: str,
         title: Optional[str] = None,
         description: Optional[str] = None,
@@ -82,7 +158,7 @@ class MediaManagementService:
         print(f"[DEBUG] === UPLOAD_MEDIA_FILE FUNCTION STARTED ===")
         print(f"[DEBUG] Starting upload_media_file for user {user_id}")
         print(f"[DEBUG] Original filename: {original_filename}")
-        print(f"[DEBUG] File data size: {len(file_data)} bytes")
+        print(f"[DEBUG] File data size: {upload.size} bytes, sha256: {upload.sha256}")
         print(f"[DEBUG] Title: {title}")
         print(f"[DEBUG] Description: {description}")
         print(f"[DEBUG] Tags: {tags}")
@@ -93,10 +169,6 @@ class MediaManagementService:
         
         print(f"[DEBUG] Determined file type: {file_type}, mime_type: {mime_type}")
         
-        # Encode file data to base64
-        file_data_base64 = self._encode_file_to_base64(file_data)
-        print(f"[DEBUG] File encoded to base64, size: {len(file_data_base64)} characters")
-        
         # Get or create user library
         print(f"[DEBUG] Getting user library...")
         try:
@@ -108,55 +180,53 @@ class MediaManagementService:
             print(f"[DEBUG] Error with library: {e}")
             raise
         
-        # Process media file to get metadata
-        print(f"[DEBUG] Processing media file...")
-        try:
-            metadata = await self._process_media_file_db(file_data, file_type)
-            print(f"[DEBUG] Media processing completed")
-        except Exception as e:
-            print(f"[DEBUG] Error processing media: {e}")
-            raise
-        
-        # Create thumbnail
-        print(f"[DEBUG] Creating thumbnail...")
-        try:
-            thumbnail_data = await self._create_thumbnail_db(file_data, file_type)
-            thumbnail_base64 = self._encode_file_to_base64(thumbnail_data) if thumbnail_data else None
-            print(f"[DEBUG] Thumbnail created, size: {len(thumbnail_data) if thumbnail_data else 0} bytes")
-        except Exception as e:
-            print(f"[DEBUG] Error creating thumbnail: {e}")
-            thumbnail_base64 = None
+        # Store file bytes in the blob store, keyed by the digest computed while receiving
+        storage_key = await asyncio.to_thread(blob_store.put_file, upload.file, upload.sha256)
+        print(f"[DEBUG] File stored as blob: {storage_key}")
         
-        # Create media file record
-        print(f"[DEBUG] Creating media file record...")
+        processed: Optional[ProcessedMedia] = None
         try:
-            media_file = MediaFile(
-                library_id=library.id,
-                filename=original_filename,
-                title=title or original_filename,
-                description=description,
-                file_type=file_type,
-                mime_type=mime_type,
-                file_data=file_data_base64,
-                file_size=len(file_data),
-                width=metadata.get('width'),
-                height=metadata.get('height'),
-                duration=metadata.get('duration'),
-                thumbnail_data=thumbnail_base64,
-                thumbnail_size=len(thumbnail_data) if thumbnail_data else None,
-                file_metadata=metadata,
-                tags={"tags": tags or []},
-                created_at=datetime.utcnow(),
-                updated_at=None,
-                library=library,
-                collections=[],
-                projects=[],
-                edits=[]
-            )
-            
-            db.add(media_file)
-            await db.commit()
-            await db.refresh(media_file)
+            with tempfile.TemporaryDirectory(prefix="media_thumbs_") as output_dir:
+                # Read properties and create thumbnails from one decode
+                print(f"[DEBUG] Processing media file...")
+                async with self._blob_path(storage_key) as stored_path:
+                    processed = await self._process_media_file_db(stored_path, file_type, output_dir)
+                metadata = processed.properties
+                print(f"[DEBUG] Media processing completed, thumbnails: {processed.thumbnail_keys}")
+                
+                # Create media file record
+                print(f"[DEBUG] Creating media file record...")
+                await self._restore_blobs(db, upload, storage_key, processed)
+                media_file = MediaFile(
+                    library_id=library.id,
+                    filename=original_filename,
+                    title=title or original_filename,
+                    description=description,
+                    file_type=file_type,
+                    mime_type=mime_type,
+                    content_sha256=upload.sha256,
+                    storage_key=storage_key,
+                    file_size=upload.size,
+                    width=metadata.get('width'),
+                    height=metadata.get('height'),
+                    duration=processed.duration,
+                    thumbnail_storage_key=processed.thumbnail_key,
+                    thumbnail_size=processed.thumbnail_size,
+                    thumbnail_keys=processed.thumbnail_keys,
+                    edit_chain_hash=None,
+                    file_metadata=metadata,
+                    tags={"tags": tags or []},
+                    created_at=datetime.utcnow(),
+                    updated_at=None,
+                    library=library,
+                    collections=[],
+                    projects=[],
+                    edits=[]
+                )
+                
+                db.add(media_file)
+                await db.commit()
+                await db.refresh(media_file)
             
             print(f"[DEBUG] Media file created with ID: {media_file.id}")
             return media_file
@@ -164,96 +234,98 @@ class MediaManagementService:
         except Exception as e:
             print(f"[DEBUG] Error creating media file record: {e}")
             await db.rollback()
+            # Drop the blobs this upload stored, unless another media file shares them
+            keys = [storage_key, *(processed.thumbnail_files if processed else {})]
+            try:
+                await self._release_blobs(db, keys)
+            except Exception as release_error:
+                logger.error(f"Could not release the blobs of a failed upload: {release_error}")
             raise
     
-    async def _process_media_file_db(self, file_data: bytes, file_type: str) -> Dict[str, Any]:
-        """Process media file to extract properties and create thumbnails (in-memory)"""
-        properties = {}
+    async def _restore_blobs(
+        self,
+        db: AsyncSession,
+        upload: SpooledUpload,
+        storage_key: str,
+        processed: ProcessedMedia
+    ) -> None:
+        """Lock an upload's blobs until its row is committed, storing again any a concurrent delete released.
+        
+        The blobs were stored before processing; a delete of identical content may have removed
+        them since. Re-storing is a no-op for blobs that are still there.
+        """
+        await self._lock_blobs(db, [storage_key, *processed.thumbnail_files])
+        await asyncio.to_thread(blob_store.put_file, upload.file, upload.sha256)
+        for path in processed.thumbnail_files.values():
+            await asyncio.to_thread(blob_store.put_path, path)
+    
+    @asynccontextmanager
+    async def _blob_path(self, key: str) -> AsyncIterator[str]:
+        """Filesystem path of a blob for the media process pool, copied to a temp file if the store has none"""
+        path = blob_store.local_path(key)
+        if path is not None:
+            yield path
+            return
+        fd, temp_path = tempfile.mkstemp(prefix="media_")
         try:
-            if file_type == "image":
-                with Image.open(io.BytesIO(file_data)) as img:
-                    properties["width"] = img.width
-                    properties["height"] = img.height
-                    
-                    # Create thumbnail (in-memory)
-                    thumbnail_data = await self._create_thumbnail_db(file_data, file_type)
-                    properties["thumbnail_data"] = self._encode_file_to_base64(thumbnail_data) if thumbnail_data else None
-                    properties["thumbnail_size"] = len(thumbnail_data) if thumbnail_data else None
-                    
-            else:  # video
-                if MOVIEPY_AVAILABLE:
-                    # Use moviepy for video processing
-                    with VideoFileClip(io.BytesIO(file_data)) as video:
-                        properties["width"] = int(video.w)
-                        properties["height"] = int(video.h)
-                        properties["duration"] = video.duration
-                        
-                        # Create video thumbnail (in-memory)
-                        thumbnail_data = await self._create_thumbnail_db(file_data, file_type)
-                        properties["thumbnail_data"] = self._encode_file_to_base64(thumbnail_data) if thumbnail_data else None
-                        properties["thumbnail_size"] = len(thumbnail_data) if thumbnail_data else None
-                else:
-                    # Fallback for when moviepy is not available
-                    logger.warning("MoviePy not available, using basic video properties")
-                    properties["width"] = None
-                    properties["height"] = None
-                    properties["duration"] = None
-                    properties["thumbnail_data"] = None
-                    properties["thumbnail_size"] = None
-                    
-        except Exception as e:
-            logger.error(f"Error processing media file in DB: {e}")
-            properties = {"width": None, "height": None, "duration": None, "thumbnail_data": None, "thumbnail_size": None}
+            with os.fdopen(fd, "wb") as f, blob_store.open(key) as source:
+                await asyncio.to_thread(shutil.copyfileobj, source, f)
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+    
+    async def _make_thumbnails(self, source_path: str, file_type: str, output_dir: str) -> Dict[str, Any]:
+        """Read a file's properties and write its thumbnails into output_dir, from one decode in the media process pool.
         
-        return properties
+        Videos are probed, and their poster frame extracted, by the ffmpeg video backend when it
+        is available; the thumbnails are then made from that frame.
+        """
+        properties = None
+        if file_type == "video" and video_backend.available:
+            probe = await video_backend.probe(source_path)
+            properties = probe.properties()
+            poster_path = os.path.join(output_dir, "poster.png")
+            await video_backend.extract_poster_frame(
+                source_path,
+                poster_path,
+                at_seconds=min(1.0, probe.duration / 2) if probe.duration else 0.0,
+                max_size=max(settings.MEDIA_THUMBNAIL_SIZES),
+            )
+            source_path, file_type = poster_path, "image"
+        try:
+            result = await media_pool.run(
+                media_transforms.process_media,
+                source_path,
+                file_type,
+                output_dir,
+                settings.MEDIA_THUMBNAIL_SIZES,
+                settings.MEDIA_THUMBNAIL_QUALITY,
+            )
+        finally:
+            if properties is not None:
+                os.remove(source_path)  # the poster frame is only an intermediate
+        return {"properties": properties or result["properties"], "thumbnails": result["thumbnails"]}
     
-    async def _create_thumbnail_db(self, file_data: bytes, file_type: str) -> Optional[bytes]:
-        """Create thumbnail for image or video (in-memory)"""
+    async def _process_media_file_db(self, source_path: str, file_type: str, output_dir: str) -> ProcessedMedia:
+        """Read a file's properties and store its thumbnails, written to output_dir, in the blob store"""
         try:
-            if file_type == "image":
-                # For images, use PIL to create thumbnail
-                image = Image.open(io.BytesIO(file_data))
-                
-                # Convert to RGB if necessary
-                if image.mode in ('RGBA', 'LA', 'P'):
-                    image = image.convert('RGB')
-                
-                # Create thumbnail
-                image.thumbnail((300, 300), Image.Resampling.LANCZOS)
-                
-                # Convert to bytes
-                thumbnail_bytes = io.BytesIO()
-                image.save(thumbnail_bytes, "JPEG", quality=85)
-                return thumbnail_bytes.getvalue()
-                
-            elif file_type == "video":
-                # For videos, try to use MoviePy if available
-                if not MOVIEPY_AVAILABLE:
-                    logger.warning("MoviePy not available, cannot create video thumbnail")
-                    return None
-                    
-                # Use moviepy to extract frame at 1 second
-                with VideoFileClip(io.BytesIO(file_data)) as video:
-                    # Extract frame at 1 second or middle of video
-                    frame_time = min(1.0, video.duration / 2)
-                    frame = video.get_frame(frame_time)
-                    
-                    # Convert numpy array to PIL Image
-                    frame_img = Image.fromarray(frame)
-                    
-                    # Resize to thumbnail size
-                    frame_img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-                    
-                    # Convert PIL Image to bytes
-                    thumbnail_bytes = io.BytesIO()
-                    frame_img.save(thumbnail_bytes, "JPEG", quality=85)
-                    return thumbnail_bytes.getvalue()
-            
-            return None
-                
+            result = await self._make_thumbnails(source_path, file_type, output_dir)
         except Exception as e:
-            logger.error(f"Error creating thumbnail in DB: {e}")
-            return None
+            logger.error(f"Error processing media file in DB: {e}")
+            return ProcessedMedia(properties={"width": None, "height": None, "duration": None})
+        
+        processed = ProcessedMedia(properties=result["properties"])
+        for fmt, paths in result["thumbnails"].items():
+            for size, path in paths.items():
+                key, _ = await asyncio.to_thread(blob_store.put_path, path)
+                processed.thumbnail_keys.setdefault(fmt, {})[str(size)] = key
+                processed.thumbnail_files[key] = path
+        jpeg_paths = result["thumbnails"].get("jpeg")
+        if jpeg_paths:
+            default_size = nearest_thumbnail_size(jpeg_paths, settings.MEDIA_THUMBNAIL_DEFAULT_SIZE)
+            processed.thumbnail_key = processed.thumbnail_keys["jpeg"][str(default_size)]
+            processed.thumbnail_size = os.path.getsize(jpeg_paths[default_size])
+        return processed
     
     async def get_user_media_files(
         self, 
@@ -263,8 +335,13 @@ class MediaManagementService:
         limit: int = 50,
         offset: int = 0
     ) -> List[MediaFile]:
-        """Get user's media files with optional filtering"""
-        query = select(MediaFile).join(MediaLibrary).where(MediaLibrary.user_id == user_id)
+        """Get user's media files with optional filtering, loading only the listing columns"""
+        query = (
+            select(MediaFile)
+            .join(MediaLibrary)
+            .where(MediaLibrary.user_id == user_id)
+            .options(load_only(*MEDIA_LISTING_COLUMNS, raiseload=True))
+        )
         
         if file_type:
             query = query.where(MediaFile.file_type == file_type)
@@ -275,7 +352,7 @@ class MediaManagementService:
         return result.scalars().all()
     
     async def get_media_file(self, db: AsyncSession, media_file_id: int, user_id: int) -> Optional[MediaFile]:
-        """Get specific media file with user ownership check"""
+        """Get specific media file with user ownership check; file_metadata stays deferred"""
         print(f"[DEBUG] Service: Getting media file {media_file_id} for user {user_id}")
         
         try:
@@ -306,7 +383,11 @@ class MediaManagementService:
         edit_type: str,
         edit_params: Dict[str, Any]
     ) -> Optional[MediaFile]:
-        """Edit a media file (crop, resize, apply filters, etc.)"""
+        """Append an edit (crop, resize, apply filters, etc.) to a media file's edit chain.
+        
+        The original is left untouched and nothing is rendered here: the chain is rendered in
+        one pass the first time the edited file is requested (see render_media_file).
+        """
         print(f"[DEBUG] === EDIT_MEDIA_FILE STARTED ===")
         print(f"[DEBUG] Media file ID: {media_file_id}, User ID: {user_id}")
         print(f"[DEBUG] Edit type: {edit_type}, Edit params: {edit_params}")
@@ -317,313 +398,156 @@ class MediaManagementService:
             print(f"[DEBUG] Media file not found")
             return None
         
-        print(f"[DEBUG] Media file found: ID={media_file.id}, Title={media_file.title}")
-        print(f"[DEBUG] File type: {media_file.file_type}")
-        print(f"[DEBUG] File data size: {len(media_file.file_data)} characters")
+        if media_file.file_type == "image":
+            allowed = media_transforms.IMAGE_OPERATIONS
+        else:
+            allowed = media_transforms.VIDEO_OPERATIONS
+        if edit_type not in allowed:
+            raise ValueError(f"Unsupported edit type for {media_file.file_type}: {edit_type}")
         
+        db.add(MediaEdit(
+            media_file_id=media_file.id,
+            edit_type=edit_type,
+            edit_params=edit_params,
+            created_at=datetime.utcnow(),
+            media_file=media_file
+        ))
+        await db.flush()
+        previous_chain = media_file.edit_chain_hash
         try:
-            # Decode base64 file data to bytes
-            print(f"[DEBUG] Decoding base64 file data...")
-            file_data_bytes = self._decode_base64_to_file(media_file.file_data)
-            print(f"[DEBUG] Decoded file size: {len(file_data_bytes)} bytes")
-            
-            # Create edited version
-            print(f"[DEBUG] Applying edit...")
-            edited_bytes = await self._apply_edit(file_data_bytes, edit_type, edit_params)
-            
-            if not edited_bytes:
-                print(f"[DEBUG] Edit failed - no edited bytes returned")
-                return None
-            
-            print(f"[DEBUG] Edit successful - edited bytes size: {len(edited_bytes)} bytes")
-            
-            # Update media file directly with edited version
-            print(f"[DEBUG] Updating media file...")
-            media_file.file_data = self._encode_file_to_base64(edited_bytes)
-            media_file.updated_at = datetime.utcnow()
-            
-            await db.commit()
-            await db.refresh(media_file)
-            print(f"[DEBUG] Media file updated successfully")
-            
-            return media_file
-            
-        except Exception as e:
-            print(f"[DEBUG] Error in edit_media_file: {e}")
-            import traceback
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+            await self._update_edit_chain(db, media_file)
+        except ValueError:
+            await db.rollback()
             raise
+        await db.commit()
+        print(f"[DEBUG] Edit chain updated: {media_file.edit_chain_hash}")
+        await self._release_render(db, previous_chain)
+        return media_file
     
-    async def _apply_edit(self, file_data: bytes, edit_type: str, edit_params: Dict[str, Any]) -> Optional[bytes]:
-        """Apply edit to media file"""
-        print(f"[DEBUG] === APPLY_EDIT STARTED ===")
-        print(f"[DEBUG] Edit type: {edit_type}")
-        print(f"[DEBUG] Edit params: {edit_params}")
-        print(f"[DEBUG] Input file size: {len(file_data)} bytes")
-        
-        try:
-            if edit_type == "crop":
-                print(f"[DEBUG] Applying crop edit...")
-                return await self._crop_image(file_data, edit_params)
-            elif edit_type == "resize":
-                print(f"[DEBUG] Applying resize edit...")
-                return await self._resize_image(file_data, edit_params)
-            elif edit_type == "filter":
-                print(f"[DEBUG] Applying filter edit...")
-                return await self._apply_filter(file_data, edit_params)
-            elif edit_type == "brightness":
-                print(f"[DEBUG] Applying brightness edit...")
-                return await self._adjust_brightness(file_data, edit_params)
-            elif edit_type == "contrast":
-                print(f"[DEBUG] Applying contrast edit...")
-                return await self._adjust_contrast(file_data, edit_params)
-            elif edit_type == "trim":
-                print(f"[DEBUG] Applying trim edit...")
-                return await self._trim_video(file_data, edit_params)
-            else:
-                print(f"[DEBUG] Unknown edit type: {edit_type}")
-                logger.warning(f"Unknown edit type: {edit_type}")
-                return None
-                
-        except Exception as e:
-            print(f"[DEBUG] Error in _apply_edit: {e}")
-            logger.error(f"Error applying edit {edit_type}: {e}")
-            import traceback
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
-            return None
-    
-    async def _crop_image(self, file_data: bytes, params: Dict[str, Any]) -> Optional[bytes]:
-        """Crop image"""
-        try:
-            with Image.open(io.BytesIO(file_data)) as img:
-                left = params.get("left", 0)
-                top = params.get("top", 0)
-                right = params.get("right", img.width)
-                bottom = params.get("bottom", img.height)
-                
-                cropped = img.crop((left, top, right, bottom))
-                
-                # Save edited version (in-memory)
-                edited_bytes = io.BytesIO()
-                cropped.save(edited_bytes, "JPEG", quality=85)
-                return edited_bytes.getvalue()
-                
-        except Exception as e:
-            logger.error(f"Error cropping image: {e}")
-            return None
-    
-    async def _resize_image(self, file_data: bytes, params: Dict[str, Any]) -> Optional[bytes]:
-        """Resize image"""
-        try:
-            with Image.open(io.BytesIO(file_data)) as img:
-                width = params.get("width", img.width)
-                height = params.get("height", img.height)
-                
-                resized = img.resize((width, height), Image.Resampling.LANCZOS)
-                
-                # Save edited version (in-memory)
-                edited_bytes = io.BytesIO()
-                resized.save(edited_bytes, "JPEG", quality=85)
-                return edited_bytes.getvalue()
-                
-        except Exception as e:
-            logger.error(f"Error resizing image: {e}")
+    async def undo_media_edit(self, db: AsyncSession, media_file_id: int, user_id: int) -> Optional[MediaFile]:
+        """Remove the last edit of a media file's edit chain; raises ValueError when there is none"""
+        media_file = await self.get_media_file(db, media_file_id, user_id)
+        if not media_file:
             return None
+        
+        last_edit = await db.scalar(
+            select(MediaEdit)
+            .where(MediaEdit.media_file_id == media_file.id, MediaEdit.baked_in.is_(False))
+            .order_by(MediaEdit.id.desc())
+            .limit(1)
+        )
+        if not last_edit:
+            raise ValueError("Media file has no edits to undo")
+        
+        await db.delete(last_edit)
+        await db.flush()
+        previous_chain = media_file.edit_chain_hash
+        await self._update_edit_chain(db, media_file)
+        await db.commit()
+        await self._release_render(db, previous_chain)
+        return media_file
     
-    async def _apply_filter(self, file_data: bytes, params: Dict[str, Any]) -> Optional[bytes]:
-        """Apply filter to image"""
-        try:
-            with Image.open(io.BytesIO(file_data)) as img:
-                filter_type = params.get("filter_type", "blur")
-                
-                if filter_type == "blur":
-                    filtered = img.filter(ImageFilter.BLUR)
-                elif filter_type == "sharpen":
-                    filtered = img.filter(ImageFilter.SHARPEN)
-                elif filter_type == "emboss":
-                    filtered = img.filter(ImageFilter.EMBOSS)
-                elif filter_type == "edge_enhance":
-                    filtered = img.filter(ImageFilter.EDGE_ENHANCE)
-                else:
-                    filtered = img
-                
-                # Save edited version (in-memory)
-                edited_bytes = io.BytesIO()
-                filtered.save(edited_bytes, "JPEG", quality=85)
-                return edited_bytes.getvalue()
-                
-        except Exception as e:
-            logger.error(f"Error applying filter: {e}")
-            return None
+    async def get_edit_operations(self, db: AsyncSession, media_file_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """A media file's edit chain as (edit_type, edit_params), in the order the edits were made.
+
+        Baked-in edits are already part of the stored file and are left out.
+        """
+        result = await db.execute(
+            select(MediaEdit.edit_type, MediaEdit.edit_params)
+            .where(MediaEdit.media_file_id == media_file_id, MediaEdit.baked_in.is_(False))
+            .order_by(MediaEdit.id)
+        )
+        return [(edit_type, edit_params or {}) for edit_type, edit_params in result.all()]
     
-    async def _adjust_brightness(self, file_data: bytes, params: Dict[str, Any]) -> Optional[bytes]:
-        """Adjust image brightness"""
-        try:
-            with Image.open(io.BytesIO(file_data)) as img:
-                factor = params.get("factor", 1.0)
-                enhancer = ImageEnhance.Brightness(img)
-                adjusted = enhancer.enhance(factor)
-                
-                # Save edited version (in-memory)
-                edited_bytes = io.BytesIO()
-                adjusted.save(edited_bytes, "JPEG", quality=85)
-                return edited_bytes.getvalue()
-                
-        except Exception as e:
-            logger.error(f"Error adjusting brightness: {e}")
-            return None
+    async def _update_edit_chain(self, db: AsyncSession, media_file: MediaFile) -> None:
+        """Recompute the chain hash and the edited dimensions/duration from the original's properties"""
+        operations = await self.get_edit_operations(db, media_file.id)
+        await db.refresh(media_file, attribute_names=["file_metadata"])
+        original = media_file.file_metadata or {}
+        
+        if media_file.file_type == "image":
+            size = (original.get('width'), original.get('height'))
+            if None not in size:
+                for edit_type, edit_params in operations:
+                    size = media_transforms.image_operation_size(size, edit_type, edit_params)
+                if size[0] <= 0 or size[1] <= 0:
+                    raise ValueError(f"Edit leaves an empty image ({size[0]}x{size[1]})")
+                media_file.width, media_file.height = size
+        else:
+            duration = original.get('duration')
+            if operations:
+                start, end = media_transforms.fuse_trims(operations)
+                if duration is not None:
+                    end = min(end, duration)
+                if end <= start:
+                    raise ValueError("Edit leaves an empty video")
+                duration = end - start
+            media_file.duration = round(duration) if duration is not None else None
+        
+        media_file.edit_chain_hash = (
+            edit_chain_hash(media_file.content_sha256, operations) if operations else None
+        )
+        media_file.updated_at = datetime.utcnow()
     
-    async def _adjust_contrast(self, file_data: bytes, params: Dict[str, Any]) -> Optional[bytes]:
-        """Adjust contrast of image"""
-        try:
-            with Image.open(io.BytesIO(file_data)) as img:
-                factor = params.get("factor", 1.0)
-                
-                # Convert to numpy array for contrast adjustment
-                import numpy as np
-                img_array = np.array(img)
-                
-                # Apply contrast adjustment
-                adjusted = np.clip(img_array * factor, 0, 255).astype(np.uint8)
-                adjusted_img = Image.fromarray(adjusted)
-                
-                # Save edited version (in-memory)
-                edited_bytes = io.BytesIO()
-                adjusted_img.save(edited_bytes, "JPEG", quality=85)
-                return edited_bytes.getvalue()
-                
-        except Exception as e:
-            logger.error(f"Error adjusting contrast: {e}")
+    async def render_media_file(self, db: AsyncSession, media_file: MediaFile) -> Optional[MediaRender]:
+        """The edited media file, rendered from its original and edit chain on first request and cached.
+        
+        Returns None for unedited files. Concurrent requests for the same chain in this process
+        wait for one render.
+        """
+        if not media_file.edit_chain_hash:
             return None
-    
-    async def _trim_video(self, file_data: bytes, params: Dict[str, Any]) -> Optional[bytes]:
-        """Trim video to specified start and end times"""
-        try:
-            start_time = params.get("start_time", 0)
-            end_time = params.get("end_time", 0)
-            
-            print(f"[DEBUG] Trimming video from {start_time}s to {end_time}s")
-            print(f"[DEBUG] FFMPEG_AVAILABLE: {FFMPEG_AVAILABLE}")
-            print(f"[DEBUG] MOVIEPY_AVAILABLE: {MOVIEPY_AVAILABLE}")
-            
-            # Try FFmpeg first
-            if FFMPEG_AVAILABLE:
-                try:
-                    print(f"[DEBUG] Attempting FFmpeg trim...")
-                    import ffmpeg
-                    
-                    # Create input stream from bytes
-                    input_stream = ffmpeg.input('pipe:', format='mp4')
-                    
-                    # Apply trim filter
-                    trimmed = ffmpeg.output(
-                        input_stream,
-                        'pipe:',
-                        vcodec='copy',  # Copy video codec without re-encoding
-                        acodec='copy',  # Copy audio codec without re-encoding
-                        ss=start_time,  # Start time
-                        t=end_time - start_time,  # Duration
-                        f='mp4'
-                    )
-                    
-                    # Run the ffmpeg command
-                    stdout, stderr = ffmpeg.run(
-                        trimmed,
-                        input=file_data,
-                        capture_stdout=True,
-                        capture_stderr=True
-                    )
-                    
-                    print(f"[DEBUG] FFmpeg video trim successful, output size: {len(stdout)} bytes")
-                    return stdout
-                    
-                except Exception as e:
-                    print(f"[DEBUG] FFmpeg trim failed: {e}")
-                    print(f"[DEBUG] FFmpeg error type: {type(e)}")
-                    import traceback
-                    print(f"[DEBUG] FFmpeg traceback: {traceback.format_exc()}")
-                    # Fall back to MoviePy
-                    pass
+        chain_hash = media_file.edit_chain_hash
+        render = await asyncio.to_thread(media_renders.load, chain_hash)
+        if render:
+            return render
+        
+        async with media_renders.lock(chain_hash):
+            render = await asyncio.to_thread(media_renders.load, chain_hash)
+            if render:
+                return render
+            operations = await self.get_edit_operations(db, media_file.id)
+            if edit_chain_hash(media_file.content_sha256, operations) != chain_hash:
+                raise ValueError("Edit chain changed while rendering")
             
-            # Fallback to MoviePy
-            if MOVIEPY_AVAILABLE:
-                try:
-                    print(f"[DEBUG] Attempting MoviePy trim...")
-                    import tempfile
-                    import os
-                    
-                    # Create temporary files
-                    with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_input, \
-                         tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_output:
-                        
-                        print(f"[DEBUG] Created temp files: {temp_input.name}, {temp_output.name}")
-                        
-                        # Write input data to temporary file
-                        temp_input.write(file_data)
-                        temp_input.flush()
-                        
-                        # Create VideoFileClip from temporary file
-                        clip = VideoFileClip(temp_input.name)
-                        
-                        # Trim the clip
-                        trimmed_clip = clip.subclipped(start_time, end_time)
-                        
-                        # Write to temporary output file
-                        trimmed_clip.write_videofile(
-                            temp_output.name,
-                            codec='libx264',
-                            audio_codec='aac',
-                            temp_audiofile='temp-audio.m4a',
-                            remove_temp=True
+            async with media_renders.rendering(chain_hash) as output_dir:
+                async with self._blob_path(media_file.storage_key) as source_path:
+                    if media_file.file_type == "image":
+                        await media_pool.run(
+                            media_transforms.render_image,
+                            source_path,
+                            output_dir,
+                            operations,
+                            settings.MEDIA_THUMBNAIL_SIZES,
+                            settings.MEDIA_THUMBNAIL_QUALITY,
                         )
-                        
-                        # Read the result
-                        temp_output.seek(0)
-                        result_bytes = temp_output.read()
-                        
-                        # Clean up
-                        clip.close()
-                        trimmed_clip.close()
-                        
-                        # Remove temporary files (with error handling)
-                        try:
-                            os.unlink(temp_input.name)
-                        except (OSError, PermissionError):
-                            print(f"[DEBUG] Could not delete temp input file: {temp_input.name}")
-                        
-                        try:
-                            os.unlink(temp_output.name)
-                        except (OSError, PermissionError):
-                            print(f"[DEBUG] Could not delete temp output file: {temp_output.name}")
-                        
-                        print(f"[DEBUG] MoviePy video trim successful, output size: {len(result_bytes)} bytes")
-                        return result_bytes
-                        
-                except Exception as e:
-                    print(f"[DEBUG] MoviePy trim failed: {e}")
-                    print(f"[DEBUG] MoviePy error type: {type(e)}")
-                    import traceback
-                    print(f"[DEBUG] MoviePy traceback: {traceback.format_exc()}")
-                    pass
-            
-            print(f"[DEBUG] No video trimming method available")
-            logger.error("No video trimming method available (FFmpeg or MoviePy)")
-            return None
-            
+                    else:
+                        # Successive trims fuse into a single cut of the original
+                        start_time, end_time = media_transforms.fuse_trims(operations)
+                        render_path = os.path.join(output_dir, "render" + (Path(media_file.filename).suffix or ".mp4"))
+                        trim = {"start_time": start_time, "end_time": end_time}
+                        if not await self._trim_video(source_path, render_path, trim):
+                            raise RuntimeError(f"Rendering media file {media_file.id} failed")
+                        await self._make_thumbnails(render_path, "video", output_dir)
+            print(f"[DEBUG] Rendered media file {media_file.id} edit chain {chain_hash}")
+            await asyncio.to_thread(media_renders.prune, chain_hash)
+            return await asyncio.to_thread(media_renders.load, chain_hash)
+    
+    async def _trim_video(self, source_path: str, output_path: str, params: Dict[str, Any]) -> bool:
+        """Trim video to specified start and end times, with ffmpeg when available"""
+        start_time = float(params.get("start_time", 0))
+        end_time = float(params.get("end_time", 0))
+        print(f"[DEBUG] Trimming video from {start_time}s to {end_time}s")
+        try:
+            if not video_backend.available:
+                await media_pool.run(media_transforms.trim_video, source_path, output_path, params)
+                return True
+            copied = await video_backend.trim(source_path, output_path, start_time, end_time)
+            print(f"[DEBUG] Video trimmed with {'stream copy' if copied else 're-encoding'}")
+            return True
         except Exception as e:
-            print(f"[DEBUG] Error trimming video: {e}")
-            print(f"[DEBUG] Error type: {type(e)}")
             logger.error(f"Error trimming video: {e}")
-            import traceback
-            print(f"[DEBUG] Full traceback: {traceback.format_exc()}")
-            return None
-    
-    def _get_edited_path(self, original_path: str) -> str:
-        """Generate path for edited file"""
-        filename = Path(original_path).stem
-        extension = Path(original_path).suffix
-        edited_filename = f"{filename}_edited_{int(datetime.utcnow().timestamp())}{extension}"
-        return os.path.join(self.temp_dir, edited_filename)
+            return False
     
     async def create_collection(
         self, 
@@ -730,10 +654,12 @@ class MediaManagementService:
         if not media_file:
             return False
         
-        # No need to delete physical files since we're using database storage
-        # The file data is stored in the database and will be deleted with the record
+        keys = self._blob_keys(media_file)
+        chain_hash = media_file.edit_chain_hash
         
-        # Delete from database
+        # Delete from database, then the blobs and render no other media file shares
         await db.delete(media_file)
         await db.commit()
+        await self._release_blobs(db, keys)
+        await self._release_render(db, chain_hash)
         return True 
\ No newline at end of file
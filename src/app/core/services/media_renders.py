@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from ..config import settings
+
+# Bump to invalidate every cached render when the rendering itself changes.
+RENDER_VERSION = 1
+THUMBNAIL_EXTENSIONS = {".webp": "webp", ".jpg": "jpeg"}
+
+
+@dataclass
+class MediaRender:
+    path: str
+    thumbnails: dict[str, dict[str, str]] = field(default_factory=dict)  # format -> size -> path
+
+
+def edit_chain_hash(content_sha256: str, operations: Sequence[tuple[str, dict[str, Any]]]) -> str:
+    """Identity of an edit chain applied to a given original."""
+    payload = json.dumps(
+        {
+            "version": RENDER_VERSION,
+            "source": content_sha256,
+            "operations": [[op, params] for op, params in operations],
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MediaRenderCache:
+    """On-disk cache of edited media, one directory per edit-chain hash.
+
+    A directory holds ``render.<ext>`` plus its thumbnails named ``<size>.<ext>``. Entries are
+    written to a temporary directory and renamed into place, so readers never see a partial
+    render. The cache is disposable: a missing entry is rendered again on its next request, so
+    entries are discarded once no media file uses their chain and pruned, least recently used
+    first, when the cache outgrows ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}  # chain hash -> holders and waiters of its lock
+
+    def render_dir(self, chain_hash: str) -> str:
+        return os.path.join(self.cache_dir, chain_hash[:2], chain_hash)
+
+    def load(self, chain_hash: str) -> Optional[MediaRender]:
+        directory = self.render_dir(chain_hash)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return None
+        render = None
+        thumbnails: dict[str, dict[str, str]] = {}
+        for name in names:
+            stem, extension = os.path.splitext(name)
+            if stem == "render":
+                render = os.path.join(directory, name)
+            elif stem.isdigit() and extension in THUMBNAIL_EXTENSIONS:
+                thumbnails.setdefault(THUMBNAIL_EXTENSIONS[extension], {})[stem] = os.path.join(directory, name)
+        if not render:
+            return None
+        try:
+            # The directory's mtime records its last use, for prune.
+            os.utime(directory)
+        except FileNotFoundError:
+            return None
+        return MediaRender(path=render, thumbnails=thumbnails)
+
+    @asynccontextmanager
+    async def lock(self, chain_hash: str) -> AsyncIterator[None]:
+        """Serialize renders of the same chain in this process, so concurrent requests render once."""
+        lock = self._locks.setdefault(chain_hash, asyncio.Lock())
+        self._lock_users[chain_hash] = self._lock_users.get(chain_hash, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            # Drop the lock only with nobody left waiting on it, or a waiter and a newcomer
+            # would each hold a different lock for the same chain.
+            self._lock_users[chain_hash] -= 1
+            if not self._lock_users[chain_hash]:
+                del self._lock_users[chain_hash]
+                del self._locks[chain_hash]
+
+    @asynccontextmanager
+    async def rendering(self, chain_hash: str) -> AsyncIterator[str]:
+        """Directory to render into; moved into the cache when the block succeeds."""
+        final_dir = self.render_dir(chain_hash)
+        temp_dir = f"{final_dir}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(temp_dir)
+        try:
+            yield temp_dir
+            try:
+                os.rename(temp_dir, final_dir)
+            except OSError:
+                # Another process finished the same render first.
+                if not os.path.isdir(final_dir):
+                    raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def discard(self, chain_hash: str) -> None:
+        shutil.rmtree(self.render_dir(chain_hash), ignore_errors=True)
+
+    def prune(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used renders, except ``keep``, until the cache fits in ``max_bytes``."""
+        entries = []
+        total = 0
+        for directory in self._entry_dirs():
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+                last_used = os.path.getmtime(directory)
+            except FileNotFoundError:
+                continue
+            total += size
+            # Renders still being written count towards the size but are never removed.
+            if os.path.basename(directory) != keep and not directory.endswith(".tmp"):
+                entries.append((last_used, size, directory))
+        for _, size, directory in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+
+    def _entry_dirs(self) -> Iterator[str]:
+        try:
+            prefixes = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for prefix in prefixes:
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            try:
+                names = os.listdir(prefix_dir)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for name in names:
+                yield os.path.join(prefix_dir, name)
+
+media_renders = MediaRenderCache(settings.MEDIA_RENDER_CACHE_DIR, settings.MEDIA_RENDER_CACHE_MAX_BYTES)
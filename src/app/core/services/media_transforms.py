@@ -0,0 +1,173 @@
+"""Blocking Pillow/moviepy transforms, run in the media process pool (core/utils/process_pool.py).
+
+Functions take and write file paths, so only small values are pickled between processes, and
+the module imports nothing from the app so spawned workers start quickly. Failures raise; the
+async wrappers in MediaManagementService log them.
+"""
+import logging
+import os
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from PIL import Image, ImageEnhance, ImageFilter, features
+
+try:
+    from moviepy import VideoFileClip
+    MOVIEPY_AVAILABLE = True
+except ImportError:
+    MOVIEPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EDIT_JPEG_QUALITY = 85
+RENDER_IMAGE_NAME = "render.jpg"
+IMAGE_OPERATIONS = ("crop", "resize", "filter", "brightness", "contrast")
+VIDEO_OPERATIONS = ("trim",)
+
+WEBP_AVAILABLE = features.check("webp")
+# Thumbnail format name -> (Pillow format, file extension)
+THUMBNAIL_FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg")}
+
+IMAGE_FILTERS = {
+    "blur": ImageFilter.BLUR,
+    "sharpen": ImageFilter.SHARPEN,
+    "emboss": ImageFilter.EMBOSS,
+    "edge_enhance": ImageFilter.EDGE_ENHANCE,
+}
+
+
+def process_media(
+    source_path: str,
+    file_type: str,
+    output_dir: str,
+    sizes: Sequence[int],
+    quality: int,
+) -> dict[str, Any]:
+    """Read a media file's properties and write all of its thumbnails from a single decode.
+
+    Returns ``{"properties": {width, height[, duration]}, "thumbnails": {format: {size: path}}}``
+    with thumbnails written into ``output_dir``. Videos are thumbnailed from the frame at 1
+    second (or mid-video) through moviepy, when the ffmpeg video backend is unavailable; without
+    either they get no properties or thumbnails.
+    """
+    largest = max(sizes)
+    if file_type == "image":
+        with Image.open(source_path) as img:
+            properties = {"width": img.width, "height": img.height}
+            # JPEGs decode straight at a reduced scale (still at least ``largest``) through DCT scaling.
+            img.draft("RGB", (largest, largest))
+            frame = img.convert("RGB")
+    elif file_type == "video" and MOVIEPY_AVAILABLE:
+        with VideoFileClip(source_path) as video:
+            properties = {"width": int(video.w), "height": int(video.h), "duration": video.duration}
+            frame = Image.fromarray(video.get_frame(min(1.0, video.duration / 2)))
+    else:
+        logger.warning("MoviePy not available, using basic video properties")
+        return {"properties": {"width": None, "height": None, "duration": None}, "thumbnails": {}}
+
+    return {"properties": properties, "thumbnails": write_thumbnails(frame, output_dir, sizes, quality)}
+
+
+def write_thumbnails(
+    image: Image.Image, output_dir: str, sizes: Sequence[int], quality: int
+) -> dict[str, dict[int, str]]:
+    """Write ``image`` at every size, largest first so each size is scaled down from the previous one."""
+    formats = THUMBNAIL_FORMATS if WEBP_AVAILABLE else {"jpeg": THUMBNAIL_FORMATS["jpeg"]}
+    thumbnails: dict[str, dict[int, str]] = {name: {} for name in formats}
+    current = image
+    for size in sorted(set(sizes), reverse=True):
+        current = current.copy()
+        current.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        for name, (pil_format, extension) in formats.items():
+            path = os.path.join(output_dir, f"{size}{extension}")
+            current.save(path, pil_format, quality=quality)
+            thumbnails[name][size] = path
+    return thumbnails
+
+
+def _crop_box(size: tuple[int, int], params: dict[str, Any]) -> tuple[int, int, int, int]:
+    width, height = size
+    return (params.get("left", 0), params.get("top", 0), params.get("right", width), params.get("bottom", height))
+
+
+def image_operation_size(size: tuple[int, int], op_type: str, params: dict[str, Any]) -> tuple[int, int]:
+    """Size of the image after an operation, without rendering it."""
+    if op_type == "crop":
+        left, top, right, bottom = _crop_box(size, params)
+        return right - left, bottom - top
+    if op_type == "resize":
+        return params.get("width", size[0]), params.get("height", size[1])
+    return size
+
+
+def apply_image_operation(image: Image.Image, op_type: str, params: dict[str, Any]) -> Image.Image:
+    """Apply one edit operation to a decoded RGB image."""
+    if op_type == "crop":
+        return image.crop(_crop_box(image.size, params))
+    if op_type == "resize":
+        return image.resize(image_operation_size(image.size, op_type, params), Image.Resampling.LANCZOS)
+    if op_type == "filter":
+        image_filter = IMAGE_FILTERS.get(params.get("filter_type", "blur"))
+        return image.filter(image_filter) if image_filter else image
+    if op_type == "brightness":
+        return ImageEnhance.Brightness(image).enhance(params.get("factor", 1.0))
+    if op_type == "contrast":
+        # Scales every channel by the factor, clipped to 255.
+        factor = params.get("factor", 1.0)
+        return image.point(lambda value: min(int(value * factor), 255))
+    raise ValueError(f"Unknown image operation: {op_type}")
+
+
+def render_image(
+    source_path: str,
+    output_dir: str,
+    operations: Sequence[tuple[str, dict[str, Any]]],
+    sizes: Sequence[int],
+    quality: int,
+) -> dict[str, Any]:
+    """Apply a whole edit chain in one decode -> transform -> encode pass.
+
+    Writes ``render.jpg`` and the thumbnails of the result into ``output_dir`` and returns
+    ``{"path", "properties", "thumbnails"}`` like ``process_media``.
+    """
+    with Image.open(source_path) as img:
+        image = img.convert("RGB")
+    for op_type, params in operations:
+        image = apply_image_operation(image, op_type, params)
+    render_path = os.path.join(output_dir, RENDER_IMAGE_NAME)
+    image.save(render_path, "JPEG", quality=EDIT_JPEG_QUALITY)
+    return {
+        "path": render_path,
+        "properties": {"width": image.width, "height": image.height},
+        "thumbnails": write_thumbnails(image, output_dir, sizes, quality),
+    }
+
+
+def fuse_trims(operations: Sequence[tuple[str, dict[str, Any]]]) -> tuple[float, Optional[float]]:
+    """Collapse successive trims, each relative to the previous one, into one ``(start, end)`` cut of the original."""
+    start, end = 0.0, None
+    for op_type, params in operations:
+        if op_type != "trim":
+            raise ValueError(f"Unknown video operation: {op_type}")
+        cut_start = start + float(params.get("start_time", 0))
+        cut_end = start + float(params.get("end_time", 0))
+        start, end = cut_start, cut_end if end is None else min(cut_end, end)
+    return start, end
+
+
+def trim_video(source_path: str, output_path: str, params: dict[str, Any]) -> None:
+    """Cut ``start_time``..``end_time`` (seconds) by re-encoding with moviepy; used without the ffmpeg backend."""
+    if not MOVIEPY_AVAILABLE:
+        raise RuntimeError("No video trimming method available (FFmpeg or MoviePy)")
+    with VideoFileClip(source_path) as clip:
+        trimmed_clip = clip.subclipped(params.get("start_time", 0), params.get("end_time", 0))
+        try:
+            trimmed_clip.write_videofile(
+                output_path,
+                codec='libx264',
+                audio_codec='aac',
+                temp_audiofile=f"{os.path.splitext(output_path)[0]}-audio.m4a",
+                remove_temp=True,
+            )
+        finally:
+            trimmed_clip.close()
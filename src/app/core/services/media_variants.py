@@ -0,0 +1,145 @@
+import hashlib
+import io
+import logging
+import os
+import uuid
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    """Target encoding for one platform upload."""
+
+    format: str
+    max_size: tuple[int, int]
+    quality: int
+    max_bytes: Optional[int] = None
+
+    @property
+    def extension(self) -> str:
+        return ".jpg" if self.format == "JPEG" else f".{self.format.lower()}"
+
+    @property
+    def token(self) -> str:
+        return f"{self.format.lower()}-{self.max_size[0]}x{self.max_size[1]}-q{self.quality}-{self.max_bytes or 0}"
+
+
+TWITTER_VARIANT = VariantSpec("JPEG", (1024, 1024), 85, 5 * 1024 * 1024)
+
+PLATFORM_VARIANTS: dict[str, VariantSpec] = {
+    "twitter": TWITTER_VARIANT,
+    "x": TWITTER_VARIANT,
+    "instagram": VariantSpec("JPEG", (1080, 1080), 90, 8 * 1024 * 1024),
+    "facebook": VariantSpec("JPEG", (2048, 2048), 90, 10 * 1024 * 1024),
+    "linkedin": VariantSpec("JPEG", (1200, 1200), 90, 5 * 1024 * 1024),
+    "discord": VariantSpec("JPEG", (2048, 2048), 85, 8 * 1024 * 1024),
+    "telegram": VariantSpec("JPEG", (1280, 1280), 90, 10 * 1024 * 1024),
+}
+
+MIN_QUALITY = 40
+
+
+class MediaVariantService:
+    """Prepares every platform's upload variant of an image from a single decode.
+
+    Variants are cached on disk under ``cache_dir`` keyed by the source content hash plus the
+    variant spec, so re-publishing the same image costs only a hash of the source file. Once the
+    cache outgrows ``max_bytes``, the least recently used variants are removed.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _variant_path(self, digest: str, spec: VariantSpec) -> str:
+        return os.path.join(self.cache_dir, f"{digest[:32]}_{spec.token}{spec.extension}")
+
+    @staticmethod
+    def _encode(image: Image.Image, spec: VariantSpec) -> bytes:
+        variant = image.copy()
+        variant.thumbnail(spec.max_size, Image.Resampling.LANCZOS)
+        quality = spec.quality
+        while True:
+            buffer = io.BytesIO()
+            variant.save(buffer, format=spec.format, quality=quality, optimize=True)
+            if not spec.max_bytes or buffer.tell() <= spec.max_bytes or quality <= MIN_QUALITY:
+                return buffer.getvalue()
+            quality -= 10
+
+    def prepare(self, source_path: str, platforms: Iterable[str]) -> dict[str, str]:
+        """Return ``{platform: variant_path}`` for every platform that has a variant spec.
+
+        Blocking; run it in a worker thread from async code.
+        """
+        wanted = {p.lower(): PLATFORM_VARIANTS[p.lower()] for p in platforms if p.lower() in PLATFORM_VARIANTS}
+        if not wanted:
+            return {}
+
+        with open(source_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        paths = {spec: self._variant_path(digest, spec) for spec in set(wanted.values())}
+
+        missing = []
+        for spec, path in paths.items():
+            try:
+                # The file's mtime records its last use, for prune.
+                os.utime(path)
+            except FileNotFoundError:
+                missing.append(spec)
+        if missing:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with Image.open(io.BytesIO(data)) as source:
+                image = source.convert("RGB")
+            for spec in missing:
+                path = paths[spec]
+                # Unique per call: concurrent publishes of one image run in separate threads.
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                try:
+                    with open(tmp_path, "wb") as f:
+                        f.write(self._encode(image, spec))
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            logger.info(f"Prepared {len(missing)} media variant(s) for {source_path}")
+            self.prune(keep=set(paths.values()))
+
+        return {platform: paths[spec] for platform, spec in wanted.items()}
+
+    def prune(self, keep: Collection[str] = ()) -> None:
+        """Remove least recently used variants, except ``keep``, until the cache fits in ``max_bytes``."""
+        entries = []
+        total = 0
+        try:
+            files = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return
+        for entry in files:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            total += stat.st_size
+            # Variants still being written count towards the size but are never removed.
+            if entry.path not in keep and not entry.name.endswith(".tmp"):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+media_variants = MediaVariantService(settings.MEDIA_VARIANT_CACHE_DIR, settings.MEDIA_VARIANT_CACHE_MAX_BYTES)
@@ -0,0 +1,73 @@
+from collections.abc import Awaitable, Callable, Collection
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...models import ContentGeneration, Project, SocialMediaCredential
+from .social_media import SocialMediaService
+
+
+def project_status_for(results: dict[str, Any]) -> str:
+    """Map platform results onto the project status shown in the dashboard."""
+    successful_platforms = results.get('successful_platforms', []) if results else []
+    failed_platforms = results.get('failed_platforms', []) if results else []
+    if successful_platforms and failed_platforms:
+        return "Partial"
+    elif successful_platforms:
+        return "Posted"
+    return "Failed"
+
+
+async def publish_project(
+    db: AsyncSession,
+    project: Project,
+    already_published: Collection[str] = (),
+    on_published: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> dict[str, Any]:
+    """Publish a project's generated content to its selected platforms and record the outcome.
+
+    Platforms in ``already_published`` (credential names, e.g. "twitter") are skipped and
+    reported as successful, so a retried publish never posts to them twice.
+    """
+    creds_result = await db.execute(select(SocialMediaCredential).where(SocialMediaCredential.project_id == project.id))
+    all_creds = creds_result.scalars().all()
+
+    # Create credentials map with proper platform name mapping
+    credentials_map = {}
+    for c in all_creds:
+        platform = c.platform
+        # Map platform names to match what the service expects
+        if platform == "twitter":
+            credentials_map["twitter"] = c.__dict__
+            credentials_map["x"] = c.__dict__  # Also support "x" for Twitter
+        else:
+            credentials_map[platform] = c.__dict__
+
+    # Filter by platforms selected in the project
+    project_platforms = [p.strip().lower() for p in project.social_medias.split(',')]
+    credentials_map = {
+        platform: creds
+        for platform, creds in credentials_map.items()
+        if (platform in project_platforms or (platform == "twitter" and "x" in project_platforms))
+        and platform not in already_published
+    }
+
+    content_generation = await db.scalar(select(ContentGeneration).where(ContentGeneration.project_id == project.id))
+    text_payload = content_generation.generated_text if content_generation else {"default": project.topic}
+
+    image_path = None
+    if project.with_image:
+        image_path = content_generation.image_path if content_generation and content_generation.image_path else None
+
+    service = SocialMediaService()
+    results = await service.post_to_social_media(text_payload, image_path, credentials_map, on_published=on_published)
+    if already_published:
+        previously = [platform.capitalize() for platform in already_published]
+        results['successful_platforms'] = previously + results.get('successful_platforms', [])
+
+    project.status = project_status_for(results)
+    db.add(project)
+    await db.commit()
+    await db.refresh(project)
+    return results
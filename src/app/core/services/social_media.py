@@ -1,53 +1,34 @@
+import asyncio
 import os
 import logging
 import tweepy
-import requests
-from requests_toolbelt.multipart.encoder import MultipartEncoder
-from PIL import Image
-from typing import Dict, Any, Optional
+import httpx
+from collections.abc import Awaitable, Callable
+from typing import Any, Dict, Optional
 import glob
 import errno
 import shutil
+import tempfile
 import json
 from datetime import datetime, timedelta
 
+from ..config import settings
+from ..utils.http_client import http_clients
+from ..utils.outbound_limit import outbound_limits
+from .instagram_sessions import InstagramLoginError, instagram_sessions
+from .media_variants import media_variants
+from .twitter_clients import twitter_clients
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-def onerror(func, path, exc_info):
-    """Handle errors during directory removal, especially on Windows where files may be locked."""
-    import stat
-    error_type, error_instance, traceback = exc_info
-    
-    # On Windows, files might be locked by another process
-    if isinstance(error_instance, PermissionError) or isinstance(error_instance, OSError):
-        try:
-            # Try to change file permissions and remove
-            os.chmod(path, stat.S_IWRITE)
-            func(path)
-        except Exception:
-            # If we still can't delete it, just log and skip
-            logger.warning(f"Could not delete {path}, file may be in use. Continuing anyway.")
-            pass
-    else:
-        raise
-
 class SocialMediaService:
     def __init__(self):
         pass  # No credentials or clients stored on the instance
 
-    def resize_image(self, image_path: str, max_size: tuple = (1080, 1080)) -> Optional[str]:
-        try:
-            with Image.open(image_path) as img:
-                img.thumbnail(max_size)
-                resized_path = f'{image_path}_resized.jpg'
-                img.save(resized_path)
-            return resized_path
-        except Exception as e:
-            logger.error(f"Error resizing image: {e}", exc_info=True)
-            return None
-
-    def post_to_telegram(self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]) -> Optional[Dict]:
+    async def post_to_telegram(
+        self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]
+    ) -> Optional[Dict]:
         """Post content to Telegram channel"""
         try:
             bot_token = credentials.get('telegram_bot_token')
@@ -69,7 +50,7 @@ class SocialMediaService:
                         'caption': message,
                         'parse_mode': 'HTML'  # Support basic HTML formatting
                     }
-                    response = requests.post(url, data=data, files=files)
+                    response = await http_clients.post(url, data=data, files=files)
             else:
                 # Send text message only
                 url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
@@ -78,7 +59,7 @@ class SocialMediaService:
                     'text': message,
                     'parse_mode': 'HTML'
                 }
-                response = requests.post(url, data=data)
+                response = await http_clients.post(url, data=data)
 
             if response.status_code == 200:
                 result = response.json()
@@ -98,7 +79,6 @@ class SocialMediaService:
 
     def post_to_twitter(self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]) -> Optional[Any]:
         try:
-            import tweepy
             api_key = credentials.get('twitter_api_key')
             api_secret = credentials.get('twitter_api_secret')
             access_token = credentials.get('twitter_access_token')
@@ -106,28 +86,10 @@ class SocialMediaService:
             if not all([api_key, api_secret, access_token, access_secret]):
                 logger.warning("Twitter credentials not provided")
                 return None
-            # v1.1 API for media upload
-            auth = tweepy.OAuth1UserHandler(api_key, api_secret, access_token, access_secret)
-            twitter_api = tweepy.API(auth)
-            # v2 API for tweet posting
-            twitter_client = tweepy.Client(
-                consumer_key=api_key,
-                consumer_secret=api_secret,
-                access_token=access_token,
-                access_token_secret=access_secret
-            )
-            # --- Always use JPEG for Twitter ---
-            import os
-            from PIL import Image
-            if image_path and image_path.lower().endswith('.png'):
-                jpeg_path = os.path.splitext(image_path)[0] + '.jpg'
-                if not os.path.exists(jpeg_path):
-                    with Image.open(image_path) as img:
-                        img = img.convert('RGB')
-                        img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-                        img.save(jpeg_path, format='JPEG', quality=85)
-                image_path = jpeg_path
-            # --- End JPEG for Twitter ---
+            # v1.1 API for media upload, v2 API for tweet posting
+            clients = twitter_clients.get(api_key, api_secret, access_token, access_secret)
+            twitter_api = clients.api
+            twitter_client = clients.client
             # --- Always trim text to 280 chars and handle both 'twitter' and 'x' keys ---
             tweet_text = text.get('twitter') or text.get('x') or ''
             tweet_text = tweet_text[:280]
@@ -152,6 +114,10 @@ class SocialMediaService:
                 tweet = twitter_client.create_tweet(text=tweet_text)
                 logger.info('Successfully posted to Twitter (text only)')
                 return tweet
+        except tweepy.Unauthorized as e:
+            twitter_clients.discard(api_key, api_secret, access_token, access_secret)
+            logger.error(f"Twitter rejected the credentials: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error posting to Twitter: {e}", exc_info=True)
             return None
@@ -164,57 +130,42 @@ class SocialMediaService:
             logger.warning("Instagram requires an image to post. Skipping.")
             return None
         try:
-            from instabot import Bot
-            import shutil
-            import os
-            import time
-            # --- Clean up Instabot config folder before login ---
-            config_dir = os.path.join(os.getcwd(), "config")
-            if os.path.exists(config_dir):
-                try:
-                    # Try to remove the config directory
-                    shutil.rmtree(config_dir, onerror=onerror)
-                except (PermissionError, OSError) as e:
-                    # If files are locked, wait a bit and try again
-                    logger.warning(f"Config directory cleanup failed (files may be locked): {e}. Retrying...")
-                    time.sleep(0.5)
-                    try:
-                        shutil.rmtree(config_dir, onerror=onerror)
-                    except Exception as retry_error:
-                        # If still failing, log and continue - instabot should handle existing config
-                        logger.warning(f"Could not clean config directory: {retry_error}. Continuing with existing config.")
-            # ---------------------------------------------------
             ig_username = credentials.get('ig_username')
             ig_password = credentials.get('ig_password')
             caption = text.get('instagram', '') if isinstance(text, dict) else str(text)
             if not (ig_username and ig_password):
                 logger.warning("Instagram username or password not configured")
                 return None
-            bot = Bot()
+
+            # instabot renames the uploaded file to .REMOVE_ME, so upload a private copy rather than
+            # the shared cached variant (already a JPEG); the copy keeps the .jpg extension instabot requires.
+            fd, image_path_to_upload = tempfile.mkstemp(suffix='.jpg')
+            os.close(fd)
             try:
-                bot.login(username=ig_username, password=ig_password)
-            except SystemExit:
-                # instabot calls sys.exit() on login failure, which we need to catch
-                logger.error("Instagram login failed: Invalid credentials or account requires Facebook login")
-                return None
-            except Exception as login_error:
-                logger.error(f"Instagram login error: {login_error}")
-                return None
-            
-            # Instabot requires .jpg extension for upload
-            if not image_path.lower().endswith('.jpg'):
-                from PIL import Image
-                img = Image.open(image_path)
-                jpg_path = image_path + ".jpg"
-                img.convert('RGB').save(jpg_path, "JPEG")
-                image_path_to_upload = jpg_path
-            else:
-                image_path_to_upload = image_path
-            # Delete .REMOVE_ME file if it exists before upload
-            remove_me_path = image_path_to_upload + ".REMOVE_ME"
-            if os.path.exists(remove_me_path):
-                os.remove(remove_me_path)
-            result = bot.upload_photo(image_path_to_upload, caption=caption)
+                shutil.copyfile(image_path, image_path_to_upload)
+
+                with instagram_sessions.lock(ig_username):
+                    try:
+                        bot = instagram_sessions.get_bot(ig_username, ig_password)
+                    except InstagramLoginError as login_error:
+                        logger.error(f"{login_error}: invalid credentials or account requires Facebook login")
+                        return None
+
+                    result = self._instagram_upload(bot, image_path_to_upload, caption)
+                    if not result and instagram_sessions.is_auth_failure(bot):
+                        # The persisted session expired: log in once more and retry the upload.
+                        logger.info(f"Instagram session for {ig_username} expired, logging in again")
+                        try:
+                            bot = instagram_sessions.get_bot(ig_username, ig_password, force_login=True)
+                        except InstagramLoginError as login_error:
+                            logger.error(f"{login_error}: invalid credentials or account requires Facebook login")
+                            return None
+                        result = self._instagram_upload(bot, image_path_to_upload, caption)
+            finally:
+                for leftover in (image_path_to_upload, image_path_to_upload + ".REMOVE_ME"):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+
             if result:
                 logger.info('Successfully posted to Instagram via instabot')
                 return {"success": True, "message": "Successfully posted to Instagram"}
@@ -229,7 +180,17 @@ class SocialMediaService:
             logger.error(f"Error posting to Instagram via instabot: {e}", exc_info=True)
             return None
 
-    def post_to_linkedin(self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]) -> Optional[Dict]:
+    @staticmethod
+    def _instagram_upload(bot, image_path: str, caption: str):
+        # instabot renames uploaded files to .REMOVE_ME; clear a leftover one so the upload isn't skipped
+        remove_me_path = image_path + ".REMOVE_ME"
+        if os.path.exists(remove_me_path):
+            os.remove(remove_me_path)
+        return bot.upload_photo(image_path, caption=caption)
+
+    async def post_to_linkedin(
+        self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]
+    ) -> Optional[Dict]:
         try:
             access_token = credentials.get('linkedin_access_token')
             author_urn = credentials.get('linkedin_author_urn')
@@ -267,18 +228,22 @@ class SocialMediaService:
                         }]
                     }
                 }
-                response = requests.post(upload_url, json=media, headers=headers)
+                response = await http_clients.post(upload_url, json=media, headers=headers)
                 upload_info = response.json()
                 upload_http_url = upload_info['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
                 asset = upload_info['value']['asset']
                 with open(image_path, 'rb') as image_file:
-                    requests.put(upload_http_url, data=image_file, headers={'Authorization': f'Bearer {access_token}'})
+                    await http_clients.put(
+                        upload_http_url,
+                        content=image_file.read(),
+                        headers={'Authorization': f'Bearer {access_token}'},
+                    )
                 
                 post_data['specificContent']['com.linkedin.ugc.ShareContent']['shareMediaCategory'] = 'IMAGE'
                 post_data['specificContent']['com.linkedin.ugc.ShareContent']['media'] = [{'status': 'READY', 'media': asset}]
 
             post_url = 'https://api.linkedin.com/v2/ugcPosts'
-            post_response = requests.post(post_url, headers=headers, json=post_data)
+            post_response = await http_clients.post(post_url, headers=headers, json=post_data)
 
             if post_response.status_code in (200, 201):
                 logger.info('Successfully posted to LinkedIn')
@@ -290,7 +255,9 @@ class SocialMediaService:
             logger.error(f"Error posting to LinkedIn: {e}", exc_info=True)
             return None
 
-    def post_to_facebook(self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]) -> Optional[Dict]:
+    async def post_to_facebook(
+        self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]
+    ) -> Optional[Dict]:
         try:
             fb_page_id = credentials.get('fb_page_id')
             fb_page_access_token = credentials.get('fb_page_access_token')
@@ -305,11 +272,13 @@ class SocialMediaService:
                 with open(image_path, 'rb') as img_file:
                     files = {'source': img_file}
                     data = {'message': message, 'access_token': fb_page_access_token}
-                    response = requests.post(f'https://graph.facebook.com/v18.0/{fb_page_id}/photos', data=data, files=files)
+                    response = await http_clients.post(
+                        f'https://graph.facebook.com/v18.0/{fb_page_id}/photos', data=data, files=files
+                    )
             else:
                 # Post text only
                 data = {'message': message, 'access_token': fb_page_access_token}
-                response = requests.post(f'https://graph.facebook.com/v18.0/{fb_page_id}/feed', data=data)
+                response = await http_clients.post(f'https://graph.facebook.com/v18.0/{fb_page_id}/feed', data=data)
 
             if response.status_code == 200:
                 logger.info('Successfully posted to Facebook')
@@ -321,7 +290,9 @@ class SocialMediaService:
             logger.error(f"Error posting to Facebook: {e}", exc_info=True)
             return None
 
-    def post_to_discord(self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]) -> Optional[Dict]:
+    async def post_to_discord(
+        self, text: Dict[str, str], image_path: Optional[str], credentials: Dict[str, str]
+    ) -> Optional[Dict]:
         try:
             discord_webhook_url = credentials.get('discord_webhook_url')
             if not discord_webhook_url:
@@ -332,15 +303,10 @@ class SocialMediaService:
 
             if image_path:
                 with open(image_path, 'rb') as img_file:
-                    m = MultipartEncoder(
-                        fields={
-                            'content': message,
-                            'file': (os.path.basename(image_path), img_file, 'image/jpeg')
-                        }
-                    )
-                    response = requests.post(discord_webhook_url, data=m, headers={'Content-Type': m.content_type})
+                    files = {'file': (os.path.basename(image_path), img_file, 'image/jpeg')}
+                    response = await http_clients.post(discord_webhook_url, data={'content': message}, files=files)
             else:
-                response = requests.post(discord_webhook_url, json={'content': message})
+                response = await http_clients.post(discord_webhook_url, json={'content': message})
 
             if response.status_code in (200, 204):  # 204 is no content (success)
                 logger.info('Successfully posted to Discord')
@@ -350,61 +316,121 @@ class SocialMediaService:
             else:
                 logger.error(f"Error posting to Discord: {response.text}")
                 return None
-        except requests.exceptions.MissingSchema as e:
+        except (httpx.UnsupportedProtocol, httpx.InvalidURL) as e:
             logger.error(f"Invalid Discord webhook URL: {e}")
             return None
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Discord request error: {e}")
             return None
         except Exception as e:
             logger.error(f"Error posting to Discord: {e}", exc_info=True)
             return None
 
-    def post_to_social_media(self, text: Dict[str, str], image_path: Optional[str], credentials_map: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    # Maps the platform names used in credentials maps onto their adapter methods.
+    PLATFORM_HANDLERS = {
+        'twitter': 'post_to_twitter',
+        'x': 'post_to_twitter',
+        'instagram': 'post_to_instagram',
+        'linkedin': 'post_to_linkedin',
+        'facebook': 'post_to_facebook',
+        'discord': 'post_to_discord',
+        'telegram': 'post_to_telegram',
+    }
+
+    @staticmethod
+    def _is_successful(result: Any) -> bool:
+        """Check whether a platform adapter result indicates a published post."""
+        if result is None:
+            return False
+        if isinstance(result, dict):
+            if result.get('success') is True:
+                return True
+            if 'id' in result:  # LinkedIn/Facebook response
+                return True
+            if 'message' in result and 'Successfully posted' in result.get('message', ''):  # Discord success
+                return True
+            return False
+        return hasattr(result, 'data')  # Twitter response object
+
+    async def _publish_to_platform(
+        self,
+        platform: str,
+        text: Dict[str, str],
+        image_path: Optional[str],
+        credentials: Dict[str, str],
+        timeout: float,
+    ) -> Optional[Any]:
+        """Run a single platform adapter without blocking the event loop.
+
+        Native async adapters share the pooled HTTP clients; blocking SDK adapters
+        (tweepy/instabot) are executed in a worker thread.
+        A timed-out call is reported as a failure; the worker thread itself cannot be
+        interrupted and finishes in the background. Calls first queue for the platform
+        account's outbound limiter, and that wait does not count towards ``timeout``.
+        """
+        method = getattr(self, self.PLATFORM_HANDLERS[platform])
+        try:
+            async with outbound_limits.limit(platform, credentials):
+                if asyncio.iscoroutinefunction(method):
+                    call = method(text, image_path, credentials)
+                else:
+                    call = asyncio.to_thread(method, text, image_path, credentials)
+                return await asyncio.wait_for(call, timeout=timeout)
+        except TimeoutError:
+            logger.error(f"Posting to {platform} timed out after {timeout}s")
+            return None
+        except Exception as e:
+            logger.error(f"Error posting to {platform}: {e}", exc_info=True)
+            return None
+
+    async def post_to_social_media(
+        self,
+        text: Dict[str, str],
+        image_path: Optional[str],
+        credentials_map: Dict[str, Dict[str, str]],
+        timeout: Optional[float] = None,
+        on_published: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Publish to every platform in ``credentials_map`` concurrently.
+
+        Each platform call is bounded by ``timeout`` (defaults to
+        ``settings.PUBLISH_PLATFORM_TIMEOUT``), so the total wall-clock time is roughly
+        that of the slowest platform instead of the sum of all of them.
+        ``on_published`` is awaited with each platform's name as soon as that platform
+        accepts the post, so callers can record progress that survives a cancelled publish.
+        """
         try:
             if image_path and not os.path.exists(image_path):
                 raise FileNotFoundError(f"Image not found at path: {image_path}")
 
             logger.info('Posting content to social media platforms...')
-            # print(f"[DEBUG] Text payload: {text}")
-            # print(f"[DEBUG] Image path: {image_path}")
-            # print(f"[DEBUG] Credentials map: {credentials_map}")
-            
-            results = {}
-            responses = {'success': [], 'failures': []}
+            timeout = timeout if timeout is not None else settings.PUBLISH_PLATFORM_TIMEOUT
+
             # Only post to platforms that are present in credentials_map
-            for platform, creds in credentials_map.items():
-                platform_lower = platform.lower()
-                if platform_lower == 'twitter' or platform_lower == 'x':
-                    result = self.post_to_twitter(text, image_path, creds)
-                elif platform_lower == 'instagram':
-                    result = self.post_to_instagram(text, image_path, creds)
-                elif platform_lower == 'linkedin':
-                    result = self.post_to_linkedin(text, image_path, creds)
-                elif platform_lower == 'facebook':
-                    result = self.post_to_facebook(text, image_path, creds)
-                elif platform_lower == 'discord':
-                    result = self.post_to_discord(text, image_path, creds)
-                elif platform_lower == 'telegram':
-                    result = self.post_to_telegram(text, image_path, creds)
-                else:
-                    continue
-                results[platform.capitalize()] = result
-                # Check if result exists and indicates successful post
-                success = False
-                if result is not None:
-                    if isinstance(result, dict):
-                        # Check for success indicators in dict responses
-                        if result.get('success') is True:
-                            success = True
-                        elif 'id' in result:  # LinkedIn/Facebook response
-                            success = True
-                        elif 'message' in result and 'Successfully posted' in result.get('message', ''):  # Discord success
-                            success = True
-                    elif hasattr(result, 'data'):  # Twitter response object
-                        success = True
-                
-                if success:
+            platforms = [p for p in credentials_map if p.lower() in self.PLATFORM_HANDLERS]
+
+            # Decode the image once and hand each adapter its own platform-sized variant.
+            variant_paths = {}
+            if image_path:
+                try:
+                    variant_paths = await asyncio.to_thread(media_variants.prepare, image_path, platforms)
+                except Exception as e:
+                    logger.warning(f"Could not prepare media variants, posting the original image: {e}")
+
+            async def publish(platform: str) -> Optional[Any]:
+                platform_image = variant_paths.get(platform.lower(), image_path)
+                result = await self._publish_to_platform(
+                    platform.lower(), text, platform_image, credentials_map[platform], timeout
+                )
+                if on_published is not None and self._is_successful(result):
+                    await on_published(platform)
+                return result
+
+            results = await asyncio.gather(*[publish(p) for p in platforms])
+
+            responses = {'success': [], 'failures': []}
+            for platform, result in zip(platforms, results):
+                if self._is_successful(result):
                     responses['success'].append(platform.capitalize())
                 else:
                     responses['failures'].append(platform.capitalize())
@@ -449,7 +475,7 @@ class SocialMediaService:
                 'metric': 'post_impressions,post_reach,post_engagement,post_clicks'
             }
             
-            response = requests.get(url, params=params)
+            response = await http_clients.get(url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 # Process the data and return formatted analytics
@@ -1,5 +1,4 @@
 import asyncio
-import aiohttp
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,52 +7,49 @@ from sqlalchemy import select
 from ...models.analytics import PostAnalytics
 from ...models.project import Project, SocialMediaCredential
 from ...models.post import Post
+from ..utils.http_client import http_clients
 
 
 class SocialMediaAnalyticsService:
     """Service to fetch real analytics data from social media platforms"""
     
-    def __init__(self):
-        self.session_timeout = aiohttp.ClientTimeout(total=30)
-    
     async def fetch_facebook_analytics(self, access_token: str, project_id: str) -> Dict[str, Any]:
         """Fetch Facebook project analytics"""
         try:
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                # For project-level analytics, we need to get the page ID first
-                # Then fetch page-level insights
-                url = "https://graph.facebook.com/v18.0/me"
-                params = {
-                    'access_token': access_token,
-                    'fields': 'id,name'
-                }
+            # For project-level analytics, we need to get the page ID first
+            # Then fetch page-level insights
+            url = "https://graph.facebook.com/v18.0/me"
+            params = {
+                'access_token': access_token,
+                'fields': 'id,name'
+            }
                 
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        page_data = await response.json()
-                        page_id = page_data.get('id')
+            response = await http_clients.get(url, params=params)
+            if response.status_code == 200:
+                page_data = response.json()
+                page_id = page_data.get('id')
                         
-                        if page_id:
-                            # Fetch page insights
-                            insights_url = f"https://graph.facebook.com/v18.0/{page_id}/insights"
-                            insights_params = {
-                                'access_token': access_token,
-                                'metric': 'page_impressions,page_reach,page_engagement,page_fans'
-                            }
+                if page_id:
+                    # Fetch page insights
+                    insights_url = f"https://graph.facebook.com/v18.0/{page_id}/insights"
+                    insights_params = {
+                        'access_token': access_token,
+                        'metric': 'page_impressions,page_reach,page_engagement,page_fans'
+                    }
                             
-                            async with session.get(insights_url, params=insights_params) as insights_response:
-                                if insights_response.status == 200:
-                                    data = await insights_response.json()
-                                    return self._parse_facebook_metrics(data)
-                                else:
-                                    print(f"Facebook insights API error: {insights_response.status}")
-                                    return self._get_default_metrics()
-                        else:
-                            print("Could not get Facebook page ID")
-                            return self._get_default_metrics()
+                    insights_response = await http_clients.get(insights_url, params=insights_params)
+                    if insights_response.status_code == 200:
+                        data = insights_response.json()
+                        return self._parse_facebook_metrics(data)
                     else:
-                        print(f"Facebook API error: {response.status}")
+                        print(f"Facebook insights API error: {insights_response.status_code}")
                         return self._get_default_metrics()
+                else:
+                    print("Could not get Facebook page ID")
+                    return self._get_default_metrics()
+            else:
+                print(f"Facebook API error: {response.status_code}")
+                return self._get_default_metrics()
         except Exception as e:
             print(f"Error fetching Facebook analytics: {e}")
             return self._get_default_metrics()
@@ -61,46 +57,45 @@ class SocialMediaAnalyticsService:
     async def fetch_instagram_analytics(self, access_token: str, project_id: str) -> Dict[str, Any]:
         """Fetch Instagram project analytics"""
         try:
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                # For Instagram, we need to get the business account ID first
-                url = "https://graph.facebook.com/v18.0/me/accounts"
-                params = {
-                    'access_token': access_token,
-                    'fields': 'instagram_business_account'
-                }
+            # For Instagram, we need to get the business account ID first
+            url = "https://graph.facebook.com/v18.0/me/accounts"
+            params = {
+                'access_token': access_token,
+                'fields': 'instagram_business_account'
+            }
                 
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        accounts_data = await response.json()
-                        if 'data' in accounts_data and accounts_data['data']:
-                            # Get the first account with Instagram business account
-                            for account in accounts_data['data']:
-                                if 'instagram_business_account' in account:
-                                    ig_account_id = account['instagram_business_account']['id']
+            response = await http_clients.get(url, params=params)
+            if response.status_code == 200:
+                accounts_data = response.json()
+                if 'data' in accounts_data and accounts_data['data']:
+                    # Get the first account with Instagram business account
+                    for account in accounts_data['data']:
+                        if 'instagram_business_account' in account:
+                            ig_account_id = account['instagram_business_account']['id']
                                     
-                                    # Fetch Instagram business account insights
-                                    insights_url = f"https://graph.facebook.com/v18.0/{ig_account_id}/insights"
-                                    insights_params = {
-                                        'access_token': access_token,
-                                        'metric': 'impressions,reach,profile_views,follower_count'
-                                    }
+                            # Fetch Instagram business account insights
+                            insights_url = f"https://graph.facebook.com/v18.0/{ig_account_id}/insights"
+                            insights_params = {
+                                'access_token': access_token,
+                                'metric': 'impressions,reach,profile_views,follower_count'
+                            }
                                     
-                                    async with session.get(insights_url, params=insights_params) as insights_response:
-                                        if insights_response.status == 200:
-                                            data = await insights_response.json()
-                                            return self._parse_instagram_metrics(data)
-                                        else:
-                                            print(f"Instagram insights API error: {insights_response.status}")
-                                            return self._get_default_metrics()
+                            insights_response = await http_clients.get(insights_url, params=insights_params)
+                            if insights_response.status_code == 200:
+                                data = insights_response.json()
+                                return self._parse_instagram_metrics(data)
+                            else:
+                                print(f"Instagram insights API error: {insights_response.status_code}")
+                                return self._get_default_metrics()
                             
-                            print("No Instagram business account found")
-                            return self._get_default_metrics()
-                        else:
-                            print("No Facebook accounts found")
-                            return self._get_default_metrics()
-                    else:
-                        print(f"Instagram API error: {response.status}")
-                        return self._get_default_metrics()
+                    print("No Instagram business account found")
+                    return self._get_default_metrics()
+                else:
+                    print("No Facebook accounts found")
+                    return self._get_default_metrics()
+            else:
+                print(f"Instagram API error: {response.status_code}")
+                return self._get_default_metrics()
         except Exception as e:
             print(f"Error fetching Instagram analytics: {e}")
             return self._get_default_metrics()
@@ -108,39 +103,38 @@ class SocialMediaAnalyticsService:
     async def fetch_twitter_analytics(self, access_token: str, project_id: str) -> Dict[str, Any]:
         """Fetch Twitter project analytics"""
         try:
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                # For Twitter, we need to get user metrics
-                url = "https://api.twitter.com/2/users/me"
-                headers = {
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                }
+            # For Twitter, we need to get user metrics
+            url = "https://api.twitter.com/2/users/me"
+            headers = {
+                'Authorization': f'Bearer {access_token}',
+                'Content-Type': 'application/json'
+            }
                 
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        user_data = await response.json()
-                        user_id = user_data.get('data', {}).get('id')
+            response = await http_clients.get(url, headers=headers)
+            if response.status_code == 200:
+                user_data = response.json()
+                user_id = user_data.get('data', {}).get('id')
                         
-                        if user_id:
-                            # Fetch user metrics
-                            metrics_url = f"https://api.twitter.com/2/users/{user_id}"
-                            metrics_params = {
-                                'user.fields': 'public_metrics'
-                            }
+                if user_id:
+                    # Fetch user metrics
+                    metrics_url = f"https://api.twitter.com/2/users/{user_id}"
+                    metrics_params = {
+                        'user.fields': 'public_metrics'
+                    }
                             
-                            async with session.get(metrics_url, headers=headers, params=metrics_params) as metrics_response:
-                                if metrics_response.status == 200:
-                                    data = await metrics_response.json()
-                                    return self._parse_twitter_metrics(data)
-                                else:
-                                    print(f"Twitter metrics API error: {metrics_response.status}")
-                                    return self._get_default_metrics()
-                        else:
-                            print("Could not get Twitter user ID")
-                            return self._get_default_metrics()
+                    metrics_response = await http_clients.get(metrics_url, headers=headers, params=metrics_params)
+                    if metrics_response.status_code == 200:
+                        data = metrics_response.json()
+                        return self._parse_twitter_metrics(data)
                     else:
-                        print(f"Twitter API error: {response.status}")
+                        print(f"Twitter metrics API error: {metrics_response.status_code}")
                         return self._get_default_metrics()
+                else:
+                    print("Could not get Twitter user ID")
+                    return self._get_default_metrics()
+            else:
+                print(f"Twitter API error: {response.status_code}")
+                return self._get_default_metrics()
         except Exception as e:
             print(f"Error fetching Twitter analytics: {e}")
             return self._get_default_metrics()
@@ -148,21 +142,20 @@ class SocialMediaAnalyticsService:
     async def fetch_linkedin_analytics(self, access_token: str, project_id: str) -> Dict[str, Any]:
         """Fetch LinkedIn project analytics"""
         try:
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                # For LinkedIn, we need to get organization analytics
-                url = "https://api.linkedin.com/v2/organizationalEntityShareStatistics"
-                headers = {
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                }
+            # For LinkedIn, we need to get organization analytics
+            url = "https://api.linkedin.com/v2/organizationalEntityShareStatistics"
+            headers = {
+                'Authorization': f'Bearer {access_token}',
+                'Content-Type': 'application/json'
+            }
                 
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_linkedin_metrics(data)
-                    else:
-                        print(f"LinkedIn API error: {response.status}")
-                        return self._get_default_metrics()
+            response = await http_clients.get(url, headers=headers)
+            if response.status_code == 200:
+                data = response.json()
+                return self._parse_linkedin_metrics(data)
+            else:
+                print(f"LinkedIn API error: {response.status_code}")
+                return self._get_default_metrics()
         except Exception as e:
             print(f"Error fetching LinkedIn analytics: {e}")
             return self._get_default_metrics()
@@ -172,20 +165,19 @@ class SocialMediaAnalyticsService:
         try:
             # Discord webhooks don't provide analytics, but we can track basic metrics
             # This would require using the Discord API instead of webhook
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                # For Discord, we might need to use the Discord API instead of webhook
-                # This is a simplified implementation
-                return {
-                    'likes': 0,  # Discord doesn't have likes
-                    'shares': 0,  # Discord doesn't have shares
-                    'comments': 0,  # Could track reactions
-                    'reach': 0,  # Could track channel member count
-                    'impressions': 0,
-                    'clicks': 0,
-                    'engagement': 0,
-                    'engagement_rate': 0.0,
-                    'click_through_rate': 0.0
-                }
+            # For Discord, we might need to use the Discord API instead of webhook
+            # This is a simplified implementation
+            return {
+                'likes': 0,  # Discord doesn't have likes
+                'shares': 0,  # Discord doesn't have shares
+                'comments': 0,  # Could track reactions
+                'reach': 0,  # Could track channel member count
+                'impressions': 0,
+                'clicks': 0,
+                'engagement': 0,
+                'engagement_rate': 0.0,
+                'click_through_rate': 0.0
+            }
         except Exception as e:
             print(f"Error fetching Discord analytics: {e}")
             return self._get_default_metrics()
@@ -193,28 +185,27 @@ class SocialMediaAnalyticsService:
     async def fetch_telegram_analytics(self, bot_token: str, project_id: str) -> Dict[str, Any]:
         """Fetch Telegram channel analytics"""
         try:
-            async with aiohttp.ClientSession(timeout=self.session_timeout) as session:
-                # Telegram Bot API doesn't provide message analytics
-                # This would require storing message IDs when posts are sent
-                url = f"https://api.telegram.org/bot{bot_token}/getChat"
+            # Telegram Bot API doesn't provide message analytics
+            # This would require storing message IDs when posts are sent
+            url = f"https://api.telegram.org/bot{bot_token}/getChat"
                 
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        # For now, return basic metrics
-                        return {
-                            'likes': 0,  # Telegram doesn't have likes
-                            'shares': 0,  # Could track forwards
-                            'comments': 0,  # Could track replies
-                            'reach': 0,  # Could track channel member count
-                            'impressions': 0,
-                            'clicks': 0,
-                            'engagement': 0,
-                            'engagement_rate': 0.0,
-                            'click_through_rate': 0.0
-                        }
-                    else:
-                        print(f"Telegram API error: {response.status}")
-                        return self._get_default_metrics()
+            response = await http_clients.get(url)
+            if response.status_code == 200:
+                # For now, return basic metrics
+                return {
+                    'likes': 0,  # Telegram doesn't have likes
+                    'shares': 0,  # Could track forwards
+                    'comments': 0,  # Could track replies
+                    'reach': 0,  # Could track channel member count
+                    'impressions': 0,
+                    'clicks': 0,
+                    'engagement': 0,
+                    'engagement_rate': 0.0,
+                    'click_through_rate': 0.0
+                }
+            else:
+                print(f"Telegram API error: {response.status_code}")
+                return self._get_default_metrics()
         except Exception as e:
             print(f"Error fetching Telegram analytics: {e}")
             return self._get_default_metrics()
@@ -1,9 +1,11 @@
-import requests
 import logging
 from typing import Dict, Optional, Any
 from datetime import datetime, timedelta
 import json
 
+from ..utils.http_client import http_clients
+from .twitter_clients import twitter_clients
+
 logger = logging.getLogger(__name__)
 
 class TwitterAPI:
@@ -15,16 +17,17 @@ class TwitterAPI:
         self.access_token = access_token
         self.access_secret = access_secret
         self.base_url = "https://api.twitter.com/2"
-        self.bearer_token = None
+        # Shared per credential set, so the bearer token survives across TwitterAPI instances.
+        self.clients = twitter_clients.get(api_key, api_secret, access_token, access_secret)
         
-    def _get_bearer_token(self) -> Optional[str]:
+    async def _get_bearer_token(self) -> Optional[str]:
         """Get bearer token for API authentication"""
         try:
             auth_url = "https://api.twitter.com/oauth2/token"
             auth_data = {
                 'grant_type': 'client_credentials'
             }
-            auth_response = requests.post(
+            auth_response = await http_clients.post(
                 auth_url,
                 auth=(self.api_key, self.api_secret),
                 data=auth_data
@@ -40,22 +43,22 @@ class TwitterAPI:
             logger.error(f"Error getting Twitter bearer token: {str(e)}")
             return None
     
-    def get_tweet_analytics(self, tweet_id: str) -> Optional[Dict]:
+    async def get_tweet_analytics(self, tweet_id: str) -> Optional[Dict]:
         """Get analytics for a specific tweet"""
         try:
-            if not self.bearer_token:
-                self.bearer_token = self._get_bearer_token()
-                if not self.bearer_token:
+            if not self.clients.bearer_token:
+                self.clients.bearer_token = await self._get_bearer_token()
+                if not self.clients.bearer_token:
                     return None
             
             headers = {
-                'Authorization': f'Bearer {self.bearer_token}',
+                'Authorization': f'Bearer {self.clients.bearer_token}',
                 'Content-Type': 'application/json'
             }
             
             # Get tweet metrics
             metrics_url = f"{self.base_url}/tweets/{tweet_id}?tweet.fields=public_metrics,non_public_metrics"
-            response = requests.get(metrics_url, headers=headers)
+            response = await http_clients.get(metrics_url, headers=headers)
             
             if response.status_code == 200:
                 data = response.json()
@@ -84,6 +87,9 @@ class TwitterAPI:
                     "post_url": f"https://twitter.com/user/status/{tweet_id}"
                 }
             else:
+                if response.status_code == 401:
+                    # Token was invalidated; fetch a fresh one next time.
+                    self.clients.bearer_token = None
                 logger.error(f"Failed to get Twitter analytics: {response.status_code}")
                 return None
                 
@@ -99,7 +105,7 @@ class FacebookAPI:
         self.access_token = access_token
         self.base_url = "https://graph.facebook.com/v18.0"
     
-    def get_post_analytics(self, post_id: str) -> Optional[Dict]:
+    async def get_post_analytics(self, post_id: str) -> Optional[Dict]:
         """Get analytics for a specific Facebook post"""
         try:
             # Get post insights
@@ -109,7 +115,7 @@ class FacebookAPI:
                 'metric': 'post_impressions,post_reach,post_engaged_users,post_reactions_by_type_total'
             }
             
-            response = requests.get(insights_url, params=params)
+            response = await http_clients.get(insights_url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -165,7 +171,7 @@ class InstagramAPI:
         self.access_token = access_token
         self.base_url = "https://graph.instagram.com/v12.0"
     
-    def get_post_analytics(self, post_id: str) -> Optional[Dict]:
+    async def get_post_analytics(self, post_id: str) -> Optional[Dict]:
         """Get analytics for a specific Instagram post"""
         try:
             # Instagram Basic Display API has very limited analytics
@@ -176,7 +182,7 @@ class InstagramAPI:
                 'fields': 'id,media_type,media_url,permalink,timestamp'
             }
             
-            response = requests.get(post_url, params=params)
+            response = await http_clients.get(post_url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -209,7 +215,7 @@ class LinkedInAPI:
         self.access_token = access_token
         self.base_url = "https://api.linkedin.com/v2"
     
-    def get_post_analytics(self, post_id: str) -> Optional[Dict]:
+    async def get_post_analytics(self, post_id: str) -> Optional[Dict]:
         """Get analytics for a specific LinkedIn post"""
         try:
             headers = {
@@ -220,7 +226,7 @@ class LinkedInAPI:
             # LinkedIn API requires specific permissions for analytics
             # This is a simplified implementation
             analytics_url = f"{self.base_url}/socialMetrics/{post_id}"
-            response = requests.get(analytics_url, headers=headers)
+            response = await http_clients.get(analytics_url, headers=headers)
             
             if response.status_code == 200:
                 data = response.json()
@@ -262,7 +268,7 @@ class DiscordAPI:
         self.webhook_url = webhook_url
         self.base_url = "https://discord.com/api/v10"
     
-    def get_message_analytics(self, message_id: str) -> Optional[Dict]:
+    async def get_message_analytics(self, message_id: str) -> Optional[Dict]:
         """Get analytics for a specific Discord message"""
         try:
             # Discord doesn't provide public analytics API
@@ -293,7 +299,7 @@ class TelegramAPI:
         self.channel_id = channel_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
     
-    def get_message_analytics(self, message_id: str) -> Optional[Dict]:
+    async def get_message_analytics(self, message_id: str) -> Optional[Dict]:
         """Get analytics for a specific Telegram message"""
         try:
             # Telegram doesn't provide public analytics API
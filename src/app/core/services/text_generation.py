@@ -1,10 +1,26 @@
-import openai
-import requests
+import asyncio
 import os
-import time
 import re
+from collections.abc import AsyncIterator
 from typing import Dict, Optional
 from ...core.config import settings
+from ..utils.http_client import http_clients
+from ..utils.openai_client import get_openai_client
+from ..utils.ttl_cache import AsyncTTLCache
+from .generation_cache import cached_generation, generation_cache, generation_key
+
+TEXT_MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = (
+    "You are a social media content creator. Generate a post suitable for all platforms. "
+    "Be engaging and informative. Conclude with relevant hashtags."
+)
+
+news_cache = AsyncTTLCache(
+    "news",
+    ttl=settings.NEWS_CACHE_TTL_SECONDS,
+    max_entries=settings.NEWS_CACHE_MAX_ENTRIES,
+    use_redis=settings.NEWS_CACHE_USE_REDIS,
+)
 
 class TextGenerationService:
     def __init__(self):
@@ -12,7 +28,7 @@ class TextGenerationService:
         self.news_api_key = settings.NEWS_API_KEY
         if not self.openai_api_key:
             raise ValueError("OpenAI API key is missing!")
-        openai.api_key = self.openai_api_key
+        self.client = get_openai_client()
 
     def clean_text(self, text: str) -> str:
         """Clean up the generated text by removing unwanted patterns."""
@@ -31,68 +47,135 @@ class TextGenerationService:
                 break
         return trimmed_text.strip()
 
-    def delay(self, ms: int):
+    async def delay(self, ms: int):
         """Delay function to add pauses between retries."""
-        time.sleep(ms / 1000.0)
+        await asyncio.sleep(ms / 1000.0)
+
+    @staticmethod
+    def normalize_topic(topic: str) -> str:
+        return " ".join(topic.lower().split())
+
+    async def _fetch_news_uncached(self, topic: str) -> str:
+        response = await http_clients.get(
+            'https://newsapi.org/v2/everything',
+            params={'q': topic, 'sortBy': 'publishedAt', 'apiKey': self.news_api_key},
+        )
+        response.raise_for_status()
+        data = response.json()
+        if 'articles' not in data or not data['articles']:
+            return f"No recent news articles found for '{topic}'. Please generate content based on general knowledge about this topic."
+
+        news_summary = "\n\n".join([
+            f"Title: {article['title']}\nDescription: {article.get('description', 'No description available.')}"
+            for article in data['articles'][:3]
+        ])
+        return news_summary
+
+    async def fetch_news(self, topic: str) -> str:
+        """Fetch news for a given topic from the News API.
 
-    def fetch_news(self, topic: str) -> str:
-        """Fetch news for a given topic from the News API."""
+        Results are cached per normalized topic for NEWS_CACHE_TTL_SECONDS, and concurrent
+        requests for the same topic share one News API call. Errors are not cached.
+        """
         try:
             if not self.news_api_key:
                 return f"No news API key configured. Cannot fetch news for {topic}."
-            url = f'https://newsapi.org/v2/everything?q={topic}&sortBy=publishedAt&apiKey={self.news_api_key}'
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            if 'articles' not in data or not data['articles']:
-                return f"No recent news articles found for '{topic}'. Please generate content based on general knowledge about this topic."
-            
-            news_summary = "\n\n".join([
-                f"Title: {article['title']}\nDescription: {article.get('description', 'No description available.')}"
-                for article in data['articles'][:3]
-            ])
-            return news_summary
+            normalized = self.normalize_topic(topic)
+            return await news_cache.get_or_load(normalized, lambda: self._fetch_news_uncached(normalized))
         except Exception as e:
             return f"Error fetching news for '{topic}': {e}. Please generate content based on general knowledge about this topic."
 
-    def generate_text(self, topic: str, content_type: str) -> Dict[str, str]:
+    def _messages(self, system_prompt: str, user_prompt: str) -> list[dict[str, str]]:
+        return [{
+            "role": "system",
+            "content": system_prompt
+        }, {
+            "role": "user",
+            "content": user_prompt
+        }]
+
+    async def _complete(self, system_prompt: str, user_prompt: str, force_fresh: bool = False) -> str:
+        async def call_model() -> str:
+            response = await self.client.chat.completions.create(
+                model=TEXT_MODEL,
+                messages=self._messages(system_prompt, user_prompt)
+            )
+            return response.choices[0].message.content or ""
+
+        # The news context is part of the user prompt, so fresh news yields a new key.
+        key = generation_key("text", TEXT_MODEL, system_prompt, user_prompt)
+        return await cached_generation(key, call_model, force_fresh=force_fresh)
+
+    async def _build_prompt(self, topic: str, content_type: str) -> str:
+        if content_type.lower() == 'news':
+            news_context = await self.fetch_news(topic)
+            return (
+                f"Based on the following news articles about '{topic}', write an engaging social media post. "
+                "Do not just list the news, but create a cohesive and interesting summary or take on them. "
+                f"Include relevant hashtags.\n\nNews context:\n{news_context}"
+            )
+        return (
+            f"Create a '{content_type}' text for a social media project about the following topic: {topic}. "
+            "Conclude with relevant hashtags."
+        )
+
+    def platform_texts(self, base_text: str, topic: str) -> Dict[str, str]:
+        """Trim the model output to each platform's length and add the platform extras."""
+        base_text = self.clean_text(base_text)
+        trimmed = self.trim_to_last_sentence(base_text, 280) if base_text else "No content generated."
+        other_platforms = self.trim_to_last_sentence(base_text, 1000) if base_text else "No content generated."
+
+        # Generate platform-specific content
+        telegram_content = f"📢 {base_text}\n\nStay updated with the latest insights on {topic}. Join our channel for more updates! 📱"
+
+        return {
+            "twitter": trimmed,
+            "x": trimmed,
+            "facebook": other_platforms,
+            "instagram": other_platforms,
+            "linkedin": other_platforms,
+            "discord": other_platforms,
+            "telegram": telegram_content
+        }
+
+    async def stream_text(self, topic: str, content_type: str, force_fresh: bool = False) -> AsyncIterator[str]:
+        """Yield the model output as it is generated; ``platform_texts`` turns the joined text into posts.
+
+        Unlike ``generate_text``, errors propagate to the caller. A cached completion is yielded
+        as a single chunk, and a completed stream is stored in the generation cache.
+        """
+        prompt_for_openai = await self._build_prompt(topic, content_type)
+        key = generation_key("text", TEXT_MODEL, SYSTEM_PROMPT, prompt_for_openai)
+        if settings.GENERATION_CACHE_ENABLED and not force_fresh:
+            found, cached = generation_cache.peek(key)
+            if found:
+                yield cached
+                return
+
+        stream = await self.client.chat.completions.create(
+            model=TEXT_MODEL,
+            messages=self._messages(SYSTEM_PROMPT, prompt_for_openai),
+            stream=True,
+        )
+        parts = []
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            # Closing the stream aborts the upstream request when the consumer stops early.
+            await stream.close()
+        if settings.GENERATION_CACHE_ENABLED:
+            generation_cache.put(key, "".join(parts))
+
+    async def generate_text(self, topic: str, content_type: str, force_fresh: bool = False) -> Dict[str, str]:
         """Generate text content, using news API if content_type is 'news'."""
         try:
-            prompt_for_openai = ""
-            if content_type.lower() == 'news':
-                news_context = self.fetch_news(topic)
-                prompt_for_openai = f"Based on the following news articles about '{topic}', write an engaging social media post. Do not just list the news, but create a cohesive and interesting summary or take on them. Include relevant hashtags.\n\nNews context:\n{news_context}"
-            else:
-                prompt_for_openai = f"Create a '{content_type}' text for a social media project about the following topic: {topic}. Conclude with relevant hashtags."
-
-            response = openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{
-                    "role": "system",
-                    "content": "You are a social media content creator. Generate a post suitable for all platforms. Be engaging and informative. Conclude with relevant hashtags."
-                }, {
-                    "role": "user",
-                    "content": prompt_for_openai
-                }]
-            )
-            base_text = response.choices[0].message.content or ""
-            base_text = self.clean_text(base_text)
-            trimmed = self.trim_to_last_sentence(base_text, 280) if base_text else "No content generated."
-            other_platforms = self.trim_to_last_sentence(base_text, 1000) if base_text else "No content generated."
-            
-            # Generate platform-specific content
-            telegram_content = f"📢 {base_text}\n\nStay updated with the latest insights on {topic}. Join our channel for more updates! 📱"
-            
-            results = {
-                "twitter": trimmed,
-                "x": trimmed,
-                "facebook": other_platforms,
-                "instagram": other_platforms,
-                "linkedin": other_platforms,
-                "discord": other_platforms,
-                "telegram": telegram_content
-            }
-            return results
+            prompt_for_openai = await self._build_prompt(topic, content_type)
+            base_text = await self._complete(SYSTEM_PROMPT, prompt_for_openai, force_fresh=force_fresh)
+            return self.platform_texts(base_text, topic)
         except Exception as e:
             print(f"Error generating text: {e}")
             return {p: str(e) for p in ["twitter", "x", "facebook", "instagram", "linkedin", "discord", "telegram"]}
\ No newline at end of file
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import tweepy
+
+from ..config import settings
+
+
+@dataclass
+class TwitterClients:
+    """Authenticated tweepy clients for one credential set."""
+
+    api: tweepy.API  # v1.1, used for media upload
+    client: tweepy.Client  # v2, used for tweet creation
+    bearer_token: Optional[str] = None  # app-only OAuth2 token for analytics lookups
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class TwitterClientCache:
+    """Bounded LRU cache of tweepy clients keyed by a hash of the four OAuth1 credential fields.
+
+    Entries unused for ``idle_seconds`` are dropped on the next access. Access is guarded by a
+    lock because posting runs tweepy in worker threads.
+    """
+
+    def __init__(self, max_size: int, idle_seconds: float):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict[str, TwitterClients] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(api_key: str, api_secret: str, access_token: str, access_secret: str) -> str:
+        return hashlib.sha256("\0".join([api_key, api_secret, access_token, access_secret]).encode()).hexdigest()
+
+    def _evict_idle(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.last_used < self.idle_seconds:
+                break
+            del self._entries[key]
+
+    def get(self, api_key: str, api_secret: str, access_token: str, access_secret: str) -> TwitterClients:
+        key = self.key(api_key, api_secret, access_token, access_secret)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                auth = tweepy.OAuth1UserHandler(api_key, api_secret, access_token, access_secret)
+                entry = TwitterClients(
+                    api=tweepy.API(auth),
+                    client=tweepy.Client(
+                        consumer_key=api_key,
+                        consumer_secret=api_secret,
+                        access_token=access_token,
+                        access_token_secret=access_secret,
+                    ),
+                )
+                self._entries[key] = entry
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            entry.last_used = now
+            return entry
+
+    def discard(self, api_key: str, api_secret: str, access_token: str, access_secret: str) -> None:
+        """Drop a credential set, e.g. after the platform rejected it."""
+        with self._lock:
+            self._entries.pop(self.key(api_key, api_secret, access_token, access_secret), None)
+
+
+twitter_clients = TwitterClientCache(settings.TWITTER_CLIENT_CACHE_SIZE, settings.TWITTER_CLIENT_IDLE_SECONDS)
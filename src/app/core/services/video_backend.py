@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from ..config import settings
+from ..utils.process_pool import media_pool
+
+logger = logging.getLogger(__name__)
+
+# Encoders for trims that cannot be stream-copied, by output container.
+REENCODE_ARGS = {
+    ".webm": ["-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "32", "-c:a", "libopus"],
+}
+DEFAULT_REENCODE_ARGS = [
+    "-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-c:a", "aac", "-movflags", "+faststart",
+]
+
+
+class VideoBackendError(Exception):
+    pass
+
+
+@dataclass
+class VideoProbe:
+    width: Optional[int]
+    height: Optional[int]
+    duration: Optional[float]
+
+    def properties(self) -> dict[str, Any]:
+        return {"width": self.width, "height": self.height, "duration": self.duration}
+
+
+class FFmpegVideoBackend:
+    """Video probing, poster frames and trims through ffprobe/ffmpeg subprocesses.
+
+    The tools read the stored file directly, so nothing is decoded in Python: probing only
+    parses the container header, poster frames come from a keyframe seek, and trims are
+    stream-copied when the cut starts close enough to a keyframe. At most one subprocess per
+    media pool worker runs at a time.
+    """
+
+    def __init__(self) -> None:
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def available(self) -> bool:
+        return bool(shutil.which(settings.MEDIA_FFMPEG_BINARY) and shutil.which(settings.MEDIA_FFPROBE_BINARY))
+
+    async def _run(self, *args: str) -> bytes:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(media_pool.max_workers)
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(), timeout=settings.MEDIA_FFMPEG_TIMEOUT_SECONDS
+                )
+            except BaseException:
+                # Timed out or the request was cancelled; don't leave the tool running.
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+        if process.returncode != 0:
+            message = stderr.decode(errors='replace')[-500:]
+            raise VideoBackendError(f"{os.path.basename(args[0])} exited with {process.returncode}: {message}")
+        return stdout
+
+    async def _ffprobe(self, *args: str) -> dict[str, Any]:
+        return json.loads(await self._run(settings.MEDIA_FFPROBE_BINARY, "-v", "error", "-of", "json", *args))
+
+    async def probe(self, source_path: str) -> VideoProbe:
+        """Dimensions and duration from the container header, accounting for rotation metadata."""
+        info = await self._ffprobe("-show_format", "-show_streams", "-select_streams", "v:0", source_path)
+        stream = (info.get("streams") or [{}])[0]
+        width, height = stream.get("width"), stream.get("height")
+        if width and height and abs(_rotation(stream)) in (90, 270):
+            width, height = height, width
+        duration = (info.get("format") or {}).get("duration") or stream.get("duration")
+        return VideoProbe(width=width, height=height, duration=float(duration) if duration else None)
+
+    async def extract_poster_frame(self, source_path: str, output_path: str, at_seconds: float, max_size: int) -> None:
+        """Write the keyframe at or before ``at_seconds`` as an image no larger than ``max_size``."""
+        await self._run(
+            settings.MEDIA_FFMPEG_BINARY, "-v", "error", "-y",
+            # Input seeking jumps to the nearest earlier keyframe; -noaccurate_seek keeps that frame
+            # instead of decoding forward to the exact timestamp.
+            "-noaccurate_seek", "-ss", f"{at_seconds:.3f}", "-i", source_path,
+            "-frames:v", "1",
+            "-vf", f"scale={max_size}:{max_size}:force_original_aspect_ratio=decrease",
+            output_path,
+        )
+
+    async def keyframe_times(self, source_path: str, around: float, window: float) -> list[float]:
+        """Keyframe timestamps of the first video stream within ``around +/- window`` seconds, from packet flags."""
+        start = max(around - window, 0.0)
+        info = await self._ffprobe(
+            "-select_streams", "v:0",
+            "-read_intervals", f"{start:.3f}%{around + window:.3f}",
+            "-show_entries", "packet=pts_time,flags",
+            source_path,
+        )
+        return sorted(
+            float(packet["pts_time"])
+            for packet in info.get("packets", [])
+            if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+        )
+
+    async def trim(self, source_path: str, output_path: str, start_time: float, end_time: float) -> bool:
+        """Cut ``start_time``..``end_time`` into ``output_path``.
+
+        When a keyframe lies within MEDIA_TRIM_KEYFRAME_TOLERANCE_SECONDS before the start, the cut
+        starts there and the streams are copied without re-encoding; otherwise the clip is
+        re-encoded. Returns whether the streams were copied.
+        """
+        tolerance = settings.MEDIA_TRIM_KEYFRAME_TOLERANCE_SECONDS
+        keyframe = None
+        if start_time > 0:
+            keyframes = await self.keyframe_times(source_path, start_time, tolerance)
+            candidates = [t for t in keyframes if t <= start_time + 0.001]
+            if candidates and start_time - candidates[-1] <= tolerance:
+                keyframe = candidates[-1]
+        else:
+            keyframe = 0.0
+
+        extension = os.path.splitext(output_path)[1].lower()
+        if keyframe is not None:
+            codec_args = ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+            cut_start = keyframe
+        else:
+            codec_args = REENCODE_ARGS.get(extension, DEFAULT_REENCODE_ARGS)
+            cut_start = start_time
+        format_args = [] if extension else ["-f", "mp4"]
+        await self._run(
+            settings.MEDIA_FFMPEG_BINARY, "-v", "error", "-y",
+            "-ss", f"{cut_start:.3f}", "-i", source_path,
+            "-t", f"{max(end_time - cut_start, 0.001):.3f}",
+            "-map", "0:v:0", "-map", "0:a?",
+            *codec_args, *format_args,
+            output_path,
+        )
+        return keyframe is not None
+
+
+def _rotation(stream: dict[str, Any]) -> int:
+    for side_data in stream.get("side_data_list") or []:
+        if "rotation" in side_data:
+            return int(side_data["rotation"])
+    try:
+        return int((stream.get("tags") or {}).get("rotate", 0))
+    except ValueError:
+        return 0
+
+
+video_backend = FFmpegVideoBackend()
@@ -3,11 +3,17 @@ from contextlib import _AsyncGeneratorContextManager, asynccontextmanager
 from typing import Any
 
 import fastapi
+from arq import create_pool
+from arq.connections import RedisSettings
 from fastapi import APIRouter, Depends, FastAPI
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 
 from ..api.dependencies import get_current_superuser
+from ..core.services.generation_pipeline import recover_interrupted_generations
+from ..core.utils import queue
+from ..core.utils.http_client import http_clients
+from ..core.utils.process_pool import media_pool
 from ..core.utils.rate_limit import rate_limiter
 from ..middleware.client_cache_middleware import ClientCacheMiddleware
 from ..models import *  # noqa: F403
@@ -45,6 +51,19 @@ async def close_redis_rate_limit_pool() -> None:
     return  # Disabled
 
 
+# -------------------- PUBLISH QUEUE --------------------
+async def create_redis_queue_pool() -> None:
+    if not settings.PUBLISH_QUEUE_ENABLED:
+        return
+    queue.pool = await create_pool(RedisSettings(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT))
+
+
+async def close_redis_queue_pool() -> None:
+    if queue.pool:
+        await queue.pool.close()
+        queue.pool = None
+
+
 # -------------------- THREADPOOL --------------------
 import anyio
 
@@ -67,7 +86,15 @@ def lifespan_factory(
         if create_tables_on_start:
             await create_tables()
 
-        yield  # <-- important
+        await create_redis_queue_pool()
+        await recover_interrupted_generations()
+
+        try:
+            yield  # <-- important
+        finally:
+            await close_redis_queue_pool()
+            await http_clients.aclose()
+            media_pool.shutdown()
 
     return lifespan
 
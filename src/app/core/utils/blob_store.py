@@ -0,0 +1,124 @@
+import hashlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+
+from ..config import settings
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for media bytes.
+
+    Blobs are addressed by the SHA-256 of their content, so storing the same bytes twice keeps
+    one copy. Keys are opaque to callers; only the backend knows how to resolve them. All
+    methods block, so call them through ``asyncio.to_thread`` from async code.
+    """
+
+    def key_for(self, sha256: str) -> str:
+        return f"sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    def digest(self, key: str) -> str:
+        """SHA-256 of the blob stored under ``key``, without reading it."""
+        return key.rsplit("/", 1)[-1]
+
+    @abstractmethod
+    def put_file(self, source: BinaryIO, sha256: str) -> str:
+        """Store the contents of ``source`` (read from the start), whose digest the caller computed."""
+
+    @abstractmethod
+    def put_bytes(self, data: bytes) -> tuple[str, str]:
+        """Store ``data`` and return ``(key, sha256)``."""
+
+    def put_path(self, path: str) -> tuple[str, str]:
+        """Store the file at ``path`` and return ``(key, sha256)``."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(COPY_CHUNK_SIZE):
+                digest.update(chunk)
+            sha256 = digest.hexdigest()
+            return self.put_file(f, sha256), sha256
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open the blob stored under ``key`` for binary reading."""
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of the blob, for backends that have one; lets responses use sendfile."""
+        return None
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether a blob is stored under ``key``."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the blob stored under ``key``; missing blobs are ignored."""
+
+
+class LocalBlobStore(BlobStore):
+    """Blob store on the local filesystem, sharded by the first digest bytes."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _write(self, key: str, write) -> None:
+        path = self.local_path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put_file(self, source: BinaryIO, sha256: str) -> str:
+        key = self.key_for(sha256)
+
+        def copy(f: BinaryIO) -> None:
+            source.seek(0)
+            while chunk := source.read(COPY_CHUNK_SIZE):
+                f.write(chunk)
+
+        self._write(key, copy)
+        return key
+
+    def put_bytes(self, data: bytes) -> tuple[str, str]:
+        sha256 = hashlib.sha256(data).hexdigest()
+        key = self.key_for(sha256)
+        self._write(key, lambda f: f.write(data))
+        return key, sha256
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def create_blob_store() -> BlobStore:
+    if settings.MEDIA_BLOB_BACKEND == "local":
+        return LocalBlobStore(settings.MEDIA_BLOB_ROOT)
+    raise ValueError(f"Unknown MEDIA_BLOB_BACKEND: {settings.MEDIA_BLOB_BACKEND}")
+
+
+blob_store = create_blob_store()
@@ -0,0 +1,31 @@
+import asyncio
+from collections.abc import Awaitable
+from typing import TypeVar
+
+from fastapi import Request
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T], poll_interval: float = 1.0) -> T:
+    """Await ``awaitable``, cancelling it if the client disconnects first.
+
+    Used around long generation calls so an abandoned request stops holding an upstream call.
+    Raises ``ClientDisconnected`` when the work was cancelled.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ...core.logger import logging
+from ..config import settings
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientRegistry:
+    """Process-wide registry of long-lived ``httpx.AsyncClient`` instances, one per upstream host.
+
+    Reusing a client per host keeps TCP/TLS connections alive between requests instead of
+    paying a new handshake for every platform call. HTTP/2 is negotiated through ALPN when the
+    ``h2`` package is installed and silently falls back to HTTP/1.1 for hosts that do not
+    support it.
+    """
+
+    _instance: Optional["HTTPClientRegistry"] = None
+    clients: dict[str, httpx.AsyncClient]
+    loop: Optional[asyncio.AbstractEventLoop]
+    _closing: set["asyncio.Task[None]"]
+
+    def __new__(cls) -> "HTTPClientRegistry":
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.clients = {}
+            cls._instance.loop = None
+            cls._instance._closing = set()
+        return cls._instance
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlsplit(url).hostname or url).lower()
+
+    def _timeout_for(self, host: str) -> httpx.Timeout:
+        timeout = settings.HTTP_CLIENT_HOST_TIMEOUTS.get(host, settings.HTTP_CLIENT_DEFAULT_TIMEOUT)
+        return httpx.Timeout(timeout, connect=min(settings.HTTP_CLIENT_CONNECT_TIMEOUT, timeout))
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Return the pooled client for the host of ``url``, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Pooled connections are bound to the loop that opened them.
+            self._close_stale_clients(loop)
+            self.loop = loop
+
+        host = self._host(url)
+        client = self.clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE,
+                timeout=self._timeout_for(host),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self.clients[host] = client
+        return client
+
+    def _close_stale_clients(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Close the clients of the previous event loop: on that loop while it still runs, else on ``loop``."""
+        clients, self.clients = self.clients, {}
+        if not clients:
+            return
+        stale_loop = self.loop
+        if stale_loop is not None and stale_loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close_clients(clients), stale_loop)
+            return
+        task = loop.create_task(self._close_clients(clients))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_clients(clients: dict[str, httpx.AsyncClient]) -> None:
+        for host, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {host}: {e}")
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.get_client(url).request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close every pooled client. Called on application shutdown."""
+        clients, self.clients = self.clients, {}
+        await self._close_clients(clients)
+
+
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,31 @@
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from ..config import settings
+from .http_client import http_clients
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+_client: Optional[AsyncOpenAI] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Return the process-wide ``AsyncOpenAI`` client.
+
+    It sends requests through the pooled client that ``http_clients`` keeps for api.openai.com,
+    so connections are reused across generations and closed on shutdown with the rest.
+    """
+    global _client, _http_client
+    http_client = http_clients.get_client(OPENAI_BASE_URL)
+    if _client is None or _http_client is not http_client:
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+        _http_client = http_client
+    return _client
@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from ...core.logger import logging
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Credential field that identifies the upstream account/budget for each platform.
+CREDENTIAL_KEY_FIELDS = {
+    "twitter": "twitter_access_token",
+    "instagram": "ig_username",
+    "facebook": "fb_page_id",
+    "linkedin": "linkedin_author_urn",
+    "discord": "discord_webhook_url",
+    "telegram": "telegram_bot_token",
+}
+
+PLATFORM_ALIASES = {"x": "twitter"}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second, holding at most ``capacity``.
+
+    Waiters are served in arrival order: the lock is held while sleeping for the next token.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class OutboundLimiter:
+    """Concurrency cap plus request-rate budget for one platform account."""
+
+    def __init__(self, max_concurrency: int, rate: float, burst: float):
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self._bucket = TokenBucket(rate, burst)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._semaphore:
+            await self._bucket.acquire()
+            yield
+
+
+class OutboundLimiterRegistry:
+    """Limiters keyed by ``(platform, credential)``, shared by publishing and analytics fetches."""
+
+    _instance: Optional["OutboundLimiterRegistry"] = None
+    limiters: dict[tuple[str, str], OutboundLimiter]
+    loop: Optional[asyncio.AbstractEventLoop]
+
+    def __new__(cls) -> "OutboundLimiterRegistry":
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.limiters = {}
+            cls._instance.loop = None
+        return cls._instance
+
+    @staticmethod
+    def normalize_platform(platform: str) -> str:
+        platform = platform.strip().lower()
+        return PLATFORM_ALIASES.get(platform, platform)
+
+    @staticmethod
+    def credential_key(platform: str, credentials: Any) -> str:
+        """Derive a stable, non-secret key for the account behind ``credentials`` (a dict or model)."""
+        field = CREDENTIAL_KEY_FIELDS.get(platform)
+        if not field or credentials is None:
+            return ""
+        value = credentials.get(field) if isinstance(credentials, dict) else getattr(credentials, field, None)
+        if not value:
+            return ""
+        return hashlib.sha256(str(value).encode()).hexdigest()[:16]
+
+    def get(self, platform: str, credentials: Any = None) -> OutboundLimiter:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Semaphores and locks are bound to the loop they were first used on.
+            self.limiters = {}
+            self.loop = loop
+
+        platform = self.normalize_platform(platform)
+        key = (platform, self.credential_key(platform, credentials))
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            config = {
+                "concurrency": settings.OUTBOUND_RATE_LIMIT_DEFAULT_CONCURRENCY,
+                "rate": settings.OUTBOUND_RATE_LIMIT_DEFAULT_RATE,
+                "burst": settings.OUTBOUND_RATE_LIMIT_DEFAULT_BURST,
+                **settings.OUTBOUND_RATE_LIMITS.get(platform, {}),
+            }
+            limiter = OutboundLimiter(int(config["concurrency"]), float(config["rate"]), float(config["burst"]))
+            self.limiters[key] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def limit(self, platform: str, credentials: Any = None) -> AsyncIterator[None]:
+        """Wait for a concurrency slot and a rate token for this platform account, then run the block."""
+        async with self.get(platform, credentials).slot():
+            yield
+
+
+outbound_limits = OutboundLimiterRegistry()
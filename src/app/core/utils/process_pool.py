@@ -0,0 +1,47 @@
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional, TypeVar
+
+from ..config import settings
+
+T = TypeVar("T")
+
+
+class MediaProcessPool:
+    """Bounded process pool for CPU-bound media work, started on first use.
+
+    Pillow, NumPy and moviepy hold the GIL for most of their work, so running them in threads
+    would still stall the event loop; separate processes let media work scale with cores. Jobs
+    must be module-level functions and should take file paths rather than large byte strings,
+    since arguments and results are pickled between processes. Workers are spawned rather than
+    forked so they never inherit the event loop, open connections or locks of the web process.
+    """
+
+    def __init__(self) -> None:
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def max_workers(self) -> int:
+        return settings.MEDIA_PROCESS_POOL_WORKERS or os.cpu_count() or 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run ``func(*args)`` in a worker process; at most ``max_workers`` jobs run at a time."""
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+media_pool = MediaProcessPool()
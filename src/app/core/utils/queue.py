@@ -0,0 +1,4 @@
+from arq.connections import ArqRedis
+
+# Set in the application lifespan when PUBLISH_QUEUE_ENABLED; None means publish inline.
+pool: ArqRedis | None = None
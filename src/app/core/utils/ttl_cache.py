@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ...core.logger import logging
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """In-process TTL cache with request coalescing, optionally backed by Redis.
+
+    Concurrent ``get_or_load`` calls for the same key share one in-flight load (singleflight).
+    The load runs as its own task, so a caller that is cancelled does not cancel the load for
+    the others. Failed loads are not cached. When ``use_redis`` is set and the Redis cache client
+    is configured, values are also shared between processes through Redis under
+    ``<namespace>:<key>``; values must then be JSON serializable. ``on_evict(key, value)`` is
+    called whenever a value leaves process memory (expiry, LRU eviction, invalidation or
+    replacement by a different value), e.g. to delete files the value points at.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_entries: int,
+        use_redis: bool = False,
+        on_evict: Callable[[str, Any], None] | None = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+        }
+
+    def _evicted(self, key: str, value: Any) -> None:
+        if self.on_evict is None:
+            return
+        try:
+            self.on_evict(key, value)
+        except Exception as e:
+            logger.warning(f"Eviction hook for {self.namespace}:{key} failed: {e}")
+
+    def _get_local(self, key: str) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._evicted(key, value)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _set_local(self, key: str, value: Any) -> None:
+        previous = self._entries.get(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if previous is not None and previous[1] != value:
+            self._evicted(key, previous[1])
+        while len(self._entries) > self.max_entries:
+            evicted_key, (_, evicted_value) = self._entries.popitem(last=False)
+            self._evicted(evicted_key, evicted_value)
+
+    async def _get_redis(self, key: str) -> tuple[bool, Any]:
+        if not self.use_redis or cache.client is None:
+            return False, None
+        try:
+            raw = await cache.client.get(f"{self.namespace}:{key}")
+        except Exception as e:
+            logger.warning(f"Redis lookup for {self.namespace}:{key} failed: {e}")
+            return False, None
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    async def _set_redis(self, key: str, value: Any) -> None:
+        if not self.use_redis or cache.client is None:
+            return
+        try:
+            await cache.client.set(f"{self.namespace}:{key}", json.dumps(value), ex=max(int(self.ttl), 1))
+        except Exception as e:
+            logger.warning(f"Redis store for {self.namespace}:{key} failed: {e}")
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            found, value = await self._get_redis(key)
+            if not found:
+                value = await loader()
+                await self._set_redis(key, value)
+            self._set_local(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        found, value = self._get_local(key)
+        if found:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    def peek(self, key: str) -> tuple[bool, Any]:
+        """Look up ``key`` in process memory only; counts as a hit when found."""
+        found, value = self._get_local(key)
+        if found:
+            self.hits += 1
+        return found, value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value computed outside ``get_or_load``, e.g. a forced fresh result."""
+        self._set_local(key, value)
+
+    def invalidate(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._evicted(key, entry[1])
+
+    def clear(self) -> None:
+        entries, self._entries = self._entries, OrderedDict()
+        for key, (_, value) in entries.items():
+            self._evicted(key, value)
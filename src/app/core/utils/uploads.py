@@ -0,0 +1,104 @@
+import hashlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.requests import Request
+
+# Room for the multipart boundaries and the small text fields sent along with the file.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def format_size(num_bytes: int) -> str:
+    """Render a byte count for messages, e.g. 50MB, 1.5MB, 512KB or 100 bytes."""
+    for unit, factor in (("MB", 1024 * 1024), ("KB", 1024)):
+        if num_bytes >= factor:
+            return f"{round(num_bytes / factor, 1):g}{unit}"
+    return f"{num_bytes} bytes"
+
+
+class UploadTooLarge(MultiPartException):
+    """Raised while parsing; as a MultiPartException, Starlette closes the spooled files."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File too large. Maximum size is {format_size(max_bytes)}")
+        self.max_bytes = max_bytes
+
+    def __str__(self) -> str:
+        # MultiPartException keeps the text in ``message`` rather than in ``args``.
+        return self.message
+
+
+@dataclass
+class SpooledUpload:
+    """An uploaded file spooled to a temporary file, with its size and SHA-256 computed while reading."""
+
+    file: BinaryIO
+    filename: str
+    content_type: Optional[str]
+    size: int
+    sha256: str
+
+    def chunks(self, chunk_size: int) -> Iterator[bytes]:
+        self.file.seek(0)
+        while chunk := self.file.read(chunk_size):
+            yield chunk
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _HashingMultiPartParser(MultiPartParser):
+    """Multipart parser that hashes and measures file parts as they are received."""
+
+    def __init__(self, *args, max_file_bytes: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_file_bytes = max_file_bytes
+        self.file_size = 0
+        self.file_digest = hashlib.sha256()
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        super().on_part_data(data, start, end)
+        if self._current_part.file is not None:
+            self.file_size += end - start
+            if self.file_size > self.max_file_bytes:
+                raise UploadTooLarge(self.max_file_bytes)
+            self.file_digest.update(data[start:end])
+
+
+async def receive_upload(
+    request: Request,
+    max_bytes: int,
+    file_field: str = "file",
+) -> tuple[SpooledUpload, dict[str, str]]:
+    """Parse a single-file multipart upload without holding the file in memory.
+
+    The body is consumed as a stream: the file part is hashed and counted as it arrives and
+    spooled by Starlette (in memory up to 1 MB, then on disk). The upload is rejected with
+    ``UploadTooLarge`` as soon as the declared length or the received file exceeds ``max_bytes``,
+    without reading the rest. Returns the upload and the form's text fields.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLarge(max_bytes)
+
+    parser = _HashingMultiPartParser(
+        request.headers, request.stream(), max_files=1, max_fields=20, max_file_bytes=max_bytes
+    )
+    form = await parser.parse()
+    upload = form.get(file_field)
+    if not isinstance(upload, UploadFile) or not upload.filename:
+        await form.close()
+        raise ValueError("No file provided")
+
+    fields = {key: value for key, value in form.multi_items() if isinstance(value, str)}
+    spooled = SpooledUpload(
+        file=upload.file,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        size=parser.file_size,
+        sha256=parser.file_digest.hexdigest(),
+    )
+    return spooled, fields
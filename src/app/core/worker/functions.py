@@ -2,10 +2,16 @@ import asyncio
 import logging
 
 import uvloop
+from arq import Retry
 from arq.worker import Worker
 
-from src.app.core.scheduler import scheduler
-from src.app.core.db.database import async_get_db
+from src.app.core.config import settings
+from src.app.core.db.database import local_session
+from src.app.core.scheduler import process_due_scheduled_posts_async
+from src.app.core.services.generation_pipeline import run_bulk_generation, run_project_generation
+from src.app.core.services.project_publishing import publish_project as publish_project_now
+from src.app.core.utils.http_client import http_clients
+from src.app.models import Project
 
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
@@ -24,18 +30,63 @@ async def startup(ctx: Worker) -> None:
 
 
 async def shutdown(ctx: Worker) -> None:
+    await http_clients.aclose()
     logging.info("Worker end")
 
 
+# -------- publishing --------
+# How long a publish job remembers which platforms already accepted its post.
+PUBLISHED_PLATFORMS_TTL_SECONDS = 24 * 60 * 60
+
+
+async def publish_project(ctx: Worker, project_id: int) -> dict:
+    """Publish a project to its platforms.
+
+    Retried with linear backoff while no platform has accepted the post yet. A partial
+    success is final. Each platform that accepts the post is recorded in Redis under the
+    job id, so a try that was cancelled or retried mid-publish skips those platforms. The
+    job id is reused by later posts of the same project, so the first try starts afresh.
+    """
+    job_try = ctx.get("job_try", 1)
+    redis = ctx["redis"]
+    published_key = f"publish-job:{ctx['job_id']}:published"
+    if job_try == 1:
+        await redis.delete(published_key)
+    already_published = {platform.decode() for platform in await redis.smembers(published_key)}
+
+    async def record_published(platform: str) -> None:
+        await redis.sadd(published_key, platform)
+        await redis.expire(published_key, PUBLISHED_PLATFORMS_TTL_SECONDS)
+
+    async with local_session() as db:
+        project = await db.get(Project, project_id)
+        if project is None:
+            logging.warning(f"[WORKER] Project {project_id} no longer exists, dropping publish job")
+            return {"status": "failure", "error": "Project not found"}
+        results = await publish_project_now(db, project, already_published, on_published=record_published)
+
+    if not results.get("successful_platforms") and job_try < settings.PUBLISH_JOB_MAX_TRIES:
+        defer = job_try * settings.PUBLISH_JOB_RETRY_BACKOFF_SECONDS
+        logging.warning(f"[WORKER] Publishing project {project_id} failed on try {job_try}, retrying in {defer}s")
+        raise Retry(defer=defer)
+    return results
+
+
+# -------- content generation --------
+async def generate_project(ctx: Worker, project_id: int, force_fresh: bool = False) -> dict:
+    """Generate text and image for a project created in the ``Generating`` status."""
+    return await run_project_generation(project_id, force_fresh)
+
+
+async def generate_projects(ctx: Worker, project_ids: list[int], force_fresh: bool = False) -> dict:
+    """Generate content for a batch of projects created through the bulk endpoint."""
+    return await run_bulk_generation(project_ids, force_fresh)
+
+
 # -------- periodic scheduled post processor --------
 async def process_due_scheduled_posts(ctx: Worker) -> None:
-    """Periodically checks for due scheduled posts and executes them."""
-    async for db in async_get_db():
-        pending_posts = await scheduler.get_pending_scheduled_posts(db)
-        for scheduled_post in pending_posts:
-            platforms = scheduled_post.platforms.split(',')
-            try:
-                await scheduler.execute_scheduled_post(scheduled_post.post_id, platforms, db)
-                logging.info(f"[SCHEDULER] Executed scheduled post {scheduled_post.post_id} for platforms {platforms}")
-            except Exception as e:
-                logging.error(f"[SCHEDULER] Failed to execute scheduled post {scheduled_post.post_id}: {e}")
+    """Periodically claims and executes due scheduled posts.
+
+    Uses the same lease-based claiming as the in-app scheduler, so it can run alongside it.
+    """
+    await process_due_scheduled_posts_async()
@@ -0,0 +1,40 @@
+from arq.connections import RedisSettings
+from arq.worker import func
+
+from ...core.config import settings
+from .functions import (
+    generate_project,
+    generate_projects,
+    process_due_scheduled_posts,
+    publish_project,
+    sample_background_task,
+    shutdown,
+    startup,
+)
+
+REDIS_QUEUE_HOST = settings.REDIS_QUEUE_HOST
+REDIS_QUEUE_PORT = settings.REDIS_QUEUE_PORT
+
+# A publishing job cancelled mid-publish is retried (or its leases reclaimed) and would post twice.
+PUBLISH_JOB_TIMEOUT = max(settings.PUBLISH_JOB_TIMEOUT_SECONDS, settings.SCHEDULER_LEASE_SECONDS)
+SCHEDULER_JOB_TIMEOUT = max(settings.SCHEDULER_JOB_TIMEOUT_SECONDS, settings.SCHEDULER_LEASE_SECONDS)
+
+
+class WorkerSettings:
+    functions = [
+        sample_background_task,
+        func(process_due_scheduled_posts, timeout=SCHEDULER_JOB_TIMEOUT),
+        func(
+            publish_project,
+            max_tries=settings.PUBLISH_JOB_MAX_TRIES,
+            timeout=PUBLISH_JOB_TIMEOUT,
+            keep_result=settings.PUBLISH_JOB_KEEP_RESULT_SECONDS,
+        ),
+        # No kept result: its job id is fixed per project and must be reusable for a retry.
+        func(generate_project, keep_result=0),
+        func(generate_projects, timeout=settings.BULK_GENERATION_JOB_TIMEOUT_SECONDS),
+    ]
+    redis_settings = RedisSettings(host=REDIS_QUEUE_HOST, port=REDIS_QUEUE_PORT)
+    on_startup = startup
+    on_shutdown = shutdown
+    handle_signals = False
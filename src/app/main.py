@@ -30,7 +30,7 @@ from .api.v1.posts import router as posts_router
 from .api.v1 import router as api_v1_router
 from .templates import templates
 from .api.dependencies import get_current_user, get_optional_user
-from .core.scheduler import schedule_apscheduler_job
+from .core.scheduler import schedule_apscheduler_job, stop_apscheduler_job
 from .api.v1 import project, scheduled_tasks, users
 from .api.v1 import media
 from .api.v1 import notifications
@@ -62,6 +62,7 @@ async def lifespan_with_admin(app: FastAPI) -> AsyncGenerator[None, None]:
         # print("[APScheduler] Starting scheduler in lifespan event")
         schedule_apscheduler_job(app)
         yield
+        stop_apscheduler_job(app)
 
 
 app = create_application(router=router, settings=settings, lifespan=lifespan_with_admin)
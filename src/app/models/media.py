@@ -37,8 +37,9 @@ class MediaFile(Base):
     file_type: Mapped[str] = mapped_column(String(50), nullable=False)  # image/video
     mime_type: Mapped[str] = mapped_column(String(100), nullable=False)
     
-    # Database storage fields
-    file_data: Mapped[str] = mapped_column(Text, nullable=False)  # Base64 encoded file data
+    # File bytes live in the blob store (core/utils/blob_store.py), addressed by content hash
+    content_sha256: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    storage_key: Mapped[str] = mapped_column(String(255), nullable=False)
     file_size: Mapped[int] = mapped_column(Integer, nullable=False)  # in bytes
     
     # Media properties
@@ -46,12 +47,17 @@ class MediaFile(Base):
     height: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # for videos, in seconds
     
-    # Thumbnail (also stored in DB)
-    thumbnail_data: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Base64 encoded thumbnail
+    # Thumbnail (also in the blob store)
+    # Default JPEG thumbnail, plus every stored size per format: {"webp": {"300": key}, "jpeg": {...}}
+    thumbnail_storage_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     thumbnail_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    thumbnail_keys: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
+    # Hash of the original's digest plus its MediaEdit chain; null while unedited. Names the cached render.
+    edit_chain_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     
-    # Metadata
-    file_metadata: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # EXIF, etc.
+    # Metadata; deferred since it is unbounded and only needed when asked for (undefer() to load it)
+    file_metadata: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, deferred=True)  # EXIF, etc.
     tags: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # Store tags as JSON
     
     # Timestamps
@@ -110,7 +116,7 @@ class ProjectMedia(Base):
     project: Mapped["Project"] = relationship("Project")
 
 class MediaEdit(Base):
-    """Store media editing operations and their results"""
+    """One operation in a media file's edit chain, applied in id order on top of the untouched original"""
     __tablename__ = "media_edits"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True, init=False)
@@ -119,11 +125,12 @@ class MediaEdit(Base):
     # Edit information
     edit_type: Mapped[str] = mapped_column(String(50), nullable=False)  # crop, resize, filter, etc.
     edit_params: Mapped[dict] = mapped_column(JSON, nullable=False)  # Store edit parameters
-    original_file_data: Mapped[str] = mapped_column(Text, nullable=False)
-    edited_file_data: Mapped[str] = mapped_column(Text, nullable=False)
     
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    media_file: Mapped["MediaFile"] = relationship("MediaFile", back_populates="edits") 
\ No newline at end of file
+    media_file: Mapped["MediaFile"] = relationship("MediaFile", back_populates="edits")
+
+    # Edits made before edit chains were written into the stored file itself; kept as history but never replayed
+    baked_in: Mapped[bool] = mapped_column(Boolean, default=False)
\ No newline at end of file
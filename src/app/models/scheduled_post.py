@@ -1,4 +1,4 @@
-from sqlalchemy import String, DateTime, Text, ForeignKey
+from sqlalchemy import String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
@@ -10,6 +10,7 @@ if TYPE_CHECKING:
 
 class ScheduledPost(Base):
     __tablename__ = "scheduled_posts"
+    __table_args__ = (Index("ix_scheduled_posts_status_scheduled_time", "status", "scheduled_time"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True, init=False)
     post_id: Mapped[Optional[int]] = mapped_column(ForeignKey("post.id"), nullable=True)
@@ -20,5 +21,7 @@ class ScheduledPost(Base):
     status: Mapped[str] = mapped_column(String(50), default="scheduled")  # scheduled, executing, completed, failed
     executed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=None)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True, default=None)
+    claimed_by: Mapped[str | None] = mapped_column(String(255), nullable=True, default=None)  # worker holding the lease
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, default=None)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
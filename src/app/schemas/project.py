@@ -0,0 +1,29 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class BulkProjectSpec(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    topic: str = Field(..., min_length=1)
+    content_type: str = Field(..., min_length=1, max_length=255)
+    with_image: bool = False
+    platforms: list[str] = Field(
+        ..., min_length=1, description="Platforms to post to, as on the create form (e.g. X, facebook)"
+    )
+    credentials_from_project_id: Optional[int] = Field(
+        default=None, description="Copy the credentials of these platforms from one of your existing projects"
+    )
+
+    @field_validator("platforms", mode="before")
+    @classmethod
+    def split_platforms(cls, value):
+        # CSV cells hold the platforms as "X;facebook" or "X|facebook"
+        if isinstance(value, str):
+            value = value.replace("|", ";").replace(",", ";").split(";")
+        return [p.strip() for p in value if p and p.strip()]
+
+
+class BulkProjectCreate(BaseModel):
+    projects: list[dict]
+    force_fresh: bool = False
@@ -0,0 +1,32 @@
+"""Add lease columns to scheduled_posts
+
+Revision ID: 6f2b8c4d1a93
+Revises: d1e958ee0e3e
+Create Date: 2026-10-16 09:12:44.318205
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2b8c4d1a93'
+down_revision: Union[str, None] = 'd1e958ee0e3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scheduled_posts', sa.Column('claimed_by', sa.String(length=255), nullable=True))
+    op.add_column('scheduled_posts', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_scheduled_posts_status_scheduled_time', 'scheduled_posts', ['status', 'scheduled_time'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scheduled_posts_status_scheduled_time', table_name='scheduled_posts')
+    op.drop_column('scheduled_posts', 'lease_expires_at')
+    op.drop_column('scheduled_posts', 'claimed_by')
@@ -0,0 +1,89 @@
+"""Move media file bytes out of the database into the blob store
+
+Revision ID: 9c4e1f7a2b65
+Revises: 6f2b8c4d1a93
+Create Date: 2026-10-16 21:34:08.512907
+
+The base64 ``file_data`` / ``thumbnail_data`` of every media file is decoded and written to the
+configured blob store (MEDIA_BLOB_ROOT for the local backend, relative to the working directory,
+so run this from where the app runs or set an absolute path). Rows are copied one at a time so
+only a single file is held in memory.
+"""
+import base64
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core.utils.blob_store import blob_store
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1f7a2b65'
+down_revision: Union[str, None] = '6f2b8c4d1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+media_files = sa.table(
+    'media_files',
+    sa.column('id', sa.Integer),
+    sa.column('file_data', sa.Text),
+    sa.column('thumbnail_data', sa.Text),
+    sa.column('content_sha256', sa.String),
+    sa.column('storage_key', sa.String),
+    sa.column('thumbnail_storage_key', sa.String),
+)
+
+
+def upgrade() -> None:
+    op.add_column('media_files', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.add_column('media_files', sa.Column('storage_key', sa.String(length=255), nullable=True))
+    op.add_column('media_files', sa.Column('thumbnail_storage_key', sa.String(length=255), nullable=True))
+
+    bind = op.get_bind()
+    ids = bind.execute(sa.select(media_files.c.id).order_by(media_files.c.id)).scalars().all()
+    for media_file_id in ids:
+        row = bind.execute(
+            sa.select(media_files.c.file_data, media_files.c.thumbnail_data).where(media_files.c.id == media_file_id)
+        ).one()
+        key, digest = blob_store.put_bytes(base64.b64decode(row.file_data))
+        thumbnail_key = blob_store.put_bytes(base64.b64decode(row.thumbnail_data))[0] if row.thumbnail_data else None
+        bind.execute(
+            media_files.update()
+            .where(media_files.c.id == media_file_id)
+            .values(content_sha256=digest, storage_key=key, thumbnail_storage_key=thumbnail_key)
+        )
+
+    op.alter_column('media_files', 'content_sha256', nullable=False)
+    op.alter_column('media_files', 'storage_key', nullable=False)
+    op.create_index(op.f('ix_media_files_content_sha256'), 'media_files', ['content_sha256'], unique=False)
+    op.drop_column('media_files', 'thumbnail_data')
+    op.drop_column('media_files', 'file_data')
+
+
+def downgrade() -> None:
+    op.add_column('media_files', sa.Column('file_data', sa.Text(), nullable=True))
+    op.add_column('media_files', sa.Column('thumbnail_data', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(media_files.c.id, media_files.c.storage_key, media_files.c.thumbnail_storage_key)
+        .order_by(media_files.c.id)
+    ).all()
+    for row in rows:
+        file_data = base64.b64encode(blob_store.read(row.storage_key)).decode('utf-8')
+        thumbnail_data = None
+        if row.thumbnail_storage_key and blob_store.exists(row.thumbnail_storage_key):
+            thumbnail_data = base64.b64encode(blob_store.read(row.thumbnail_storage_key)).decode('utf-8')
+        bind.execute(
+            media_files.update()
+            .where(media_files.c.id == row.id)
+            .values(file_data=file_data, thumbnail_data=thumbnail_data)
+        )
+
+    op.alter_column('media_files', 'file_data', nullable=False)
+    op.drop_index(op.f('ix_media_files_content_sha256'), table_name='media_files')
+    op.drop_column('media_files', 'thumbnail_storage_key')
+    op.drop_column('media_files', 'storage_key')
+    op.drop_column('media_files', 'content_sha256')
@@ -0,0 +1,27 @@
+"""Add thumbnail_keys to media_files
+
+Revision ID: b7d3e5f1c8a2
+Revises: 9c4e1f7a2b65
+Create Date: 2026-10-16 23:05:17.640931
+
+Existing rows keep their single JPEG thumbnail (thumbnail_storage_key) until re-uploaded.
+"""
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e5f1c8a2'
+down_revision: Union[str, None] = '9c4e1f7a2b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('media_files', sa.Column('thumbnail_keys', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('media_files', 'thumbnail_keys')
@@ -0,0 +1,42 @@
+"""Add media edit chains
+
+Revision ID: e4a9c2d7f310
+Revises: b7d3e5f1c8a2
+Create Date: 2026-10-17 00:41:52.207364
+
+Edits become an operation list on top of the untouched original, so media_edits no longer
+keeps file snapshots; renders are cached on disk under media_files.edit_chain_hash.
+
+Existing edits were already written over their stored files, so they are kept as history with
+media_edits.baked_in set and are never replayed or undone. Their before/after snapshots
+(original_file_data, edited_file_data) are dropped and do not come back on downgrade.
+"""
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c2d7f310'
+down_revision: Union[str, None] = 'b7d3e5f1c8a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('media_files', sa.Column('edit_chain_hash', sa.String(length=64), nullable=True))
+    op.add_column('media_edits', sa.Column('baked_in', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # Earlier edits were written over the stored file already; replaying them would apply them twice.
+    op.execute("UPDATE media_edits SET baked_in = true")
+    op.drop_column('media_edits', 'edited_file_data')
+    op.drop_column('media_edits', 'original_file_data')
+
+
+def downgrade() -> None:
+    op.add_column('media_edits', sa.Column('original_file_data', sa.Text(), nullable=True))
+    op.add_column('media_edits', sa.Column('edited_file_data', sa.Text(), nullable=True))
+    # Edits made on top of an original cannot be expressed as snapshots; keep only the baked-in ones.
+    op.execute("DELETE FROM media_edits WHERE NOT baked_in")
+    op.drop_column('media_edits', 'baked_in')
+    op.drop_column('media_files', 'edit_chain_hash')
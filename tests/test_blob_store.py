@@ -0,0 +1,61 @@
+"""Unit tests for the content-addressed blob store."""
+
+import hashlib
+import io
+
+import pytest
+
+from src.app.core.utils.blob_store import BlobStore, LocalBlobStore
+
+
+class TestLocalBlobStore:
+    """Test content addressing, deduplication and deletion."""
+
+    def test_blobs_are_addressed_by_content(self, tmp_path):
+        """Keys derive from the SHA-256, and the bytes read back unchanged."""
+        store = LocalBlobStore(str(tmp_path))
+        data = b"media bytes"
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        key, digest = store.put_bytes(data)
+        assert digest == sha256
+        assert key == f"sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+        assert store.digest(key) == sha256
+        assert store.read(key) == data
+        assert store.local_path(key) == str(tmp_path.joinpath("sha256", sha256[:2], sha256[2:4], sha256))
+
+    def test_identical_content_is_stored_once(self, tmp_path):
+        """Storing the same bytes through any entry point yields one blob under one key."""
+        store = LocalBlobStore(str(tmp_path))
+        data = b"x" * 3000
+        path = tmp_path / "upload.bin"
+        path.write_bytes(data)
+
+        key, sha256 = store.put_bytes(data)
+        assert store.put_path(str(path)) == (key, sha256)
+        assert store.put_file(io.BytesIO(data), sha256) == key
+        assert len([p for p in tmp_path.rglob("*") if p.is_file() and p != path]) == 1
+
+    def test_delete_removes_blob_and_ignores_missing(self, tmp_path):
+        """A deleted blob no longer exists, and deleting it again is harmless."""
+        store = LocalBlobStore(str(tmp_path))
+        key, _ = store.put_bytes(b"to delete")
+        assert store.exists(key)
+
+        store.delete(key)
+        assert not store.exists(key)
+        store.delete(key)
+
+    def test_a_deleted_blob_is_written_again(self, tmp_path):
+        """Re-storing content after its blob was released recreates the file."""
+        store = LocalBlobStore(str(tmp_path))
+        key, sha256 = store.put_bytes(b"shared content")
+        store.delete(key)
+
+        assert store.put_file(io.BytesIO(b"shared content"), sha256) == key
+        assert store.read(key) == b"shared content"
+
+
+def test_blob_store_is_abstract():
+    with pytest.raises(TypeError):
+        BlobStore()
@@ -0,0 +1,104 @@
+"""Unit tests for edit chains and the on-disk render cache."""
+
+import asyncio
+import os
+
+import pytest
+
+from src.app.core.services.media_renders import MediaRenderCache, edit_chain_hash
+from src.app.core.services.media_transforms import fuse_trims, image_operation_size
+
+SHA256 = "a" * 64
+
+
+def write_render(cache: MediaRenderCache, chain_hash: str, size: int, last_used: float) -> str:
+    directory = cache.render_dir(chain_hash)
+    os.makedirs(directory)
+    with open(os.path.join(directory, "render.jpg"), "wb") as f:
+        f.write(b"x" * size)
+    os.utime(directory, (last_used, last_used))
+    return directory
+
+
+class TestEditChain:
+    """Test edit-chain identity and how edits compose without rendering."""
+
+    def test_edit_chain_hash(self):
+        """The hash depends on the original and on the operations in order, not on key order."""
+        crop = ("crop", {"left": 10, "top": 0, "right": 100, "bottom": 50})
+        blur = ("filter", {"filter_type": "blur"})
+
+        assert edit_chain_hash(SHA256, [crop, blur]) == edit_chain_hash(
+            SHA256, [("crop", {"bottom": 50, "right": 100, "top": 0, "left": 10}), blur]
+        )
+        assert edit_chain_hash(SHA256, [crop, blur]) != edit_chain_hash(SHA256, [blur, crop])
+        assert edit_chain_hash(SHA256, [crop]) != edit_chain_hash("b" * 64, [crop])
+
+    def test_image_operation_size(self):
+        """Crops and resizes change the size; other operations keep it."""
+        assert image_operation_size((200, 100), "crop", {"left": 10, "top": 20, "right": 110}) == (100, 80)
+        assert image_operation_size((200, 100), "resize", {"width": 50}) == (50, 100)
+        assert image_operation_size((200, 100), "brightness", {"factor": 1.5}) == (200, 100)
+
+    def test_fuse_trims(self):
+        """Each trim is relative to the previous one and cannot extend past it."""
+        assert fuse_trims([("trim", {"start_time": 10, "end_time": 40})]) == (10.0, 40.0)
+        assert fuse_trims([
+            ("trim", {"start_time": 10, "end_time": 40}),
+            ("trim", {"start_time": 5, "end_time": 50}),
+        ]) == (15.0, 40.0)
+        with pytest.raises(ValueError):
+            fuse_trims([("crop", {})])
+
+
+class TestMediaRenderCache:
+    """Test render locking, discarding and size-bounded pruning."""
+
+    @pytest.mark.asyncio
+    async def test_lock_is_shared_until_the_last_waiter_is_done(self, tmp_path):
+        """A newcomer waits on the same lock as queued waiters, so renders never overlap."""
+        cache = MediaRenderCache(str(tmp_path), max_bytes=1024)
+        active = 0
+        overlapped = False
+
+        async def render():
+            nonlocal active, overlapped
+            async with cache.lock(SHA256):
+                active += 1
+                overlapped = overlapped or active > 1
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        first = [asyncio.create_task(render()) for _ in range(2)]
+        await asyncio.sleep(0.015)  # the first holder has released; the second is running
+        await asyncio.gather(*first, render())
+
+        assert not overlapped
+        assert not cache._locks
+
+    def test_load_and_discard(self, tmp_path):
+        cache = MediaRenderCache(str(tmp_path), max_bytes=1024)
+        directory = write_render(cache, SHA256, 10, last_used=0)
+
+        render = cache.load(SHA256)
+        assert render.path == os.path.join(directory, "render.jpg")
+        assert os.path.getmtime(directory) > 0  # loading marks the render as used
+
+        cache.discard(SHA256)
+        assert cache.load(SHA256) is None
+        cache.discard(SHA256)
+
+    def test_prune_removes_least_recently_used_renders(self, tmp_path):
+        """Oldest renders go first until the cache fits; the kept render always stays."""
+        cache = MediaRenderCache(str(tmp_path), max_bytes=250)
+        oldest = write_render(cache, "1" * 64, 100, last_used=1000)
+        kept = write_render(cache, "2" * 64, 100, last_used=2000)
+        older = write_render(cache, "3" * 64, 100, last_used=3000)
+        newest = write_render(cache, "4" * 64, 100, last_used=4000)
+
+        cache.prune(keep="2" * 64)
+
+        assert not os.path.exists(oldest)
+        assert not os.path.exists(older)
+        assert os.path.exists(kept)
+        assert os.path.exists(newest)
@@ -0,0 +1,96 @@
+"""Unit tests for the media endpoints' ETag and conditional GET helpers."""
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from src.app.api.v1.media import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    _cache_headers,
+    _content_version,
+    _is_not_modified,
+    _last_modified,
+    _requested_thumbnail,
+    _select_thumbnail,
+)
+from src.app.core.config import settings
+from src.app.core.services.media_management import nearest_thumbnail_size
+
+
+def make_request(**headers: str) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+MODIFIED = datetime(2026, 10, 1, 12, 0, 0, tzinfo=UTC)
+
+
+class TestConditionalGet:
+    """Test If-None-Match and If-Modified-Since evaluation."""
+
+    def test_if_none_match(self):
+        """Any listed tag, weak or strong, or * matches; other tags do not."""
+        assert _is_not_modified(make_request(if_none_match='"abc"'), '"abc"', None)
+        assert _is_not_modified(make_request(if_none_match='"x", W/"abc"'), '"abc"', None)
+        assert _is_not_modified(make_request(if_none_match="*"), '"abc"', None)
+        assert not _is_not_modified(make_request(if_none_match='"other"'), '"abc"', None)
+
+    def test_if_none_match_takes_precedence_over_if_modified_since(self):
+        request = make_request(if_none_match='"other"', if_modified_since="Thu, 01 Oct 2026 13:00:00 GMT")
+        assert not _is_not_modified(request, '"abc"', MODIFIED)
+
+    def test_if_modified_since(self):
+        """Unmodified since the given date is a 304; invalid or older dates are not."""
+        assert _is_not_modified(make_request(if_modified_since="Thu, 01 Oct 2026 12:00:00 GMT"), '"abc"', MODIFIED)
+        assert not _is_not_modified(make_request(if_modified_since="Thu, 01 Oct 2026 11:59:59 GMT"), '"abc"', MODIFIED)
+        assert not _is_not_modified(make_request(if_modified_since="not a date"), '"abc"', MODIFIED)
+        assert not _is_not_modified(make_request(), '"abc"', MODIFIED)
+
+
+class TestCacheHeaders:
+    """Test ETag, Cache-Control and Last-Modified headers."""
+
+    def test_versioned_and_unversioned_responses(self):
+        immutable = _cache_headers('"abc"', MODIFIED, immutable=True, vary="Accept")
+        assert immutable == {
+            "ETag": '"abc"',
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "Last-Modified": "Thu, 01 Oct 2026 12:00:00 GMT",
+            "Vary": "Accept",
+        }
+        revalidate = _cache_headers('"abc"', None, immutable=False)
+        assert revalidate == {"ETag": '"abc"', "Cache-Control": REVALIDATE_CACHE_CONTROL}
+
+    def test_content_version_and_last_modified(self):
+        """Edited files are versioned by their chain; naive timestamps are UTC without microseconds."""
+        media_file = SimpleNamespace(
+            content_sha256="a" * 64,
+            edit_chain_hash=None,
+            created_at=datetime(2026, 10, 1, 12, 0, 0, 123456),
+            updated_at=None,
+        )
+        assert _content_version(media_file) == "a" * 16
+        assert _last_modified(media_file) == MODIFIED
+
+        media_file.edit_chain_hash = "b" * 64
+        assert _content_version(media_file) == "b" * 16
+
+
+class TestThumbnailSelection:
+    """Test thumbnail format negotiation and size selection."""
+
+    def test_requested_thumbnail_is_known_before_rendering(self):
+        fmt, size, negotiated = _requested_thumbnail(make_request(accept="image/webp,*/*"), None, None)
+        assert (fmt, negotiated) == ("webp", True)
+        assert size == nearest_thumbnail_size(settings.MEDIA_THUMBNAIL_SIZES, settings.MEDIA_THUMBNAIL_DEFAULT_SIZE)
+        assert _requested_thumbnail(make_request(accept="image/webp"), 1, "jpeg") == (
+            "jpeg", min(settings.MEDIA_THUMBNAIL_SIZES), False
+        )
+
+    def test_select_thumbnail_falls_back_to_stored_formats(self):
+        variants = {"jpeg": {"150": "k150", "300": "k300"}}
+        assert _select_thumbnail(make_request(accept="image/webp"), variants, 200, None) == ("k300", "jpeg", True)
+        assert _select_thumbnail(make_request(), variants, 1000, "jpeg") == ("k300", "jpeg", False)
+        assert _select_thumbnail(make_request(), {}, None, None) is None
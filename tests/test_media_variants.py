@@ -0,0 +1,45 @@
+"""Unit tests for cached platform upload variants."""
+
+import os
+
+from PIL import Image
+
+from src.app.core.services.media_variants import PLATFORM_VARIANTS, MediaVariantService
+
+
+def write_image(path, size=(1600, 1200)) -> str:
+    Image.new("RGB", size, (200, 40, 40)).save(path, "PNG")
+    return str(path)
+
+
+class TestMediaVariantService:
+    """Test variant preparation and the size-bounded cache."""
+
+    def test_variants_are_prepared_once_per_spec(self, tmp_path):
+        """Platforms sharing a spec share a file, and no temporary files are left behind."""
+        service = MediaVariantService(str(tmp_path / "variants"), max_bytes=100 * 1024 * 1024)
+        source = write_image(tmp_path / "source.png")
+
+        paths = service.prepare(source, ["Twitter", "x", "instagram", "unknown"])
+        assert set(paths) == {"twitter", "x", "instagram"}
+        assert paths["twitter"] == paths["x"]
+        with Image.open(paths["instagram"]) as variant:
+            assert variant.format == "JPEG"
+            assert max(variant.size) == PLATFORM_VARIANTS["instagram"].max_size[0]
+        assert sorted(os.listdir(tmp_path / "variants")) == sorted({os.path.basename(p) for p in paths.values()})
+
+        assert service.prepare(source, ["twitter"]) == {"twitter": paths["twitter"]}
+
+    def test_prune_removes_least_recently_used_variants(self, tmp_path):
+        """Oldest variants go first until the cache fits; kept variants always stay."""
+        service = MediaVariantService(str(tmp_path), max_bytes=250)
+        files = []
+        for i, last_used in enumerate((1000, 2000, 3000, 4000)):
+            path = tmp_path / f"variant{i}.jpg"
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (last_used, last_used))
+            files.append(path)
+
+        service.prune(keep={str(files[1])})
+
+        assert [path.exists() for path in files] == [False, True, False, True]
@@ -0,0 +1,57 @@
+"""Unit tests for outbound platform rate limiting."""
+
+import asyncio
+import time
+
+import pytest
+
+from src.app.core.utils.outbound_limit import OutboundLimiter, OutboundLimiterRegistry, TokenBucket
+
+
+class TestTokenBucket:
+    """Test token bucket pacing."""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_waits_for_refill(self):
+        """Requests beyond the burst wait for tokens instead of failing."""
+        bucket = TokenBucket(rate=20.0, capacity=2)
+
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        elapsed = time.monotonic() - start
+
+        # Two tokens are available immediately, the other two refill at 20/s.
+        assert elapsed >= 0.09
+
+
+class TestOutboundLimiter:
+    """Test concurrency cap and limiter registry."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self):
+        """No more than max_concurrency calls run at once."""
+        limiter = OutboundLimiter(max_concurrency=2, rate=0, burst=1)
+        running = 0
+        peak = 0
+
+        async def call():
+            nonlocal running, peak
+            async with limiter.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[call() for _ in range(6)])
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_limiters_are_shared_per_platform_account(self):
+        """The same account shares one limiter; aliases map onto the canonical platform."""
+        registry = OutboundLimiterRegistry()
+
+        first = registry.get("twitter", {"twitter_access_token": "token-a"})
+        assert registry.get("X", {"twitter_access_token": "token-a"}) is first
+        assert registry.get("twitter", {"twitter_access_token": "token-b"}) is not first
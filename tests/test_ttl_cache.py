@@ -0,0 +1,63 @@
+"""Unit tests for the async TTL cache."""
+
+import asyncio
+
+import pytest
+
+from src.app.core.utils.ttl_cache import AsyncTTLCache
+
+
+class TestAsyncTTLCache:
+    """Test caching, expiry and request coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_load(self):
+        """Callers asking for the same key while it loads wait for the same result."""
+        cache = AsyncTTLCache("test", ttl=60, max_entries=10)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*[cache.get_or_load("key", loader) for _ in range(5)])
+        assert results == ["value"] * 5
+        assert calls == 1
+
+        assert await cache.get_or_load("key", loader) == "value"
+        assert cache.stats() == {"hits": 1, "misses": 1, "coalesced": 4, "entries": 1}
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_and_errors_are_reloaded(self):
+        """Entries past their TTL are loaded again, and failed loads are not cached."""
+        cache = AsyncTTLCache("test", ttl=0.01, max_entries=10)
+        values = iter(["first", "second"])
+
+        async def loader():
+            return next(values)
+
+        async def failing_loader():
+            raise RuntimeError("upstream down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("key", failing_loader)
+        assert await cache.get_or_load("key", loader) == "first"
+        await asyncio.sleep(0.02)
+        assert await cache.get_or_load("key", loader) == "second"
+
+    @pytest.mark.asyncio
+    async def test_evicted_values_are_passed_to_the_hook(self):
+        """LRU eviction and replacement report the dropped value; re-storing the same value does not."""
+        evicted = []
+        cache = AsyncTTLCache("test", ttl=60, max_entries=2, on_evict=lambda key, value: evicted.append((key, value)))
+
+        cache.put("a", "path-a")
+        cache.put("b", "path-b")
+        cache.put("a", "path-a")
+        cache.put("c", "path-c")
+        assert evicted == [("b", "path-b")]
+
+        cache.put("a", "path-a2")
+        assert evicted == [("b", "path-b"), ("a", "path-a")]
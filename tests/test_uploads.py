@@ -0,0 +1,75 @@
+"""Unit tests for streamed multipart uploads."""
+
+import hashlib
+
+import pytest
+from starlette.formparsers import MultiPartException
+from starlette.requests import Request
+
+from src.app.core.utils.uploads import UploadTooLarge, format_size, receive_upload
+
+BOUNDARY = "test-boundary"
+
+
+def multipart_request(file_bytes: bytes, chunk_size: int = 1024, declare_length: bool = True) -> Request:
+    body = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="title"\r\n\r\n'
+        "Holiday\r\n"
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="photo.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + file_bytes + f"\r\n--{BOUNDARY}--\r\n".encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if declare_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+class TestReceiveUpload:
+    """Test incremental hashing and size limits."""
+
+    @pytest.mark.asyncio
+    async def test_file_is_hashed_and_measured_while_streaming(self):
+        """Size and SHA-256 are computed from the streamed parts, and text fields are returned."""
+        file_bytes = bytes(range(256)) * 40
+        upload, fields = await receive_upload(multipart_request(file_bytes), max_bytes=1024 * 1024)
+        try:
+            assert fields == {"title": "Holiday"}
+            assert upload.filename == "photo.jpg"
+            assert upload.content_type == "image/jpeg"
+            assert upload.size == len(file_bytes)
+            assert upload.sha256 == hashlib.sha256(file_bytes).hexdigest()
+            assert b"".join(upload.chunks(1000)) == file_bytes
+        finally:
+            upload.close()
+
+    @pytest.mark.asyncio
+    async def test_oversized_file_is_rejected_while_parsing(self):
+        """A file over the limit fails mid-stream even when no Content-Length is declared."""
+        request = multipart_request(b"x" * 5000, declare_length=False)
+        with pytest.raises(UploadTooLarge) as excinfo:
+            await receive_upload(request, max_bytes=2048)
+        # Starlette closes the spooled files only for MultiPartException.
+        assert isinstance(excinfo.value, MultiPartException)
+        assert "2KB" in str(excinfo.value)
+
+    @pytest.mark.asyncio
+    async def test_declared_length_over_limit_is_rejected_up_front(self):
+        """A Content-Length far over the limit is refused before the body is read."""
+        request = multipart_request(b"x" * 200 * 1024)
+        with pytest.raises(UploadTooLarge):
+            await receive_upload(request, max_bytes=1024)
+
+
+def test_format_size():
+    assert format_size(50 * 1024 * 1024) == "50MB"
+    assert format_size(1536 * 1024) == "1.5MB"
+    assert format_size(512 * 1024) == "512KB"
+    assert format_size(100) == "100 bytes"